@@ -0,0 +1,66 @@
+import shutil
+from pathlib import Path
+
+import duckdb
+
+from test_data.sample_data_generator import generate
+
+
+def taxi_db(scale: int, data_dir: str) -> str:
+    """
+    DuckDB file with `scale` synthetic rows in taxi_analysis_ready,
+    created on first use. Values are derived from hash(row) so every
+    build of a scale is identical.
+    """
+    path = Path(data_dir) / f"taxi_{scale}.duckdb"
+    if path.exists():
+        return str(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+
+    conn = duckdb.connect(str(tmp))
+    try:
+        conn.execute(f"""
+        CREATE TABLE taxi_analysis_ready AS
+        SELECT
+            strftime(DATE '2024-01-01' + to_months(CAST(i % 12 AS INTEGER)), '%Y-%m')
+                AS year_month,
+            CAST(1 + hash(i) % 3 AS INTEGER) AS VendorID,
+            (hash(i * 7) % 3000) / 100.0 AS trip_distance,
+            CAST(1 + hash(i * 13) % 265 AS INTEGER) AS PULocationID,
+            3 + (hash(i * 31) % 9000) / 100.0 AS fare_amount
+        FROM range({int(scale)}) t(i)
+        ORDER BY year_month
+        """)
+    finally:
+        conn.close()
+    tmp.rename(path)
+    return str(path)
+
+
+def claims_parquet(scale: int, data_dir: str, seed: int = 42) -> str:
+    """
+    Hive-partitioned Parquet directory (loadmonth=YYYYMM/) with `scale`
+    synthetic claims over twelve loadmonths, created on first use.
+
+    Written by the chunked generator in test_data/sample_data_generator.py,
+    so even 10^8 rows never go through a CSV or sit in memory at once.
+    """
+    path = Path(data_dir) / f"claims_{scale}_{seed}"
+    if path.exists():
+        return str(path)
+
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    generate(
+        str(tmp),
+        rows=scale,
+        start_month="202408",
+        end_month="202507",
+        seed=seed,
+    )
+    tmp.rename(path)
+    return str(path)
@@ -0,0 +1,118 @@
+import gc
+import math
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in [0, 1]) of a non-empty list.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def max_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far, in MB. Includes native
+    allocations (e.g. DuckDB buffers) that tracemalloc cannot see.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(
+    fn: Callable[[], object],
+    iterations: int,
+    warmup: int = 1,
+    trace_memory: bool = True
+) -> dict:
+    """
+    Time fn over several iterations.
+
+    Warm-up calls are not timed. Peak Python heap is measured on one extra,
+    untimed call with tracemalloc enabled, so tracing overhead never skews
+    the latencies.
+
+    Returns:
+        {"iterations", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "min_ms",
+         "max_ms", "peak_python_mb", "max_rss_mb"}
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(iterations):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    peak_python_mb = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_python_mb = round(peak / (1024 * 1024), 3)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 0.50), 4),
+        "p95_ms": round(percentile(timings, 0.95), 4),
+        "p99_ms": round(percentile(timings, 0.99), 4),
+        "mean_ms": round(sum(timings) / len(timings), 4),
+        "min_ms": round(min(timings), 4),
+        "max_ms": round(max(timings), 4),
+        "peak_python_mb": peak_python_mb,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "peak_python_mb")
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float = 0.10) -> list[dict]:
+    """
+    Compare benchmark results with a saved baseline.
+
+    Cases are matched on (case, scale). A metric regresses when it grew by
+    more than threshold (0.10 = 10%) relative to the baseline.
+
+    Returns:
+        One entry per matched case:
+        {"case", "scale", "changes": {metric: ratio}, "regressions": [metric]}
+    """
+    previous = {(r["case"], r["scale"]): r for r in baseline}
+
+    comparisons = []
+    for result in results:
+        base = previous.get((result["case"], result["scale"]))
+        if base is None:
+            continue
+
+        changes = {}
+        regressions = []
+        for metric in COMPARED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            ratio = round(new / old, 3)
+            changes[metric] = ratio
+            if ratio > 1 + threshold:
+                regressions.append(metric)
+
+        comparisons.append({
+            "case": result["case"],
+            "scale": result["scale"],
+            "changes": changes,
+            "regressions": regressions,
+        })
+    return comparisons
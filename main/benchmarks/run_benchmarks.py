@@ -0,0 +1,262 @@
+"""
+Benchmark the SQL builders, validator, executor, diagnostics and the
+offline claims scenario runner across data scale factors.
+
+Usage (from main/):
+    python -m benchmarks.run_benchmarks --scales 10000,1000000 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --output new.json
+
+End-to-end analyze_question latency is measured offline against LLM
+responses recorded with llm_backend=record (see utils.llm_backend):
+    python -m benchmarks.run_benchmarks --llm-replay llm.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import duckdb
+
+from benchmarks.datasets import claims_parquet, taxi_db
+from benchmarks.harness import compare, measure
+from diagnostics.executor import DiagnosticExecutor
+from planners.planner_validator_claims import validate_plan_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from tools.sql_builder import build_sql
+from tools.sql_builder_claims import build_claims_sql
+from tools.sql_executor import DuckDBExecutor
+
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+
+ANALYZE_QUESTION = "Why did average fare change by vendor last month?"
+
+TAXI_PLAN = {
+    "intent": "descriptive",
+    "metric": "avg_fare",
+    "time_range": "last_3_months",
+    "group_by": ["vendor", "pickup_location"],
+    "filters": [],
+    "analysis_steps": [],
+}
+
+TAXI_DIAGNOSTIC_PLAN = {
+    "intent": "diagnostic",
+    "metric": "avg_fare",
+    "time_range": "last_month",
+    "group_by": ["vendor"],
+    "filters": [],
+    "analysis_steps": [
+        "compare_previous_period",
+        "rank_top_contributors",
+        "check_related_metric:trip_count",
+    ],
+}
+
+CLAIMS_PLAN = {
+    "intent": "descriptive",
+    "metric": "hitrate",
+    "time_range": "last_3_months",
+    "group_by": ["subprogram", "category"],
+    "filters": [{"column": "drgconditiontype", "op": "IN", "value": ["MCC", "CC"]}],
+    "analysis_steps": [],
+}
+
+
+def micro_cases() -> dict:
+    """
+    Cases that do not touch data (scale-independent).
+    """
+    return {
+        "build_sql": lambda: build_sql(TAXI_PLAN, TAXI_SEMANTIC_SCHEMA),
+        "build_claims_sql": lambda: build_claims_sql(CLAIMS_PLAN, HEALTHCARE_CLAIMS_SCHEMA),
+        "validate_plan_claims": lambda: validate_plan_claims(
+            CLAIMS_PLAN, HEALTHCARE_CLAIMS_SCHEMA
+        ),
+    }
+
+
+def scale_cases(
+    scale: int, data_dir: str, work_dir: str, llm_replay: bool = False
+) -> tuple[dict, list]:
+    """
+    Data-backed cases for one scale factor. With llm_replay, also
+    analyze_question end to end on the installed replay backend.
+
+    Returns:
+        ({case name: callable}, [objects to close afterwards])
+    """
+    from scenario_test_claims import run_scenarios
+
+    executor = DuckDBExecutor(db_path=taxi_db(scale, data_dir))
+    descriptive_sql = build_sql(TAXI_PLAN, TAXI_SEMANTIC_SCHEMA)
+    diagnostics = DiagnosticExecutor(schema=TAXI_SEMANTIC_SCHEMA, sql_executor=executor)
+
+    claims = claims_parquet(scale, data_dir)
+    report = os.path.join(work_dir, f"scenarios_{scale}.csv")
+
+    cases = {
+        "executor_execute": lambda: executor.execute(descriptive_sql),
+        "diagnostics_run": lambda: diagnostics.run(dict(TAXI_DIAGNOSTIC_PLAN)),
+        "run_scenarios": lambda: run_scenarios(claims, report),
+    }
+    resources = [executor]
+
+    if llm_replay:
+        from runners.session import AnalysisSession
+
+        session = AnalysisSession(executor.db_path)
+        cases["analyze_question"] = lambda: session.analyze(ANALYZE_QUESTION)
+        resources.append(session)
+
+    return cases, resources
+
+
+def run(
+    scales: list[int],
+    data_dir: str,
+    iterations: int = 10,
+    micro_iterations: int = 1000,
+    cases: set[str] | None = None,
+    llm_replay: str | None = None,
+    llm_latency_ms: float | None = None
+) -> dict:
+    """
+    Run the benchmark suite and return a JSON-serializable report.
+
+    llm_replay is a recording from llm_backend=record; replayed with
+    llm_latency_ms per call (None: the recorded latencies) and falling
+    back to same-call-site responses for prompts that differ from the
+    recording (e.g. because the data scale changes the findings).
+    """
+    results = []
+
+    if llm_replay:
+        from utils.llm_backend import ReplayBackend, set_llm_backend
+
+        set_llm_backend(
+            ReplayBackend(llm_replay, latency_ms=llm_latency_ms, strict=False)
+        )
+
+    def record(name: str, scale, fn, n: int):
+        if cases and name not in cases:
+            return
+        print(f"[bench] {name} scale={scale} x{n}", file=sys.stderr)
+        stats = measure(fn, iterations=n)
+        results.append({"case": name, "scale": scale, **stats})
+
+    try:
+        for name, fn in micro_cases().items():
+            record(name, None, fn, micro_iterations)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            for scale in scales:
+                scale_fns, resources = scale_cases(
+                    scale, data_dir, work_dir, llm_replay=bool(llm_replay)
+                )
+                try:
+                    for name, fn in scale_fns.items():
+                        record(name, scale, fn, iterations)
+                finally:
+                    for resource in resources:
+                        resource.close()
+    finally:
+        if llm_replay:
+            set_llm_backend(None)
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scales": scales,
+            "iterations": iterations,
+            "micro_iterations": micro_iterations,
+            "llm_replay": llm_replay,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument(
+        "--scales",
+        type=str,
+        default=",".join(str(s) for s in DEFAULT_SCALES),
+        help="Comma-separated row counts (e.g. 10000,1000000,100000000)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=os.path.join("~", ".cache", "agent_sql", "bench_data"),
+        help="Where generated datasets are kept between runs",
+    )
+    parser.add_argument("--iterations", type=int, default=10,
+                        help="Timed iterations per data-backed case")
+    parser.add_argument("--micro-iterations", type=int, default=1000,
+                        help="Timed iterations per builder/validator case")
+    parser.add_argument("--cases", type=str, default=None,
+                        help="Comma-separated subset of case names to run")
+    parser.add_argument("--llm-replay", type=str, default=None,
+                        help="Recorded LLM responses; adds the analyze_question case")
+    parser.add_argument("--llm-latency-ms", type=float, default=None,
+                        help="Fixed simulated LLM latency (default: as recorded)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="JSON report path (default: stdout)")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Saved report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative growth counted as a regression (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any case regressed")
+    args = parser.parse_args()
+
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(
+            scales=[int(s) for s in args.scales.split(",") if s],
+            data_dir=os.path.expanduser(args.data_dir),
+            iterations=args.iterations,
+            micro_iterations=args.micro_iterations,
+            cases=set(args.cases.split(",")) if args.cases else None,
+            llm_replay=args.llm_replay,
+            llm_latency_ms=args.llm_latency_ms,
+        )
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare(report["results"], baseline["results"], args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "cases": comparison}
+        for entry in comparison:
+            status = "REGRESSED " + ",".join(entry["regressions"]) if entry["regressions"] else "ok"
+            print(
+                f"{entry['case']:<22} scale={entry['scale']!s:<10} "
+                f"p50 x{entry['changes'].get('p50_ms', '-')}  {status}",
+                file=sys.stderr,
+            )
+            regressed = regressed or bool(entry["regressions"])
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
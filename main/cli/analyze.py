@@ -1,6 +1,10 @@
 import argparse
+import json
+import sys
+from typing import TYPE_CHECKING
 
-from runners.analyze_question import analyze_question
+if TYPE_CHECKING:
+    from runners.session import AnalysisSession
 
 
 def main():
@@ -8,12 +12,21 @@ def main():
         description="Run end-to-end agentic analysis using DuckDB"
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--question",
         type=str,
-        required=True,
         help="Natural language question to analyze"
     )
+    source.add_argument(
+        "--questions-file",
+        type=str,
+        help=(
+            "Batch mode: file with one question per line (plain text or "
+            "JSON objects with a \"question\" key). Emits one JSON result "
+            "per line."
+        )
+    )
 
     parser.add_argument(
         "--db",
@@ -22,13 +35,44 @@ def main():
         help="Path to DuckDB file (e.g., taxi.duckdb)"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Batch mode: number of concurrent workers (default: 4)"
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Batch mode: JSONL output path (default: stdout)"
+    )
 
-    result = analyze_question(
-        question=args.question,
-        duckdb_path=args.db
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Print the summary incrementally as it is generated "
+            "(single question only)"
+        )
     )
 
+    args = parser.parse_args()
+    if args.stream and args.questions_file:
+        # Batch results are whole JSON lines; there is nowhere to stream to
+        parser.error("--stream cannot be used with --questions-file")
+
+    # Imported after parsing so --help and argument errors stay fast
+    from runners.session import AnalysisSession
+
+    with AnalysisSession(duckdb_path=args.db) as session:
+        if args.questions_file:
+            run_batch_mode(args, session)
+            return
+
+        result = session.analyze(args.question, summarize=not args.stream)
+
     print("\n====================")
     print("QUESTION")
     print("====================")
@@ -47,7 +91,14 @@ def main():
     print("\n====================")
     print("SUMMARY")
     print("====================")
-    print(result["summary"])
+    if args.stream:
+        from insights.summarizer import stream_summarize_insights
+
+        for chunk in stream_summarize_insights(result["payload"]):
+            print(chunk, end="", flush=True)
+        print()
+    else:
+        print(result["summary"])
 
     print("\n====================")
     print("DIAGNOSTICS (keys)")
@@ -56,5 +107,34 @@ def main():
         print("-", k)
 
 
+def run_batch_mode(args, session: "AnalysisSession"):
+    """
+    Answer every question in args.questions_file on a worker pool sharing
+    one session, streaming JSON lines as results complete. The batch
+    summary is printed to stderr.
+    """
+    from runners.batch import read_questions, run_batch, to_jsonable
+
+    questions = read_questions(args.questions_file)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    def write(record: dict):
+        out.write(json.dumps(to_jsonable(record), ensure_ascii=True) + "\n")
+        out.flush()
+
+    try:
+        summary = run_batch(
+            questions,
+            analyze=session.analyze,
+            on_result=write,
+            workers=args.workers
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(json.dumps({"batch_summary": summary}), file=sys.stderr)
+
+
 if __name__ == "__main__":
     main()
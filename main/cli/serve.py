@@ -0,0 +1,101 @@
+import argparse
+import os
+import stat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve analyze_question, the SQL builders and the plan validators "
+            "from a long-running local daemon (see runners.daemon)"
+        )
+    )
+
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=None,
+        help="Taxi DuckDB file; enables /analyze and time-anchored /sql"
+    )
+
+    parser.add_argument(
+        "--claims-csv",
+        type=str,
+        default=None,
+        help="Claims CSV; enables /claims/execute and time-anchored /claims/sql"
+    )
+
+    parser.add_argument(
+        "--ingest-cache-dir",
+        type=str,
+        default=None,
+        help="Parquet cache for the claims CSV (default: env ingest_cache_dir)"
+    )
+
+    parser.add_argument(
+        "--rollup-dimensions",
+        type=int,
+        default=None,
+        help="Build claims rollups up to this many dimensions at startup"
+    )
+
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+
+    parser.add_argument(
+        "--unix-socket",
+        type=str,
+        default=None,
+        help="Listen on this Unix socket path instead of host:port"
+    )
+
+    args = parser.parse_args()
+    if args.unix_socket and not _remove_socket(args.unix_socket):
+        parser.error(f"--unix-socket {args.unix_socket} exists and is not a socket")
+
+    # Imported after parsing so --help and argument errors stay fast
+    from runners.daemon import AnalysisService, make_server
+
+    service = AnalysisService(
+        duckdb_path=args.db,
+        claims_csv=args.claims_csv,
+        ingest_cache_dir=args.ingest_cache_dir,
+        rollup_dimensions=args.rollup_dimensions
+    )
+
+    server = make_server(
+        service, host=args.host, port=args.port, unix_socket=args.unix_socket
+    )
+
+    address = args.unix_socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving on {address}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix_socket:
+            _remove_socket(args.unix_socket)
+
+
+def _remove_socket(path: str) -> bool:
+    """
+    Remove a stale Unix socket at path. Anything else is left in place.
+
+    Returns:
+        False if path exists and is not a socket, else True.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        return False
+    os.unlink(path)
+    return True
+
+
+if __name__ == "__main__":
+    main()
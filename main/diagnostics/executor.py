@@ -1,4 +1,6 @@
-from tools.sql_builder import build_sql
+from tools.sql_builder import build_period_comparison_sql, build_sql
+from tools.time_anchor import resolve_time_anchor
+from utils.tracing import span
 
 
 class DiagnosticExecutor:
@@ -32,22 +34,39 @@ class DiagnosticExecutor:
         group_by = plan.get("group_by", [])
         filters = plan.get("filters", [])
 
+        # Resolve the latest month once (cached per data version) so every
+        # step uses literal time bounds instead of a SELECT MAX subquery.
+        # Passed to each step rather than stored: one executor is shared by
+        # batch and daemon threads.
+        with span("diagnostics.time_anchor"):
+            time_anchor = resolve_time_anchor(self.sql_executor, self.schema)
+
         for step in plan.get("analysis_steps", []):
-            if step == "compare_previous_period":
-                results["period_comparison"] = self._compare_previous_period(
-                    metric, time_range, group_by, filters
-                )
-
-            elif step == "rank_top_contributors":
-                results["top_contributors"] = self._rank_top_contributors(
-                    metric, time_range, group_by, filters
-                )
-
-            elif step.startswith("check_related_metric"):
-                related_metric = step.split(":")[1]
-                results[f"related_{related_metric}"] = self._check_related_metric(
-                    related_metric, time_range, group_by, filters
-                )
+            with span(f"diagnostics.{step}", metric=metric) as current:
+                if step == "compare_previous_period":
+                    key = "period_comparison"
+                    results[key] = self._compare_previous_period(
+                        metric, time_range, group_by, filters, time_anchor
+                    )
+
+                elif step == "rank_top_contributors":
+                    key = "top_contributors"
+                    results[key] = self._rank_top_contributors(
+                        metric, time_range, group_by, filters, time_anchor
+                    )
+
+                elif step.startswith("check_related_metric"):
+                    related_metric = step.split(":")[1]
+                    key = f"related_{related_metric}"
+                    results[key] = self._check_related_metric(
+                        related_metric, time_range, group_by, filters, time_anchor
+                    )
+
+                else:
+                    continue
+
+                if hasattr(results[key], "__len__") and not isinstance(results[key], dict):
+                    current.set(rows=len(results[key]))
 
         return results
 
@@ -59,52 +78,47 @@ class DiagnosticExecutor:
         metric: str,
         time_range: str,
         group_by: list,
-        filters: list
-    ) -> dict:
+        filters: list,
+        time_anchor=None
+    ):
         """
         Compare metric between current and previous period.
 
+        Both periods are aggregated in a single scan; the result has one row
+        per group with <metric>_current, <metric>_previous, abs_change and
+        pct_change columns.
+
         NOTE:
         v1 simplification:
         - current = last_month
         - previous = last_3_months (baseline proxy)
         """
 
-        current_plan = {
-            "intent": "descriptive",
-            "metric": metric,
-            "time_range": "last_month",
-            "group_by": group_by,
-            "filters": filters,
-            "analysis_steps": []
-        }
-
-        previous_plan = {
+        plan = {
             "intent": "descriptive",
             "metric": metric,
-            "time_range": "last_3_months",
+            "time_range": time_range,
             "group_by": group_by,
             "filters": filters,
             "analysis_steps": []
         }
 
-        current_sql = build_sql(current_plan, self.schema)
-        previous_sql = build_sql(previous_plan, self.schema)
-
-        current_df = self.sql_executor.execute(current_sql)
-        previous_df = self.sql_executor.execute(previous_sql)
-
-        return {
-            "current_period": current_df,
-            "previous_period": previous_df
-        }
+        sql = build_period_comparison_sql(
+            plan,
+            self.schema,
+            current_range="last_month",
+            baseline_range="last_3_months",
+            time_anchor=time_anchor
+        )
+        return self.sql_executor.execute(sql)
 
     def _rank_top_contributors(
         self,
         metric: str,
         time_range: str,
         group_by: list,
-        filters: list
+        filters: list,
+        time_anchor=None
     ):
         """
         Rank contributors (dimensions) by metric value.
@@ -124,7 +138,7 @@ class DiagnosticExecutor:
             "analysis_steps": []
         }
 
-        sql = build_sql(plan, self.schema)
+        sql = build_sql(plan, self.schema, time_anchor=time_anchor)
         df = self.sql_executor.execute(sql)
 
         if metric not in df.columns:
@@ -139,7 +153,8 @@ class DiagnosticExecutor:
         related_metric: str,
         time_range: str,
         group_by: list,
-        filters: list
+        filters: list,
+        time_anchor=None
     ):
         """
         Execute analysis for a related metric (e.g., avg_trip_distance).
@@ -154,5 +169,5 @@ class DiagnosticExecutor:
             "analysis_steps": []
         }
 
-        sql = build_sql(plan, self.schema)
+        sql = build_sql(plan, self.schema, time_anchor=time_anchor)
         return self.sql_executor.execute(sql)
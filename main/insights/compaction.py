@@ -0,0 +1,196 @@
+import itertools
+import json
+
+
+DEFAULT_TOKEN_BUDGET = 4000
+DEFAULT_TOP_K = 5
+
+# Rows sampled to estimate the serialized size of a full result
+SAMPLE_ROWS = 50
+
+
+def estimate_tokens(value) -> int:
+    """
+    Rough token count of a value once rendered into a prompt
+    (~4 characters per token).
+    """
+    return len(json.dumps(value, default=str)) // 4 + 1
+
+
+def estimate_rows_tokens(sample: list[dict], total_rows: int) -> int:
+    """
+    Rough token count of total_rows rows, extrapolated from a sample of
+    them (0 for an empty sample).
+    """
+    if not sample:
+        return 0
+    return estimate_tokens(sample) * total_rows // len(sample)
+
+
+def compact_result(
+    value,
+    token_budget: int,
+    top_k: int = DEFAULT_TOP_K
+) -> list[dict] | dict:
+    """
+    Fit a tabular result into a token budget.
+
+    Results that fit are returned unchanged as a list of row dicts. Larger
+    results are summarized in DuckDB into:
+
+        {
+            "truncated": True,
+            "total_rows": ...,
+            "rows_shown": ...,
+            "sort_column": ...,
+            "top": [...],             # top-k rows by sort_column
+            "bottom": [...],          # bottom-k rows by sort_column
+            "largest_movers": [...],  # top-k by |abs_change| (comparisons)
+            "stats": {column: {"min", "max", "mean", "median", "sum"}}
+        }
+
+    k starts at top_k and is halved until the summary fits the budget.
+
+    Measure columns follow the builders' output layout: for period
+    comparisons everything from <metric>_current onwards, otherwise the
+    last column. Rows are ranked by <metric>_current or the last column.
+
+    Args:
+        value: pandas DataFrame, pyarrow Table, or iterator of RecordBatches
+        token_budget: Approximate token budget for this result
+        top_k: Maximum rows kept at each end
+
+    Returns:
+        Row dicts, or the summary dict above.
+    """
+    import duckdb
+
+    conn = duckdb.connect()
+    try:
+        if not _load(conn, value):
+            return []
+
+        total_rows = conn.execute("SELECT COUNT(*) FROM result").fetchone()[0]
+        sample = _records(
+            conn, f"SELECT * FROM result LIMIT {SAMPLE_ROWS}"
+        )
+        if not sample:
+            return []
+
+        if estimate_rows_tokens(sample, total_rows) <= token_budget:
+            if total_rows <= len(sample):
+                return sample
+            return _records(conn, "SELECT * FROM result")
+
+        columns = list(sample[0].keys())
+        measures = _measure_columns(columns)
+        sort_column = measures[0] if len(measures) > 1 else columns[-1]
+        stats = _column_stats(conn, measures)
+
+        k = max(1, top_k)
+        while True:
+            summary = _summarize(conn, total_rows, sort_column, columns, k, stats)
+            if k == 1 or estimate_tokens(summary) <= token_budget:
+                return summary
+            k //= 2
+    finally:
+        conn.close()
+
+
+def _load(conn, value) -> bool:
+    """
+    Expose value to conn as "result". Batch iterators are materialized
+    into a DuckDB table so they can be queried more than once.
+    """
+    if hasattr(value, "__next__"):
+        import pyarrow as pa
+
+        first = next(value, None)
+        if first is None:
+            return False
+        reader = pa.RecordBatchReader.from_batches(
+            first.schema, itertools.chain([first], value)
+        )
+        conn.register("result_source", reader)
+        conn.execute("CREATE TABLE result AS SELECT * FROM result_source")
+        conn.unregister("result_source")
+        return True
+
+    conn.register("result", value)
+    return True
+
+
+def _measure_columns(columns: list[str]) -> list[str]:
+    for i, name in enumerate(columns):
+        if name.endswith("_current"):
+            return columns[i:]
+    return columns[-1:]
+
+
+def _column_stats(conn, measures: list[str]) -> dict:
+    selects = []
+    for name in measures:
+        col = _quote(name)
+        selects += [
+            f"MIN({col})",
+            f"MAX({col})",
+            f"AVG({col})",
+            f"MEDIAN({col})",
+            f"SUM({col})",
+        ]
+    row = conn.execute(f"SELECT {', '.join(selects)} FROM result").fetchone()
+
+    stats = {}
+    for i, name in enumerate(measures):
+        values = [_plain(v) for v in row[i * 5:(i + 1) * 5]]
+        stats[name] = dict(zip(["min", "max", "mean", "median", "sum"], values))
+    return stats
+
+
+def _summarize(conn, total_rows, sort_column, columns, k, stats) -> dict:
+    col = _quote(sort_column)
+    top = _records(
+        conn, f"SELECT * FROM result ORDER BY {col} DESC NULLS LAST LIMIT {k}"
+    )
+    bottom = _records(
+        conn, f"SELECT * FROM result ORDER BY {col} ASC NULLS LAST LIMIT {k}"
+    )
+
+    summary = {
+        "truncated": True,
+        "total_rows": total_rows,
+        "rows_shown": len(top) + len(bottom),
+        "sort_column": sort_column,
+        "top": top,
+        "bottom": bottom,
+    }
+
+    if "abs_change" in columns:
+        summary["largest_movers"] = _records(
+            conn,
+            "SELECT * FROM result "
+            f"ORDER BY ABS(abs_change) DESC NULLS LAST LIMIT {k}"
+        )
+        summary["rows_shown"] += len(summary["largest_movers"])
+
+    summary["stats"] = stats
+    return summary
+
+
+def _records(conn, sql: str) -> list[dict]:
+    return conn.execute(sql).df().to_dict(orient="records")
+
+
+def _plain(value):
+    # DECIMAL / HUGEINT aggregates come back as Decimal
+    if value is None or isinstance(value, (int, float, str, bool)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _quote(name: str) -> str:
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
@@ -1,7 +1,38 @@
-import pandas as pd
+import sys
 
+from insights.compaction import (
+    DEFAULT_TOKEN_BUDGET,
+    SAMPLE_ROWS,
+    compact_result,
+    estimate_rows_tokens,
+)
+
+
+def build_insight_payload(
+    plan: dict,
+    diagnostics: dict,
+    token_budget: int | None = DEFAULT_TOKEN_BUDGET
+) -> dict:
+    """
+    Build the summarizer input from diagnostic results.
+
+    Tabular findings (period_comparison, related_*, descriptive_result)
+    share token_budget. A finding that does not fit its share is replaced
+    by a compact summary (top/bottom rows, largest movers, statistics)
+    flagged with "truncated": True; see insights.compaction. Pass
+    token_budget=None to include every row.
+    """
+    tabular_keys = [
+        key for key, value in diagnostics.items()
+        if _is_tabular(value) and (
+            key in ("period_comparison", "descriptive_result")
+            or key.startswith("related_")
+        )
+    ]
+    share = None
+    if token_budget is not None:
+        share = max(1, token_budget // max(1, len(tabular_keys)))
 
-def build_insight_payload(plan: dict, diagnostics: dict) -> dict:
     payload = {
         "intent": plan["intent"],
         "metric": plan["metric"],
@@ -9,25 +40,22 @@ def build_insight_payload(plan: dict, diagnostics: dict) -> dict:
         "findings": {}
     }
 
-    # Existing diagnostic handling (unchanged)
     if "period_comparison" in diagnostics:
-        period = diagnostics["period_comparison"]
-        payload["findings"]["period_comparison"] = {
-            "current_value": period["current_period"].to_dict(orient="records"),
-            "previous_value": period["previous_period"].to_dict(orient="records")
-        }
+        payload["findings"]["period_comparison"] = _fit_result(
+            diagnostics["period_comparison"], share
+        )
 
     if "top_contributors" in diagnostics:
         top = diagnostics["top_contributors"]
-        if isinstance(top, pd.DataFrame):
-            payload["findings"]["top_contributors"] = top.head(5).to_dict(orient="records")
+        if _is_tabular(top):
+            payload["findings"]["top_contributors"] = result_to_records(top, limit=5)
         else:
             payload["findings"]["top_contributors"] = top
 
     for key, value in diagnostics.items():
         if key.startswith("related_"):
-            if isinstance(value, pd.DataFrame):
-                payload["findings"][key] = value.to_dict(orient="records")
+            if _is_tabular(value):
+                payload["findings"][key] = _fit_result(value, share)
             else:
                 payload["findings"][key] = value
 
@@ -35,8 +63,84 @@ def build_insight_payload(plan: dict, diagnostics: dict) -> dict:
     # NEW: Descriptive result
     # ----------------------------
     if "descriptive_result" in diagnostics:
-        payload["findings"]["descriptive_result"] = diagnostics[
-            "descriptive_result"
-        ].to_dict(orient="records")
+        payload["findings"]["descriptive_result"] = _fit_result(
+            diagnostics["descriptive_result"], share
+        )
 
     return payload
+
+
+def _fit_result(value, token_budget: int | None):
+    """
+    Records for a result, compacted if they would exceed token_budget.
+    """
+    if token_budget is None:
+        return result_to_records(value)
+
+    # Known-size results: estimate from a sample before converting anything
+    if _is_dataframe(value) or hasattr(value, "num_rows"):
+        total_rows = len(value)
+        sample = result_to_records(value, limit=SAMPLE_ROWS)
+        if estimate_rows_tokens(sample, total_rows) <= token_budget:
+            return sample if total_rows <= len(sample) else result_to_records(value)
+
+    return compact_result(value, token_budget)
+
+
+def _is_dataframe(value) -> bool:
+    # Without importing pandas: if it was never imported, nothing is a DataFrame
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+def _is_tabular(value) -> bool:
+    # DataFrame, pyarrow Table, or an iterator of RecordBatches
+    return (
+        _is_dataframe(value)
+        or hasattr(value, "to_pylist")
+        or hasattr(value, "__next__")
+    )
+
+
+def result_to_records(value, limit: int | None = None) -> list[dict]:
+    """
+    Convert a result to a list of row dicts, reading at most `limit` rows.
+
+    Accepts a pandas DataFrame, a pyarrow Table, or an iterator of pyarrow
+    RecordBatches (as yielded by DuckDBExecutor.execute_batches). Batch
+    iterators are consumed lazily, so only the batches needed to fill
+    `limit` are ever pulled from DuckDB.
+    """
+    if _is_dataframe(value):
+        if limit is not None:
+            value = value.head(limit)
+        return value.to_dict(orient="records")
+
+    if hasattr(value, "to_pylist"):
+        if limit is not None:
+            value = value.slice(0, limit)
+        return _arrow_to_pylist(value)
+
+    records: list[dict] = []
+    if limit is not None and limit <= 0:
+        return records
+    for batch in value:
+        if limit is not None:
+            batch = batch.slice(0, limit - len(records))
+        records.extend(_arrow_to_pylist(batch))
+        if limit is not None and len(records) >= limit:
+            break
+    return records
+
+
+def _arrow_to_pylist(data) -> list[dict]:
+    """
+    Arrow rows as dicts, with DECIMAL columns (e.g. DuckDB SUM over integers)
+    cast to float so records match the DataFrame path and stay JSON-safe.
+    """
+    import pyarrow as pa
+
+    for i, field in enumerate(data.schema):
+        if pa.types.is_decimal(field.type):
+            data = data.set_column(i, field.name, data.column(i).cast(pa.float64()))
+    return data.to_pylist()
@@ -1,21 +1,50 @@
-from openai import AzureOpenAI
-import os
+from utils.llm_backend import get_llm_backend
+from utils.tracing import annotate_usage
 
 
-api_key = os.environ.get("azure_api_key")
-azure_endpoint = os.environ.get("azure_endpoint")
+def summarize_insights(payload: dict) -> str:
+    response = get_llm_backend().complete(**_request(payload))
 
+    annotate_usage(response.usage)
+    return response.content
 
-# Initialize Azure OpenAI client
-client = AzureOpenAI(
-    api_key = api_key,
-    api_version = "2024-12-01-preview",
-    azure_endpoint = azure_endpoint
-)
 
+async def summarize_insights_async(payload: dict) -> str:
+    response = await get_llm_backend().acomplete(**_request(payload))
 
-def summarize_insights(payload: dict) -> str:
-    prompt = f"""
+    annotate_usage(response.usage)
+    return response.content
+
+
+def stream_summarize_insights(payload: dict):
+    """
+    Stream the summary as it is generated.
+
+    Yields:
+        str: Text chunks, in order; joined they form the full summary.
+    """
+    yield from get_llm_backend().stream(**_request(payload))
+
+
+async def astream_summarize_insights(payload: dict):
+    """
+    Async iterator variant of stream_summarize_insights.
+    """
+    async for text in get_llm_backend().astream(**_request(payload)):
+        yield text
+
+
+def _request(payload: dict) -> dict:
+    return {
+        "messages": [{"role": "user", "content": _build_prompt(payload)}],
+        "model": "gpt-4.1-mini",
+        "temperature": 0.2,
+        "max_tokens": 200
+    }
+
+
+def _build_prompt(payload: dict) -> str:
+    return f"""
 You are a data analyst assistant.
 
 Rules:
@@ -28,12 +57,3 @@ Findings:
 {payload}
 """
 
-    response = client.chat.completions.create(
-        model = "gpt-4.1-mini",
-        messages = [{"role": "user", "content": prompt}],
-        temperature = 0.2,
-        max_tokens = 200
-    )
-
-    return response.choices[0].message.content
-
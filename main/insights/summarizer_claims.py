@@ -1,21 +1,35 @@
-import os
+from utils.llm_backend import get_llm_backend
+from utils.tracing import annotate_usage
 
-from openai import AzureOpenAI
 
+def summarize_insights_claims(payload: dict) -> str:
+    response = get_llm_backend().complete(**_request(payload))
 
-api_key = os.environ.get("azure_api_key")
-azure_endpoint = os.environ.get("azure_endpoint")
+    annotate_usage(response.usage)
+    return response.content
 
 
-client = AzureOpenAI(
-    api_key=api_key,
-    api_version="2024-12-01-preview",
-    azure_endpoint=azure_endpoint,
-)
+def stream_summarize_insights_claims(payload: dict):
+    """
+    Stream the claims summary as it is generated.
 
+    Yields:
+        str: Text chunks, in order; joined they form the full summary.
+    """
+    yield from get_llm_backend().stream(**_request(payload))
 
-def summarize_insights_claims(payload: dict) -> str:
-    prompt = f"""
+
+def _request(payload: dict) -> dict:
+    return {
+        "messages": [{"role": "user", "content": _build_prompt(payload)}],
+        "model": "gpt-4.1-mini",
+        "temperature": 0.2,
+        "max_tokens": 200,
+    }
+
+
+def _build_prompt(payload: dict) -> str:
+    return f"""
 You are a data analyst assistant for healthcare claims.
 
 Rules:
@@ -29,12 +43,3 @@ Rules:
 Findings:
 {payload}
 """
-
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=200,
-    )
-
-    return response.choices[0].message.content
@@ -0,0 +1,200 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from planners.plan_cache import get_plan_cache, plan_cache_key
+from planners.planner_runner import run_planner
+from planners.planner_runner_claims import run_planner_claims
+from planners.planner_validator import validate_plan
+from planners.planner_validator_claims import validate_plan_claims
+from prompts.planner_prompt import build_batch_planner_prompt, build_planner_prompt
+from prompts.planner_prompt_claims import (
+    build_batch_planner_prompt_claims,
+    build_planner_prompt_claims,
+)
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from utils.llm_backend import LLMRequestRejected, get_llm_backend
+from utils.logger import get_logger
+from utils.tracing import annotate_usage, span
+
+
+DEFAULT_BATCH_SIZE = 10
+# Completion tokens allowed per question (single-question calls use 300)
+MAX_TOKENS_PER_PLAN = 300
+
+logger = get_logger("batch_planner")
+
+
+def run_planner_batch(
+    user_questions: list[str],
+    use_cache: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1
+) -> list[dict]:
+    """
+    Plan many taxi questions, batch_size questions per LLM request.
+
+    Returns one plan (or run_planner-style error dict) per question, in
+    input order. See _run_batch for caching and fallback behaviour.
+    """
+    return _run_batch(
+        user_questions,
+        schema=TAXI_SEMANTIC_SCHEMA,
+        cache_template=build_planner_prompt(schema=TAXI_SEMANTIC_SCHEMA, user_question=""),
+        build_messages=lambda questions: build_batch_planner_prompt(
+            TAXI_SEMANTIC_SCHEMA, questions
+        ),
+        validate=validate_plan,
+        plan_one=run_planner,
+        use_cache=use_cache,
+        batch_size=batch_size,
+        workers=workers,
+    )
+
+
+def run_planner_claims_batch(
+    user_questions: list[str],
+    use_cache: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1
+) -> list[dict]:
+    """
+    Plan many claims questions, batch_size questions per LLM request.
+
+    Returns one plan (or run_planner_claims-style error dict) per
+    question, in input order.
+    """
+    return _run_batch(
+        user_questions,
+        schema=HEALTHCARE_CLAIMS_SCHEMA,
+        cache_template=build_planner_prompt_claims(""),
+        build_messages=build_batch_planner_prompt_claims,
+        validate=validate_plan_claims,
+        plan_one=run_planner_claims,
+        use_cache=use_cache,
+        batch_size=batch_size,
+        workers=workers,
+    )
+
+
+def _run_batch(
+    user_questions: list[str],
+    schema: dict,
+    cache_template: list,
+    build_messages: Callable[[list[str]], list],
+    validate: Callable[[dict, dict], list],
+    plan_one: Callable[..., dict],
+    use_cache: bool,
+    batch_size: int,
+    workers: int
+) -> list[dict]:
+    """
+    Cached plans are served first (same cache keys as the single-question
+    planners). The rest go out in chunks of batch_size, workers chunks at
+    a time, and valid plans are cached.
+
+    Failures are isolated per question: an item that is missing from the
+    response or is not a JSON object is re-planned on its own, and a
+    response that does not parse as a JSON array, or that the provider
+    rejects (e.g. one question trips the content filter), falls back to
+    individual calls for its whole chunk.
+    """
+    cache = get_plan_cache() if use_cache else None
+    plans: list[dict | None] = [None] * len(user_questions)
+    keys: list[str | None] = [None] * len(user_questions)
+
+    pending = []
+    for i, question in enumerate(user_questions):
+        if cache is not None:
+            keys[i] = plan_cache_key(question, schema, cache_template)
+            plans[i] = cache.get(keys[i])
+        if plans[i] is None:
+            pending.append(i)
+
+    chunks = [
+        pending[start:start + max(1, batch_size)]
+        for start in range(0, len(pending), max(1, batch_size))
+    ]
+
+    def plan_chunk(chunk: list[int]):
+        questions = [user_questions[i] for i in chunk]
+        batch = _request_batch(questions, build_messages)
+        for offset, i in enumerate(chunk):
+            plan = batch[offset] if batch is not None else None
+            if plan is None:
+                # Single-question planner handles its own caching and errors
+                plans[i] = plan_one(user_questions[i], use_cache=use_cache)
+                continue
+            plans[i] = plan
+            if cache is not None and not validate(plan, schema):
+                cache.put(keys[i], plan)
+
+    with span("planner.batch", questions=len(user_questions), requests=len(chunks)):
+        if workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Worker threads do not inherit contextvars; run each chunk
+                # in a copy of this context so usage and spans land in the
+                # current trace
+                futures = [
+                    pool.submit(contextvars.copy_context().run, plan_chunk, chunk)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for chunk in chunks:
+                plan_chunk(chunk)
+
+    return plans
+
+
+def _request_batch(questions: list[str], build_messages) -> list[dict | None] | None:
+    """
+    Plans for questions from one request, None where an item is unusable;
+    None overall if the whole response is unusable.
+    """
+    try:
+        response = get_llm_backend().complete(
+            messages=build_messages(questions),
+            model="gpt-4.1-mini",
+            temperature=0.0,
+            max_tokens=MAX_TOKENS_PER_PLAN * len(questions),
+        )
+    except LLMRequestRejected as e:
+        logger.warning(f"Batch of {len(questions)} rejected, planning individually: {e}")
+        return None
+
+    annotate_usage(response.usage)
+    items = _parse_items(response.content)
+    if items is None:
+        logger.warning(f"Unparseable batch of {len(questions)}, planning individually")
+        return None
+
+    by_id = {}
+    for position, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            continue
+        try:
+            item_id = int(item.get("id", position))
+        except (TypeError, ValueError):
+            continue
+        if isinstance(item.get("plan"), dict):
+            by_id.setdefault(item_id, item["plan"])
+
+    return [by_id.get(number) for number in range(1, len(questions) + 1)]
+
+
+def _parse_items(content: str | None) -> list | None:
+    if not content:
+        return None
+    text = content.strip()
+    if text.startswith("```"):
+        # Tolerate a markdown fence around the array
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return items if isinstance(items, list) else None
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "agent_sql" / "planner_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def normalize_question(question: str) -> str:
+    """
+    Canonical form of a user question: single-spaced, with trailing
+    punctuation removed.
+
+    Case is kept: questions can carry case-sensitive filter values
+    (provider IDs, category codes like CAT_AUTO_SEL) that must not share a
+    cached plan.
+    """
+    text = " ".join(question.split())
+    return re.sub(r"[\s?.!]+$", "", text)
+
+
+def hash_json(value) -> str:
+    """
+    Stable hash of a JSON-like structure (sets are hashed in sorted order).
+    """
+    encoded = json.dumps(
+        value,
+        sort_keys=True,
+        default=lambda o: sorted(o) if isinstance(o, (set, frozenset)) else str(o),
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def plan_cache_key(question: str, schema: dict, prompt_messages: list) -> str:
+    """
+    Cache key for a planner call.
+
+    Args:
+        question: Raw user question (normalized here)
+        schema: Semantic schema the plan is generated against
+        prompt_messages: Prompt builder output for a fixed placeholder
+            question, so any change to the prompt text changes the key
+    """
+    parts = [normalize_question(question), hash_json(schema), hash_json(prompt_messages)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    On-disk SQLite cache of validated planner outputs.
+
+    Planner calls run at temperature 0, so a plan for the same canonical
+    question, schema and prompt can be replayed instead of calling the LLM.
+    Entries expire after ttl_seconds; the least recently used entries are
+    evicted once max_entries is exceeded.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plans (
+                key TEXT PRIMARY KEY,
+                plan TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS plans_last_used ON plans (last_used)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the cached plan for key, or None if missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan, created_at FROM plans WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            plan_json, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE plans SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+
+        return json.loads(plan_json)
+
+    def put(self, key: str, plan: dict):
+        """
+        Store a validated plan, evicting least recently used entries if the
+        cache is over max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (key, plan, created_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(plan), now, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM plans WHERE key IN (
+                    SELECT key FROM plans
+                    ORDER BY last_used DESC, rowid DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM plans")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: PlanCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache | None:
+    """
+    Process-wide planner cache.
+
+    Location comes from the planner_cache_path environment variable
+    (defaults to ~/.cache/agent_sql/planner_cache.sqlite); set it to an
+    empty string to disable caching.
+    """
+    global _default_cache
+
+    path = os.environ.get("planner_cache_path", str(DEFAULT_CACHE_PATH))
+    if not path:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.path != path:
+            _default_cache = PlanCache(path)
+        return _default_cache
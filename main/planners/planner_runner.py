@@ -1,61 +1,131 @@
 import json
-from openai import AzureOpenAI
-from openai import BadRequestError
-import os
 
 from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
 from prompts.planner_prompt import build_planner_prompt
 
+from planners.plan_cache import get_plan_cache, plan_cache_key
 from planners.planner_validator import validate_plan
+from utils.llm_backend import LLMRequestRejected, get_llm_backend
 from utils.logger import get_logger
+from utils.tracing import annotate_usage
 
-api_key = os.environ.get("azure_api_key")
-azure_endpoint = os.environ.get("azure_endpoint")
 
+def run_planner(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Generate a plan for a taxi question.
 
-# Initialize Azure OpenAI client
-client = AzureOpenAI(
-    api_key = api_key,
-    api_version = "2024-12-01-preview",
-    azure_endpoint = azure_endpoint
-)
+    Validated plans are served from / stored in the persistent planner
+    cache (see planners.plan_cache) unless use_cache is False.
+    """
+    cache, cache_key, cached = _lookup_cached_plan(user_question, use_cache)
+    if cached is not None:
+        return cached
 
-
-def run_planner(user_question: str) -> dict:
     messages = build_planner_prompt(
         schema = TAXI_SEMANTIC_SCHEMA,
         user_question = user_question
     )
 
+    content = None
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            temperature=0.0,
-            max_tokens=300
+        response = get_llm_backend().complete(
+            messages = messages,
+            model = "gpt-4.1-mini",
+            temperature = 0.0,
+            max_tokens = 300
         )
 
-        content = response.choices[0].message.content
+        annotate_usage(response.usage)
+        content = response.content
+        return _parse_plan(content, cache, cache_key)
+
+    except LLMRequestRejected as e:
+        return _content_filtered(e, user_question)
+
+    except json.JSONDecodeError:
+        return _invalid_json(content, user_question)
+
+
+async def run_planner_async(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Async variant of run_planner using the backend's async API.
 
-        # Enforce JSON parsing
-        return json.loads(content)
+    Plan cache reads and writes are SQLite I/O, so they run in a worker
+    thread instead of blocking the event loop.
+    """
+    import asyncio
+
+    cache, cache_key, cached = await asyncio.to_thread(
+        _lookup_cached_plan, user_question, use_cache
+    )
+    if cached is not None:
+        return cached
 
-    except BadRequestError as e:
-        # Azure content filter / Responsible AI policy
-        return {
-            "error": "CONTENT_FILTERED",
-            "error_type": "AZURE_POLICY",
-            "message": str(e),
-            "question": user_question
-        }
+    messages = build_planner_prompt(
+        schema = TAXI_SEMANTIC_SCHEMA,
+        user_question = user_question
+    )
+
+    content = None
+    try:
+        response = await get_llm_backend().acomplete(
+            messages = messages,
+            model = "gpt-4.1-mini",
+            temperature = 0.0,
+            max_tokens = 300
+        )
+
+        annotate_usage(response.usage)
+        content = response.content
+        return await asyncio.to_thread(_parse_plan, content, cache, cache_key)
+
+    except LLMRequestRejected as e:
+        return _content_filtered(e, user_question)
 
     except json.JSONDecodeError:
-        return {
-            "error": "INVALID_JSON",
-            "error_type": "PARSER",
-            "raw_output": content,
-            "question": user_question
-        }
+        return _invalid_json(content, user_question)
+
+
+def _lookup_cached_plan(user_question: str, use_cache: bool):
+    cache = get_plan_cache() if use_cache else None
+    if cache is None:
+        return None, None, None
+
+    cache_key = plan_cache_key(
+        user_question,
+        TAXI_SEMANTIC_SCHEMA,
+        build_planner_prompt(schema = TAXI_SEMANTIC_SCHEMA, user_question = "")
+    )
+    return cache, cache_key, cache.get(cache_key)
+
+
+def _parse_plan(content: str, cache, cache_key) -> dict:
+    # Enforce JSON parsing
+    plan = json.loads(content)
+
+    if cache is not None and not validate_plan(plan, TAXI_SEMANTIC_SCHEMA):
+        cache.put(cache_key, plan)
+
+    return plan
+
+
+def _content_filtered(error: Exception, user_question: str) -> dict:
+    # Azure content filter / Responsible AI policy
+    return {
+        "error": "CONTENT_FILTERED",
+        "error_type": "AZURE_POLICY",
+        "message": str(error),
+        "question": user_question
+    }
+
+
+def _invalid_json(content: str, user_question: str) -> dict:
+    return {
+        "error": "INVALID_JSON",
+        "error_type": "PARSER",
+        "raw_output": content,
+        "question": user_question
+    }
 
 
 if __name__ == "__main__":
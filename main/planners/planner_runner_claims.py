@@ -1,38 +1,54 @@
 import json
-import os
-
-from openai import AzureOpenAI
-from openai import BadRequestError
 
+from planners.plan_cache import get_plan_cache, plan_cache_key
+from planners.planner_validator_claims import validate_plan_claims
 from prompts.planner_prompt_claims import build_planner_prompt_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from utils.llm_backend import LLMRequestRejected, get_llm_backend
+from utils.tracing import annotate_usage
 
 
-api_key = os.environ.get("azure_api_key")
-azure_endpoint = os.environ.get("azure_endpoint")
-
-
-client = AzureOpenAI(
-    api_key=api_key,
-    api_version="2024-12-01-preview",
-    azure_endpoint=azure_endpoint,
-)
+def run_planner_claims(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Generate a plan for a claims question.
 
+    Validated plans are served from / stored in the persistent planner
+    cache (see planners.plan_cache) unless use_cache is False.
+    """
+    cache = get_plan_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = plan_cache_key(
+            user_question,
+            HEALTHCARE_CLAIMS_SCHEMA,
+            build_planner_prompt_claims(""),
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-def run_planner_claims(user_question: str) -> dict:
     messages = build_planner_prompt_claims(user_question)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
+        response = get_llm_backend().complete(
             messages=messages,
+            model="gpt-4.1-mini",
             temperature=0.0,
             max_tokens=300,
         )
 
-        content = response.choices[0].message.content
-        return json.loads(content)
+        annotate_usage(response.usage)
+        content = response.content
+        plan = json.loads(content)
+
+        if cache is not None and not validate_plan_claims(
+            plan, HEALTHCARE_CLAIMS_SCHEMA
+        ):
+            cache.put(cache_key, plan)
+
+        return plan
 
-    except BadRequestError as e:
+    except LLMRequestRejected as e:
         return {
             "error": "CONTENT_FILTERED",
             "error_type": "AZURE_POLICY",
@@ -1,4 +1,6 @@
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Set
+
+from schemas.compiled import CompiledSchema, compile_schema
 
 
 # ---- Allowed analysis steps (STRICT ENUM) ----
@@ -11,30 +13,35 @@ ALLOWED_ANALYSIS_STEPS: Set[str] = {
     "check_related_metric:avg_trip_distance"
 }
 
+REQUIRED_KEYS: Set[str] = {
+    "intent",
+    "metric",
+    "time_range",
+    "group_by",
+    "filters",
+    "analysis_steps"
+}
+
 
-def validate_plan(plan: Dict, schema: Dict) -> List[str]:
+def validate_plan(plan: Dict, schema: Dict | CompiledSchema) -> List[str]:
     """
     Validates planner output against schema and safety rules.
 
+    schema may be the raw semantic schema dict or its compiled form
+    (see schemas.compiled.compile_schema); dicts are compiled once and
+    cached.
+
     Returns:
         List[str]: A list of validation error messages.
                    Empty list means the plan is valid.
     """
+    compiled = compile_schema(schema)
     errors: List[str] = []
 
     # ----------------------------
     # 1. Basic shape validation
     # ----------------------------
-    required_keys = {
-        "intent",
-        "metric",
-        "time_range",
-        "group_by",
-        "filters",
-        "analysis_steps"
-    }
-
-    missing_keys = required_keys - plan.keys()
+    missing_keys = REQUIRED_KEYS - plan.keys()
     if missing_keys:
         errors.append(f"Missing required keys: {missing_keys}")
         # If shape is wrong, stop early
@@ -60,7 +67,7 @@ def validate_plan(plan: Dict, schema: Dict) -> List[str]:
         # Explicitly allowed and EXPECTED for evil prompts
         pass
 
-    elif metric not in schema["metrics"]:
+    elif metric not in compiled.metrics:
         # Anything else is a hallucination
         errors.append(f"Invalid metric (hallucinated): {metric}")
 
@@ -70,8 +77,7 @@ def validate_plan(plan: Dict, schema: Dict) -> List[str]:
     time_range = plan.get("time_range", "")
 
     if time_range:
-        supported_ranges = schema["time"]["supported_ranges"]
-        if time_range not in supported_ranges:
+        if time_range not in compiled.supported_ranges:
             errors.append(f"Invalid time_range: {time_range}")
 
     # ----------------------------
@@ -84,7 +90,7 @@ def validate_plan(plan: Dict, schema: Dict) -> List[str]:
 
     else:
         for dim in group_by:
-            if dim not in schema["dimensions"]:
+            if dim not in compiled.dimension_columns:
                 errors.append(f"Invalid group_by dimension: {dim}")
 
     # ----------------------------
@@ -111,3 +117,17 @@ def validate_plan(plan: Dict, schema: Dict) -> List[str]:
     # (You can add stricter filter validation later)
 
     return errors
+
+
+def validate_many(plans: Iterable[Dict], schema: Dict | CompiledSchema) -> List[List[str]]:
+    """
+    Validate many plans against one schema.
+
+    The schema is compiled once up front, so this is the cheap path for
+    replaying or scoring large batches of planner outputs.
+
+    Returns:
+        List[List[str]]: errors for each plan, in input order.
+    """
+    compiled = compile_schema(schema)
+    return [validate_plan(plan, compiled) for plan in plans]
@@ -1,4 +1,6 @@
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Set
+
+from schemas.compiled import RELATED_METRIC_STEP_PREFIX, CompiledSchema, compile_schema
 
 
 ALLOWED_BASE_ANALYSIS_STEPS: Set[str] = {
@@ -12,26 +14,32 @@ ALLOWED_BASE_ANALYSIS_STEPS: Set[str] = {
 
 ALLOWED_FILTER_OPS: Set[str] = {"=", "!=", ">", ">=", "<", "<=", "LIKE", "IN"}
 
+REQUIRED_KEYS: Set[str] = {
+    "intent",
+    "metric",
+    "time_range",
+    "group_by",
+    "filters",
+    "analysis_steps",
+}
+
+_FILTER_KEYS = ("column", "op", "value")
 
-def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
+
+def validate_plan_claims(plan: Dict, schema: Dict | CompiledSchema) -> List[str]:
     """
     Validates claims planner output against claims schema and safety rules.
 
+    schema may be the raw claims schema dict or its compiled form (see
+    schemas.compiled.compile_schema); dicts are compiled once and cached.
+
     Returns:
         List[str]: validation error messages; empty means valid.
     """
+    compiled = compile_schema(schema)
     errors: List[str] = []
 
-    required_keys = {
-        "intent",
-        "metric",
-        "time_range",
-        "group_by",
-        "filters",
-        "analysis_steps",
-    }
-
-    missing_keys = required_keys - plan.keys()
+    missing_keys = REQUIRED_KEYS - plan.keys()
     if missing_keys:
         errors.append(f"Missing required keys: {missing_keys}")
         return errors
@@ -45,13 +53,12 @@ def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
         pass
     elif metric == "UNSUPPORTED_METRIC":
         pass
-    elif metric not in schema["metrics"]:
+    elif metric not in compiled.metrics:
         errors.append(f"Invalid metric (hallucinated): {metric}")
 
     time_range = plan.get("time_range", "")
     if time_range:
-        supported_ranges = schema["time"]["supported_ranges"]
-        if time_range not in supported_ranges:
+        if time_range not in compiled.supported_ranges:
             errors.append(f"Invalid time_range: {time_range}")
 
     group_by = plan.get("group_by", [])
@@ -59,7 +66,7 @@ def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
         errors.append("group_by must be a list")
     else:
         for dim in group_by:
-            if dim not in schema["dimensions"]:
+            if dim not in compiled.dimension_columns:
                 errors.append(f"Invalid group_by dimension: {dim}")
 
     analysis_steps = plan.get("analysis_steps", [])
@@ -67,13 +74,11 @@ def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
         errors.append("analysis_steps must be a list")
     else:
         for step in analysis_steps:
-            if step in ALLOWED_BASE_ANALYSIS_STEPS:
+            if step in ALLOWED_BASE_ANALYSIS_STEPS or step in compiled.related_metric_steps:
                 continue
 
-            if step.startswith("check_related_metric:"):
-                related_metric = step.split(":", 1)[1]
-                if related_metric not in schema["metrics"]:
-                    errors.append(f"Invalid related metric in analysis_step: {step}")
+            if step.startswith(RELATED_METRIC_STEP_PREFIX):
+                errors.append(f"Invalid related metric in analysis_step: {step}")
                 continue
 
             errors.append(f"Invalid analysis_step: {step}")
@@ -82,16 +87,17 @@ def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
     if not isinstance(filters, list):
         errors.append("filters must be a list")
     else:
+        filter_columns = compiled.filter_columns
         for idx, f in enumerate(filters):
             if not isinstance(f, dict):
                 errors.append(f"Filter at index {idx} must be an object")
                 continue
 
-            for key in {"column", "op", "value"}:
+            for key in _FILTER_KEYS:
                 if key not in f:
                     errors.append(f"Filter at index {idx} missing key: {key}")
 
-            if "column" in f and f["column"] not in _allowed_filter_columns(schema):
+            if "column" in f and f["column"] not in filter_columns:
                 errors.append(f"Invalid filter column at index {idx}: {f['column']}")
 
             if "op" in f and f["op"] not in ALLOWED_FILTER_OPS:
@@ -103,9 +109,15 @@ def validate_plan_claims(plan: Dict, schema: Dict) -> List[str]:
     return errors
 
 
-def _allowed_filter_columns(schema: Dict) -> Set[str]:
-    dim_columns = {v["column"] for v in schema["dimensions"].values()}
-    metric_columns = {
-        v["column"] for v in schema["metrics"].values() if v["column"] != "*"
-    }
-    return dim_columns | metric_columns | {schema["time"]["column"]}
+def validate_many(plans: Iterable[Dict], schema: Dict | CompiledSchema) -> List[List[str]]:
+    """
+    Validate many claims plans against one schema.
+
+    The schema is compiled once up front, so scenario and replay runs that
+    check tens of thousands of plans skip all per-plan schema walking.
+
+    Returns:
+        List[List[str]]: errors for each plan, in input order.
+    """
+    compiled = compile_schema(schema)
+    return [validate_plan_claims(plan, compiled) for plan in plans]
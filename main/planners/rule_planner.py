@@ -0,0 +1,264 @@
+import os
+import re
+from typing import Callable, Dict, List
+
+from planners.planner_runner import run_planner, run_planner_async
+from planners.planner_runner_claims import run_planner_claims
+from planners.planner_validator import validate_plan
+from planners.planner_validator_claims import validate_plan_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.compiled import compile_schema
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from utils.tracing import annotate
+
+
+# ---- Vocabulary (schema names are always matched too, "_" read as " ") ----
+TAXI_VOCABULARY = {
+    "metrics": {
+        "avg_fare": ["average fare", "avg fare", "mean fare", "average fare amount"],
+        "total_fare": ["total fare", "total fares", "total fare amount", "fare revenue",
+                       "total revenue", "sum of fares"],
+        "avg_trip_distance": ["average trip distance", "avg trip distance",
+                              "mean trip distance", "average distance"],
+        "trip_count": ["trip count", "number of trips", "how many trips", "total trips",
+                       "trips", "number of rides", "rides"],
+    },
+    "dimensions": {
+        "vendor": ["vendor", "vendors", "vendor id"],
+        "pickup_location": ["pickup location", "pickup locations", "pickup zone",
+                            "pickup zones", "pickup"],
+    },
+    # Bare nouns that name a count metric on their own ("how many trips")
+    # but are filler next to another metric ("average fare of trips")
+    "weak_terms": ["trips", "rides"],
+}
+
+CLAIMS_VOCABULARY = {
+    "metrics": {
+        "claim_count": ["claim count", "claims count", "number of claims", "how many claims",
+                        "total claims", "claim volume", "claims"],
+        "total_paid_amount": ["total paid amount", "paid amount", "total paid", "amount paid",
+                              "total payments", "payments"],
+        "hitrate": ["hitrate", "hit rate", "finding rate"],
+        "audits": ["audits", "audit count", "number of audits", "total audits"],
+        "selections": ["selections", "selection count", "number of selections",
+                       "total selections"],
+    },
+    "dimensions": {
+        "category": ["category", "categories"],
+        "drg_condition": ["drg condition", "drg condition type", "drg conditions",
+                          "condition type"],
+        "mdcn": ["mdcn", "mdc", "major diagnostic category"],
+        "discharge_status": ["discharge status", "discharge status code"],
+        "subprogram": ["subprogram", "subprograms", "sub program", "subprogram type"],
+        "provider": ["provider", "providers", "provider tax id"],
+        "selection_month": ["selection month"],
+    },
+    "weak_terms": ["claims"],
+}
+
+# ---- Time-range phrases (used only if the schema supports the range) ----
+# month_over_month / year_over_year are comparisons that need the LLM
+# planner's analysis steps; the builders do not filter on them, so a
+# descriptive plan would silently return an all-time total.
+RANGE_PHRASES: Dict[str, List[str]] = {
+    "current_month": ["this month", "current month", "month to date", "mtd"],
+    "last_month": ["last month", "previous month", "prior month", "past month"],
+    "last_3_months": ["last 3 months", "last three months", "past 3 months",
+                      "past three months"],
+    "last_6_months": ["last 6 months", "last six months", "past 6 months",
+                      "past six months"],
+    "last_12_months": ["last 12 months", "last twelve months", "past 12 months",
+                       "past twelve months", "last year", "past year"],
+}
+
+# Words that start a group-by ("by vendor", "per category", "across providers")
+GROUP_CUES = {"by", "per", "across", "each"}
+
+# Questions asking for causes need the LLM planner's analysis steps
+DIAGNOSTIC_CUES = {
+    "why", "driver", "drivers", "drove", "drive", "cause", "caused", "causes",
+    "explain", "reason", "reasons", "contributor", "contributors", "contributed",
+}
+
+# Tokens that carry no planning information
+FILLER = {
+    "what", "whats", "was", "were", "is", "are", "the", "a", "an", "of", "for",
+    "in", "on", "during", "over", "show", "me", "give", "list", "get", "tell",
+    "display", "report", "and", "to", "please", "our", "my", "all", "with",
+    "broken", "down", "breakdown", "split", "grouped", "group", "value",
+}
+
+
+class RulePlanner:
+    """
+    Deterministic planner for questions that are spelled in schema
+    vocabulary (e.g. "total paid amount by category last month").
+
+    The question is tokenized and matched, longest phrase first, against
+    metric, dimension and time-range phrases. A plan is produced only when
+    every token is explained (a phrase or filler), exactly one metric and
+    one supported time range are named, every dimension follows a group
+    cue, the question is not a "why" question, and the plan validates.
+    A bare weak term ("trips") next to a different metric is ambiguous
+    ("trips and total fare") unless it is an object ("total fare of trips").
+    Anything else returns None so the caller can fall back to the LLM.
+    """
+
+    def __init__(
+        self,
+        schema: dict,
+        vocabulary: dict,
+        validate: Callable[[dict, dict], list]
+    ):
+        self.schema = compile_schema(schema)
+        self.validate = validate
+        self._weak_terms = frozenset(vocabulary.get("weak_terms", ()))
+
+        phrases = {}
+        for kind, names, synonyms in (
+            ("metric", self.schema.metric_names, vocabulary["metrics"]),
+            ("dimension", self.schema.dimension_names, vocabulary["dimensions"]),
+        ):
+            for name in names:
+                for text in [name.replace("_", " "), *synonyms.get(name, ())]:
+                    phrases[_tokens(text)] = (kind, name)
+        for time_range, texts in RANGE_PHRASES.items():
+            for text in texts:
+                phrases[_tokens(text)] = ("time_range", time_range)
+
+        # First token -> candidate phrases, longest first
+        self._phrases: Dict[str, list] = {}
+        for tokens, match in sorted(phrases.items(), key=lambda kv: -len(kv[0])):
+            self._phrases.setdefault(tokens[0], []).append((tokens, match))
+
+    def plan(self, question: str) -> dict | None:
+        """
+        Plan for question, or None if the rules are not confident.
+        """
+        tokens = _tokens(question)
+        if not tokens or DIAGNOSTIC_CUES.intersection(tokens):
+            return None
+
+        metrics, weak_metrics, ranges, group_by = [], [], [], []
+        # Weak terms used as a metric of their own, not "... of trips"
+        bare_weak_metrics = []
+        grouping = False
+        i = 0
+        while i < len(tokens):
+            match = self._match_at(tokens, i)
+            if match is None:
+                token = tokens[i]
+                if token in GROUP_CUES:
+                    grouping = True
+                elif token not in FILLER:
+                    # Unexplained word: a filter, an unknown metric, ...
+                    return None
+                i += 1
+                continue
+
+            length, (kind, name) = match
+            phrase = " ".join(tokens[i:i + length])
+            if kind == "dimension":
+                if not grouping:
+                    return None
+                if name not in group_by:
+                    group_by.append(name)
+            else:
+                grouping = False
+                if kind == "time_range":
+                    ranges.append(name)
+                elif phrase in self._weak_terms:
+                    weak_metrics.append(name)
+                    if i == 0 or tokens[i - 1] != "of":
+                        bare_weak_metrics.append(name)
+                else:
+                    metrics.append(name)
+            i += length
+
+        if metrics and set(bare_weak_metrics) - set(metrics):
+            return None
+        metrics = set(metrics) or set(weak_metrics)
+        if len(metrics) != 1 or len(set(ranges)) != 1:
+            return None
+
+        time_range = ranges[0]
+        if time_range not in self.schema.supported_ranges:
+            return None
+
+        plan = {
+            "intent": "descriptive",
+            "metric": metrics.pop(),
+            "time_range": time_range,
+            "group_by": group_by,
+            "filters": [],
+            "analysis_steps": [],
+        }
+        if self.validate(plan, self.schema):
+            return None
+        return plan
+
+    def _match_at(self, tokens: list, i: int):
+        for phrase, match in self._phrases.get(tokens[i], ()):
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                return len(phrase), match
+        return None
+
+
+def _tokens(text: str) -> tuple:
+    return tuple(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+TAXI_RULE_PLANNER = RulePlanner(TAXI_SEMANTIC_SCHEMA, TAXI_VOCABULARY, validate_plan)
+CLAIMS_RULE_PLANNER = RulePlanner(
+    HEALTHCARE_CLAIMS_SCHEMA, CLAIMS_VOCABULARY, validate_plan_claims
+)
+
+
+def rule_planner_enabled() -> bool:
+    """
+    The fast path is on unless env "rule_planner" is "0" / "false".
+    """
+    return os.environ.get("rule_planner", "1").lower() not in ("0", "false")
+
+
+def run_planner_fast(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Taxi plan from the rule planner, falling back to run_planner.
+    """
+    plan = _rule_plan(TAXI_RULE_PLANNER, user_question)
+    if plan is not None:
+        return plan
+    annotate(planner="llm")
+    return run_planner(user_question, use_cache=use_cache)
+
+
+async def run_planner_fast_async(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Async variant of run_planner_fast.
+    """
+    plan = _rule_plan(TAXI_RULE_PLANNER, user_question)
+    if plan is not None:
+        return plan
+    annotate(planner="llm")
+    return await run_planner_async(user_question, use_cache=use_cache)
+
+
+def run_planner_claims_fast(user_question: str, use_cache: bool = True) -> dict:
+    """
+    Claims plan from the rule planner, falling back to run_planner_claims.
+    """
+    plan = _rule_plan(CLAIMS_RULE_PLANNER, user_question)
+    if plan is not None:
+        return plan
+    annotate(planner="llm")
+    return run_planner_claims(user_question, use_cache=use_cache)
+
+
+def _rule_plan(planner: RulePlanner, user_question: str) -> dict | None:
+    if not rule_planner_enabled():
+        return None
+    plan = planner.plan(user_question)
+    if plan is not None:
+        annotate(planner="rules")
+    return plan
@@ -1,5 +1,7 @@
-def build_planner_prompt(schema: dict, user_question: str) -> list:
-    system_prompt = """
+import threading
+
+
+SYSTEM_PROMPT = """
 You are an analytics planner.
 
 Your job is to convert a natural language question into a structured JSON plan
@@ -51,25 +53,179 @@ If the user request is ambiguous, make the safest assumption
 based on the schema and the question.
 """
 
-    user_prompt = f"""
-SCHEMA:
-{schema}
-
-USER QUESTION:
-{user_question}
-
+OUTPUT_FORMAT = """
 OUTPUT FORMAT (JSON ONLY):
-{{
+{
   "intent": "descriptive | diagnostic",
   "metric": "string",
   "time_range": "string",
   "group_by": [],
   "filters": [],
   "analysis_steps": []
-}}
+}
+"""
+
+BATCH_RULES = """
+BATCH MODE:
+- You will receive several numbered questions
+- Plan each question independently, following every rule in the system message
+- Output a JSON array with exactly one object per question, in order:
+  [{"id": <question number>, "plan": <plan JSON>}, ...]
+- If a question cannot be planned, still output its object, with the plan
+  you would output for that question alone (e.g. metric UNSUPPORTED_METRIC)
+"""
+
+BATCH_OUTPUT_FORMAT = """
+OUTPUT FORMAT (JSON ARRAY ONLY):
+[
+  {
+    "id": 1,
+    "plan": {
+      "intent": "descriptive | diagnostic",
+      "metric": "string",
+      "time_range": "string",
+      "group_by": [],
+      "filters": [],
+      "analysis_steps": []
+    }
+  }
+]
+"""
+
+# Prefixes are kept (with a strong reference to the schema, so ids are
+# never reused while cached) up to this many distinct prompt/schema pairs.
+_MAX_CACHED = 64
+
+_prefixes: dict[tuple[str, int], tuple[dict, str]] = {}
+_prefixes_lock = threading.Lock()
+
+
+def build_planner_prompt(schema: dict, user_question: str) -> list:
+    return build_messages(SYSTEM_PROMPT, schema, user_question)
+
+
+def build_batch_planner_prompt(schema: dict, user_questions: list[str]) -> list:
+    """
+    One request planning several questions; the system prompt is sent
+    once instead of once per question.
+    """
+    return build_batch_messages(SYSTEM_PROMPT, schema, user_questions)
+
+
+def build_messages(system_prompt: str, schema: dict, user_question: str) -> list:
+    """
+    Planner messages for any track's system prompt.
+
+    The system message (see planner_prefix) is identical for every
+    question, and the question comes last, so provider-side prompt caching
+    can reuse the whole prefix.
+    """
+    return [
+        {"role": "system", "content": planner_prefix(system_prompt, schema)},
+        {"role": "user", "content": f"USER QUESTION:\n{user_question.strip()}"}
+    ]
+
+
+def build_batch_messages(system_prompt: str, schema: dict, user_questions: list[str]) -> list:
+    """
+    Batch planner messages for any track's system prompt. The system
+    message is the single-question one, so both share a cached prefix.
+    """
+    numbered = "\n".join(
+        # One line per question, so numbering stays unambiguous
+        f"{i}. {' '.join(question.split())}"
+        for i, question in enumerate(user_questions, start=1)
+    )
+    user_prompt = f"""
+{BATCH_RULES.strip()}
+
+{BATCH_OUTPUT_FORMAT.strip()}
+
+USER QUESTIONS:
+{numbered}
 """
 
     return [
-        {"role": "system", "content": system_prompt.strip()},
+        {"role": "system", "content": planner_prefix(system_prompt, schema)},
         {"role": "user", "content": user_prompt.strip()}
     ]
+
+
+def planner_prefix(system_prompt: str, schema: dict) -> str:
+    """
+    Static system message: rules, compact schema and output format.
+
+    Built once per (system prompt, schema) and cached by the identity of
+    the schema dict, like schemas.compiled.compile_schema; schema dicts
+    must not be mutated after first use.
+    """
+    key = (system_prompt, id(schema))
+    entry = _prefixes.get(key)
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+
+    prefix = "\n\n".join([
+        system_prompt.strip(),
+        "SCHEMA:\n" + render_schema(schema),
+        OUTPUT_FORMAT.strip(),
+    ])
+    with _prefixes_lock:
+        if len(_prefixes) >= _MAX_CACHED:
+            _prefixes.clear()
+        _prefixes[key] = (schema, prefix)
+    return prefix
+
+
+def render_schema(schema: dict) -> str:
+    """
+    Compact text form of a semantic schema for prompts.
+
+    Lists only what a plan can reference (metric, dimension and time-range
+    names, filterable raw columns) with their descriptions. Sets are
+    sorted, so the text is byte-identical across processes (a dict repr
+    of a set is not).
+
+    Example:
+        metrics:
+        - avg_fare: avg(fare_amount)
+        - audits: SUM(exl_finding) + SUM(exl_nofinding) - Total audits
+        dimensions:
+        - vendor: VendorID
+    """
+    lines = [f"table: {schema['table']}", "metrics:"]
+    for name, metric_def in schema["metrics"].items():
+        lines.append(f"- {name}: {_metric_sql(metric_def)}" + _description(metric_def))
+
+    lines.append("dimensions:")
+    for name, dim_def in schema["dimensions"].items():
+        lines.append(f"- {name}: {dim_def['column']}" + _description(dim_def))
+
+    time_def = schema["time"]
+    time_format = f" ({time_def['format']})" if time_def.get("format") else ""
+    lines.append(f"time column: {time_def['column']}{time_format}")
+    lines.append(
+        "time_range values: " + ", ".join(_ordered(time_def.get("supported_ranges", ())))
+    )
+
+    if schema.get("raw_columns"):
+        lines.append("raw columns: " + ", ".join(_ordered(schema["raw_columns"])))
+
+    return "\n".join(lines)
+
+
+def _metric_sql(metric_def: dict) -> str:
+    aggregation = metric_def["aggregations"][0]
+    if aggregation == "custom":
+        # Several custom metrics can share a column; the expression is
+        # what tells them apart
+        return metric_def["expression"]
+    return f"{aggregation}({metric_def['column']})"
+
+
+def _description(definition: dict) -> str:
+    description = definition.get("description")
+    return f" - {description}" if description else ""
+
+
+def _ordered(values) -> list:
+    return sorted(values) if isinstance(values, (set, frozenset)) else list(values)
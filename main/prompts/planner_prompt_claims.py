@@ -1,8 +1,8 @@
+from prompts.planner_prompt import build_batch_messages, build_messages
 from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
 
 
-def build_planner_prompt_claims(user_question: str) -> list:
-    system_prompt = """
+SYSTEM_PROMPT = """
 You are an analytics planner for healthcare claims data.
 
 Your job is to convert a natural language question into a structured JSON plan
@@ -51,25 +51,14 @@ ALLOWED analysis_steps:
 - check_related_metric:selections
 """
 
-    user_prompt = f"""
-SCHEMA:
-{HEALTHCARE_CLAIMS_SCHEMA}
 
-USER QUESTION:
-{user_question}
+def build_planner_prompt_claims(user_question: str) -> list:
+    return build_messages(SYSTEM_PROMPT, HEALTHCARE_CLAIMS_SCHEMA, user_question)
 
-OUTPUT FORMAT (JSON ONLY):
-{{
-  "intent": "descriptive | diagnostic",
-  "metric": "string",
-  "time_range": "string",
-  "group_by": [],
-  "filters": [],
-  "analysis_steps": []
-}}
-"""
 
-    return [
-        {"role": "system", "content": system_prompt.strip()},
-        {"role": "user", "content": user_prompt.strip()},
-    ]
+def build_batch_planner_prompt_claims(user_questions: list[str]) -> list:
+    """
+    One request planning several claims questions (see
+    prompts.planner_prompt.build_batch_planner_prompt).
+    """
+    return build_batch_messages(SYSTEM_PROMPT, HEALTHCARE_CLAIMS_SCHEMA, user_questions)
@@ -1,38 +1,245 @@
-from planners.planner_runner import run_planner
+from contextlib import contextmanager
+
+from planners.rule_planner import run_planner_fast, run_planner_fast_async
 from planners.planner_validator import validate_plan
 from diagnostics.executor import DiagnosticExecutor
-from tools.sql_executor import DuckDBExecutor
 from insights.schema import build_insight_payload
-from insights.summarizer import summarize_insights
+from insights.summarizer import summarize_insights, summarize_insights_async
+from runners.session import AnalysisSession
 from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
 from utils.logger import get_logger
+from utils.tracing import export_trace, span, start_trace
 
 
 logger = get_logger("analyze_question")
 
 
-def analyze_question(question: str, duckdb_path: str) -> dict:
+def analyze_question(
+    question: str,
+    duckdb_path: str,
+    session: AnalysisSession | None = None,
+    summarize: bool = True
+) -> dict:
     """
     End-to-end orchestration:
-    - Plan (LLM)
+    - Plan (rule-based fast path, else LLM; see planners.rule_planner)
     - Validate
     - Apply system heuristics
     - Execute diagnostics
     - Build insight payload
     - Summarize results
+
+    Pass a long-lived AnalysisSession to reuse its pooled DuckDB connection
+    across questions; otherwise the shared pool for duckdb_path is used.
+
+    With summarize=False the LLM summary is skipped and the insight
+    "payload" is returned instead, so callers can stream the summary
+    themselves (insights.summarizer.stream_summarize_insights).
+
+    Every stage runs in a tracing span; the spans are returned under
+    "trace" (see utils.tracing) and exported if trace_jsonl_path /
+    trace_otlp_path are set.
+    """
+    trace = None
+    try:
+        with start_trace("analyze_question", question=question) as trace:
+            result = _analyze_question(question, duckdb_path, session, summarize)
+    finally:
+        # Failed runs are exported too (with the error on their spans)
+        _export(trace)
+    result["trace"] = trace.to_dicts()
+    return result
+
+
+async def analyze_question_async(
+    question: str,
+    duckdb_path: str,
+    session: AnalysisSession | None = None
+) -> dict:
     """
+    Asyncio variant of analyze_question.
 
+    LLM calls use the async OpenAI client and DuckDB work runs in the
+    default thread pool (each worker thread gets its own pooled cursor).
+    While the planner call is in flight, the time anchor is resolved, so
+    execution skips that query. Many questions can be
+    awaited concurrently from one process.
+    """
+    trace = None
+    try:
+        with start_trace("analyze_question", question=question) as trace:
+            result = await _analyze_question_async(question, duckdb_path, session)
+    finally:
+        _export(trace)
+    result["trace"] = trace.to_dicts()
+    return result
+
+
+def _analyze_question(
+    question: str,
+    duckdb_path: str,
+    session: AnalysisSession | None,
+    summarize: bool
+) -> dict:
     # ----------------------------
     # Step 1: Planner
     # ----------------------------
-    plan = run_planner(question)
+    with span("planner"):
+        plan = run_planner_fast(question)
 
-    if plan.get("error"):
-        return {"error": plan["error"], "details": plan}
+    # ----------------------------
+    # Step 2: Validation + heuristics
+    # ----------------------------
+    with span("validate"):
+        error = _prepare_plan(plan)
+    if error:
+        return error
+
+    # ----------------------------
+    # Step 3: Execute
+    # ----------------------------
+    with span("execute", intent=plan.get("intent")):
+        with _executor(duckdb_path, session) as executor:
+            diagnostics = _execute_plan(plan, executor)
+
+    # ----------------------------
+    # Step 4: Build insight payload
+    # ----------------------------
+    with span("build_payload"):
+        payload = build_insight_payload(plan, diagnostics)
+    if not summarize:
+        return {
+            "plan": plan,
+            "diagnostics": diagnostics,
+            "payload": payload
+        }
+
+    # ----------------------------
+    # Step 5: Summarize insights
+    # ----------------------------
+    with span("summarize"):
+        summary = summarize_insights(payload)
+
+    return {
+        "plan": plan,
+        "diagnostics": diagnostics,
+        "summary": summary
+    }
+
+
+async def _analyze_question_async(
+    question: str,
+    duckdb_path: str,
+    session: AnalysisSession | None
+) -> dict:
+    import asyncio
+
+    with _executor(duckdb_path, session) as executor:
+        # ----------------------------
+        # Step 1: Planner + warm-up, concurrently
+        # ----------------------------
+        plan, _ = await asyncio.gather(
+            _plan_async(question),
+            asyncio.to_thread(warm_up, executor)
+        )
+
+        # ----------------------------
+        # Step 2: Validation + heuristics
+        # ----------------------------
+        with span("validate"):
+            error = _prepare_plan(plan)
+        if error:
+            return error
+
+        # ----------------------------
+        # Step 3: Execute (thread pool)
+        # ----------------------------
+        with span("execute", intent=plan.get("intent")):
+            diagnostics = await asyncio.to_thread(_execute_plan, plan, executor)
+
+    # ----------------------------
+    # Step 4: Build insight payload
+    # ----------------------------
+    with span("build_payload"):
+        payload = build_insight_payload(plan, diagnostics)
 
     # ----------------------------
-    # Step 2: Validation
+    # Step 5: Summarize insights
     # ----------------------------
+    with span("summarize"):
+        summary = await summarize_insights_async(payload)
+
+    return {
+        "plan": plan,
+        "diagnostics": diagnostics,
+        "summary": summary
+    }
+
+
+async def _plan_async(question: str) -> dict:
+    with span("planner"):
+        return await run_planner_fast_async(question)
+
+
+def _export(trace):
+    if trace is None:
+        return
+    try:
+        export_trace(trace)
+    except OSError as exc:
+        logger.warning(f"Trace export failed: {exc}")
+
+
+def warm_up(executor) -> None:
+    """
+    Resolve the time anchor so the first query of a question does not pay
+    for it.
+
+    The anchor is cached process-wide per data version, so it is reused
+    by whichever thread executes the plan. (Cursors are per thread, and the
+    thread that runs this is not guaranteed to run the queries, so warming
+    one is not attempted.)
+
+    Failures are logged and ignored; execution will surface them.
+    """
+    from tools.time_anchor import resolve_time_anchor
+
+    try:
+        with span("warm_up"):
+            resolve_time_anchor(executor, TAXI_SEMANTIC_SCHEMA)
+    except Exception as exc:
+        logger.warning(f"Warm-up failed: {exc}")
+
+
+@contextmanager
+def _executor(duckdb_path: str, session: AnalysisSession | None):
+    """
+    Yield the session's executor, or a new one for duckdb_path that is
+    closed on exit so its connection pool is released.
+    """
+    if session is not None:
+        yield session.executor
+        return
+
+    from tools.sql_executor import DuckDBExecutor
+
+    executor = DuckDBExecutor(db_path=duckdb_path)
+    try:
+        yield executor
+    finally:
+        executor.close()
+
+
+def _prepare_plan(plan: dict) -> dict | None:
+    """
+    Validate the plan and apply system heuristics in place.
+
+    Returns:
+        An error result dict, or None if the plan is executable.
+    """
+    if plan.get("error"):
+        return {"error": plan["error"], "details": plan}
+
     errors = validate_plan(plan, TAXI_SEMANTIC_SCHEMA)
     if errors:
         return {
@@ -42,13 +249,12 @@ def analyze_question(question: str, duckdb_path: str) -> dict:
         }
 
     # -------------------------------------------------
-    # Step 2.5: System heuristic (diagnostic fallback)
+    # System heuristic (diagnostic fallback)
     # -------------------------------------------------
     if plan.get("intent") == "diagnostic" and not plan.get("group_by"):
         logger.info("Applying default diagnostic group_by: vendor")
         plan["group_by"] = ["vendor"]
 
-
     # -------------------------------------------------
     # System heuristic: default diagnostic steps
     # -------------------------------------------------
@@ -62,42 +268,25 @@ def analyze_question(question: str, duckdb_path: str) -> dict:
             "rank_top_contributors"
         ]
 
-    # ----------------------------
-    # Step 3: Execute
-    # ----------------------------
-    executor = DuckDBExecutor(db_path=duckdb_path)
+    return None
+
 
+def _execute_plan(plan: dict, executor) -> dict:
     if plan["intent"] == "descriptive":
         # Single descriptive query
         from tools.sql_builder import build_sql
+        from tools.time_anchor import resolve_time_anchor
 
-        sql = build_sql(plan, TAXI_SEMANTIC_SCHEMA)
+        time_anchor = resolve_time_anchor(executor, TAXI_SEMANTIC_SCHEMA)
+        sql = build_sql(plan, TAXI_SEMANTIC_SCHEMA, time_anchor=time_anchor)
         result_df = executor.execute(sql)
 
-        diagnostics = {
+        return {
             "descriptive_result": result_df
         }
 
-    else:
-        # Diagnostic execution
-        diagnostics = DiagnosticExecutor(
-            schema=TAXI_SEMANTIC_SCHEMA,
-            sql_executor=executor
-        ).run(plan)
-
-
-    # ----------------------------
-    # Step 4: Build insight payload
-    # ----------------------------
-    payload = build_insight_payload(plan, diagnostics)
-
-    # ----------------------------
-    # Step 5: Summarize insights
-    # ----------------------------
-    summary = summarize_insights(payload)
-
-    return {
-        "plan": plan,
-        "diagnostics": diagnostics,
-        "summary": summary
-    }
+    # Diagnostic execution
+    return DiagnosticExecutor(
+        schema=TAXI_SEMANTIC_SCHEMA,
+        sql_executor=executor
+    ).run(plan)
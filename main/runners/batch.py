@@ -0,0 +1,148 @@
+import json
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator
+
+from insights.schema import result_to_records
+
+
+def read_questions(path: str) -> Iterator[str | dict]:
+    """
+    Lazily read questions from a file: one per line, either plain text or
+    a JSON object with a "question" key. Blank lines and lines starting
+    with "#" are skipped.
+
+    Lines are read as run_batch asks for them, so a large input file is
+    never held in memory. A malformed JSON line, or one without a
+    "question" key, is yielded as an error dict carrying its line number,
+    so it fails only its own item in run_batch.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if not line.startswith("{"):
+                yield line
+                continue
+            try:
+                yield json.loads(line)["question"]
+            except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                yield {
+                    "error": "INVALID_QUESTION",
+                    "details": f"line {line_number}: {exc!r}",
+                    "line": line_number,
+                }
+
+
+def to_jsonable(value):
+    """
+    Convert an analysis result (which may hold DataFrames / Arrow tables)
+    into plain JSON-serializable data.
+    """
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if hasattr(value, "to_dict") or hasattr(value, "to_pylist"):
+        return to_jsonable(result_to_records(value))
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "item"):
+        # numpy scalar
+        return to_jsonable(value.item())
+    return str(value)
+
+
+def run_batch(
+    questions: Iterable[str | dict],
+    analyze: Callable[[str], dict],
+    on_result: Callable[[dict], None],
+    workers: int = 4
+) -> dict:
+    """
+    Answer questions on a bounded worker pool.
+
+    At most 2 x workers questions are in flight at a time, so memory stays
+    flat however long the input is. on_result is called from the calling
+    thread with one record per question as soon as it finishes (completion
+    order, not input order).
+
+    Args:
+        questions: Questions to answer; an error dict (see read_questions)
+            is reported as that item's result without calling analyze
+        analyze: Callable answering one question (e.g. AnalysisSession.analyze)
+        on_result: Receives {"index", "question", "elapsed_ms", "result"}
+        workers: Worker thread count
+
+    Returns:
+        Batch summary with throughput and latency percentiles.
+    """
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+
+    def answer(index: int, question: str | dict) -> dict:
+        t0 = time.perf_counter()
+        if isinstance(question, dict):
+            result, question = question, None
+        else:
+            try:
+                result = analyze(question)
+            except Exception as exc:
+                result = {"error": "EXCEPTION", "details": str(exc)}
+        return {
+            "index": index,
+            "question": question,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "result": result,
+        }
+
+    max_in_flight = max(1, workers) * 2
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = set()
+        for index, question in enumerate(questions):
+            pending.add(pool.submit(answer, index, question))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    errors += _emit(future.result(), on_result, latencies)
+
+        for future in wait(pending).done:
+            errors += _emit(future.result(), on_result, latencies)
+
+    wall_seconds = time.perf_counter() - started
+    return {
+        "questions": len(latencies),
+        "errors": errors,
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_qps": round(len(latencies) / wall_seconds, 3) if wall_seconds else None,
+        "latency_ms": _percentiles(latencies),
+    }
+
+
+def _emit(record: dict, on_result, latencies: list) -> int:
+    latencies.append(record["elapsed_ms"])
+    on_result(record)
+    return 1 if "error" in record["result"] else 0
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+        "mean": round(sum(ordered) / len(ordered), 3),
+    }
@@ -0,0 +1,403 @@
+import io
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from planners.planner_validator import validate_many, validate_plan
+from planners.planner_validator_claims import validate_many as validate_many_claims
+from planners.planner_validator_claims import validate_plan_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.compiled import compile_schema
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from utils.logger import get_logger
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+logger = get_logger("daemon")
+
+
+class DaemonError(Exception):
+    """
+    Request error reported to the client with an HTTP status.
+    """
+
+    def __init__(self, status: int, body: dict):
+        super().__init__(body.get("error"))
+        self.status = status
+        self.body = body
+
+
+class AnalysisService:
+    """
+    State kept warm across daemon requests.
+
+    Schemas are compiled once, the taxi AnalysisSession keeps its pooled
+    DuckDB connection and result cache, and the claims data is ingested
+    once and served from a registered Parquet view (plus optional rollups).
+    Time anchors are resolved at startup and re-resolved only when an
+    executor's data fingerprint changes. All methods are safe to call from
+    concurrent request threads.
+    """
+
+    def __init__(
+        self,
+        duckdb_path: str | None = None,
+        claims_csv: str | None = None,
+        ingest_cache_dir: str | None = None,
+        rollup_dimensions: int | None = None
+    ):
+        """
+        Args:
+            duckdb_path: Taxi DuckDB file; enables /analyze and /sql
+            claims_csv: Claims CSV; enables time-anchored /claims/sql and
+                /claims/execute
+            ingest_cache_dir: Parquet cache for the claims CSV (see
+                tools.ingest)
+            rollup_dimensions: Build claims rollups up to this many
+                dimensions (see tools.rollups)
+        """
+        self.taxi_schema = compile_schema(TAXI_SEMANTIC_SCHEMA)
+        self.claims_schema = compile_schema(HEALTHCARE_CLAIMS_SCHEMA)
+
+        self.session = None
+        if duckdb_path:
+            from runners.session import AnalysisSession
+
+            self.session = AnalysisSession(duckdb_path)
+
+        self.claims_executor = None
+        self.rollups = None
+        if claims_csv:
+            from tools.ingest import ingest_csv
+            from tools.sql_executor import DuckDBExecutor
+
+            parquet = ingest_csv(
+                claims_csv, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=ingest_cache_dir
+            )
+            self.claims_executor = DuckDBExecutor(":memory:")
+            self.claims_executor.register_parquet(self.claims_schema.table, parquet)
+
+            if rollup_dimensions is not None:
+                from tools.rollups import RollupManager
+
+                self.rollups = RollupManager(
+                    self.claims_executor, HEALTHCARE_CLAIMS_SCHEMA
+                )
+                self.rollups.build(max_dimensions=rollup_dimensions)
+
+        # table -> (data fingerprint, latest time value)
+        self._time_anchors = {}
+        self._time_anchors_lock = threading.Lock()
+        self._taxi_time_anchor()
+        self._claims_time_anchor()
+
+    # ----------------------------
+    # Taxi
+    # ----------------------------
+    def analyze(self, body: dict) -> dict:
+        from runners.batch import to_jsonable
+
+        session = self._require(self.session, "analyze", "--db")
+        question = _field(body, "question", str)
+        return to_jsonable(
+            session.analyze(question, summarize=body.get("summarize", True))
+        )
+
+    def validate(self, body: dict) -> dict:
+        return _validate(body, validate_plan, validate_many, self.taxi_schema)
+
+    def build_sql(self, body: dict) -> dict:
+        from tools.sql_builder import build_sql
+
+        plan = self._valid_plan(body, validate_plan, self.taxi_schema)
+        return {
+            "sql": _build(
+                build_sql, plan, self.taxi_schema, time_anchor=self._taxi_time_anchor()
+            )
+        }
+
+    # ----------------------------
+    # Claims
+    # ----------------------------
+    def validate_claims(self, body: dict) -> dict:
+        return _validate(
+            body, validate_plan_claims, validate_many_claims, self.claims_schema
+        )
+
+    def build_claims_sql(self, body: dict) -> dict:
+        """
+        Claims SQL for a plan. With "parameterized": true the filter
+        values are returned separately as "params".
+        """
+        from tools.sql_builder_claims import build_claims_query, build_claims_sql
+
+        plan = self._valid_plan(body, validate_plan_claims, self.claims_schema)
+        kwargs = {"time_anchor": self._claims_time_anchor(), "rollups": self.rollups}
+        if body.get("parameterized"):
+            sql, params = _build(build_claims_query, plan, self.claims_schema, **kwargs)
+            return {"sql": sql, "params": params}
+        return {"sql": _build(build_claims_sql, plan, self.claims_schema, **kwargs)}
+
+    def execute_claims(self, body: dict):
+        """
+        Validate, build and run a claims plan.
+
+        Returns:
+            (sql, params, pyarrow.Table)
+        """
+        from tools.sql_builder_claims import build_claims_query
+
+        executor = self._require(self.claims_executor, "claims/execute", "--claims-csv")
+        plan = self._valid_plan(body, validate_plan_claims, self.claims_schema)
+        sql, params = _build(
+            build_claims_query,
+            plan,
+            self.claims_schema,
+            time_anchor=self._claims_time_anchor(),
+            rollups=self.rollups,
+        )
+        return sql, params, executor.execute_arrow(sql, params)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        if self.claims_executor is not None:
+            self.claims_executor.close()
+
+    def _taxi_time_anchor(self):
+        if self.session is None:
+            return None
+        return self._time_anchor(self.session.executor, self.taxi_schema)
+
+    def _claims_time_anchor(self):
+        if self.claims_executor is None:
+            return None
+        return self._time_anchor(self.claims_executor, self.claims_schema)
+
+    def _time_anchor(self, executor, schema):
+        # A data fingerprint is a stat() of the file(s), not a query
+        fingerprint = executor.data_fingerprint()
+        entry = self._time_anchors.get(schema.table)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+
+        anchor = executor.conn.execute(
+            f"SELECT MAX({schema.time_column}) FROM {schema.table}"
+        ).fetchone()[0]
+        with self._time_anchors_lock:
+            self._time_anchors[schema.table] = (fingerprint, anchor)
+        return anchor
+
+    @staticmethod
+    def _valid_plan(body: dict, validate, schema) -> dict:
+        plan = _field(body, "plan", dict)
+        errors = validate(plan, schema)
+        if errors:
+            raise DaemonError(
+                422, {"error": "INVALID_PLAN", "details": errors, "plan": plan}
+            )
+        if plan.get("metric") in ("", "UNSUPPORTED_METRIC"):
+            raise DaemonError(
+                422, {"error": "UNSUPPORTED_METRIC", "plan": plan}
+            )
+        return plan
+
+    @staticmethod
+    def _require(resource, endpoint: str, option: str):
+        if resource is None:
+            raise DaemonError(
+                404, {"error": f"/{endpoint} is disabled; start the daemon with {option}"}
+            )
+        return resource
+
+
+def _field(body: dict, name: str, kind: type):
+    value = body.get(name)
+    if not isinstance(value, kind):
+        raise DaemonError(
+            400, {"error": f"Request field '{name}' must be a {kind.__name__}"}
+        )
+    return value
+
+
+def _validate(body: dict, validate_one, validate_batch, schema) -> dict:
+    # {"plan": {...}} -> {"errors": [...]};
+    # {"plans": [...]} -> {"errors": [[...], ...]}
+    if "plans" in body:
+        plans = _field(body, "plans", list)
+        if not all(isinstance(p, dict) for p in plans):
+            raise DaemonError(400, {"error": "Every entry of 'plans' must be an object"})
+        return {"errors": validate_batch(plans, schema)}
+    return {"errors": validate_one(_field(body, "plan", dict), schema)}
+
+
+def _build(builder, plan: dict, schema, **kwargs):
+    try:
+        return builder(plan, schema, **kwargs)
+    except ValueError as exc:
+        raise DaemonError(400, {"error": str(exc), "plan": plan}) from exc
+
+
+def arrow_ipc_bytes(table) -> bytes:
+    """
+    Serialize a pyarrow Table as an Arrow IPC stream.
+    """
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "agent-sql-daemon/1.0"
+    # Keep-alive, so an agent can reuse one connection for many calls
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = {
+        "/analyze": "analyze",
+        "/validate": "validate",
+        "/sql": "build_sql",
+        "/claims/validate": "validate_claims",
+        "/claims/sql": "build_claims_sql",
+    }
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        service = self.server.service
+        self._send_json(200, {
+            "status": "ok",
+            "taxi": service.session is not None,
+            "claims": service.claims_executor is not None,
+            "rollups": service.rollups is not None,
+        })
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        try:
+            body = self._read_json()
+            if path == "/claims/execute":
+                self._execute_claims(body)
+                return
+            method = self.ROUTES.get(path)
+            if method is None:
+                raise DaemonError(404, {"error": f"Unknown endpoint: {path}"})
+            self._send_json(200, getattr(self.server.service, method)(body))
+        except DaemonError as exc:
+            self._send_json(exc.status, exc.body)
+        except Exception as exc:
+            logger.exception(f"{path} failed")
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def _execute_claims(self, body: dict):
+        from insights.schema import result_to_records
+
+        limit = body.get("limit")
+        if limit is not None and (
+            isinstance(limit, bool) or not isinstance(limit, int) or limit < 0
+        ):
+            raise DaemonError(
+                400, {"error": "Request field 'limit' must be a non-negative int"}
+            )
+
+        sql, params, table = self.server.service.execute_claims(body)
+
+        wants_arrow = (
+            body.get("format") == "arrow"
+            or ARROW_STREAM in self.headers.get("Accept", "")
+        )
+        if wants_arrow:
+            self._send(200, ARROW_STREAM, arrow_ipc_bytes(table))
+            return
+
+        self._send_json(200, {
+            "sql": sql,
+            "params": params,
+            "row_count": table.num_rows,
+            "rows": result_to_records(table, limit=limit),
+        })
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise DaemonError(413, {"error": "Request body too large"})
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            body = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise DaemonError(400, {"error": f"Invalid JSON: {exc}"}) from exc
+        if not isinstance(body, dict):
+            raise DaemonError(400, {"error": "Request body must be a JSON object"})
+        return body
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self._send(status, "application/json", data)
+
+    def _send(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # client_address is not a (host, port) pair on Unix sockets
+        logger.debug(f"{self.command} {self.path}: {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    service: AnalysisService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: str | None = None
+):
+    """
+    Create a threaded HTTP server for service (one thread per connection).
+
+    Endpoints (POST, JSON bodies):
+        /analyze           {"question", "summarize"?}
+        /validate          {"plan"} or {"plans": [...]}
+        /sql               {"plan"}
+        /claims/validate   {"plan"} or {"plans": [...]}
+        /claims/sql        {"plan", "parameterized"?}
+        /claims/execute    {"plan", "limit"?, "format"?}; Arrow IPC stream
+                           with "format": "arrow" or Accept: ARROW_STREAM
+    and GET /health.
+
+    Args:
+        service: Warm state shared by all requests
+        host, port: TCP address (port 0 picks a free port)
+        unix_socket: Listen on this Unix socket path instead of TCP
+
+    Returns:
+        socketserver server; call serve_forever() and server_close().
+    """
+    if unix_socket:
+        server = _UnixHTTPServer(unix_socket, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve_in_thread(server) -> threading.Thread:
+    """
+    Run server.serve_forever() on a daemon thread (tests, embedding).
+    """
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
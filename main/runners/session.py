@@ -0,0 +1,61 @@
+from tools.result_cache import ResultCache
+from tools.slow_query_log import get_slow_query_log
+
+
+class AnalysisSession:
+    """
+    Long-lived state shared across many analyze_question calls.
+
+    Owns a ConnectionPool for duckdb_path, so repeated questions reuse a warm
+    database handle instead of opening (and leaking) a new connection each
+    time. Safe to share between threads; each thread gets its own cursor.
+    Query results are cached per data version, so repeated questions skip
+    DuckDB entirely. If slow_query_log_path is set, query timings and
+    profiles of slow queries are recorded (see tools.slow_query_log).
+    """
+
+    def __init__(self, duckdb_path: str, cache: ResultCache | None = None):
+        """
+        Args:
+            duckdb_path: Path to DuckDB file (e.g. taxi.duckdb)
+            cache: Result cache to use; defaults to a new in-memory cache.
+        """
+        # duckdb is imported on first use so importing this module is cheap
+        from tools.sql_executor import ConnectionPool, DuckDBExecutor
+
+        self.duckdb_path = duckdb_path
+        self.pool = ConnectionPool(duckdb_path)
+        self.cache = cache if cache is not None else ResultCache()
+        self.executor = DuckDBExecutor(
+            db_path=duckdb_path,
+            pool=self.pool,
+            cache=self.cache,
+            slow_log=get_slow_query_log()
+        )
+
+    def analyze(self, question: str, summarize: bool = True) -> dict:
+        """
+        Run the end-to-end analysis for one question using this session.
+        """
+        from runners.analyze_question import analyze_question
+
+        return analyze_question(
+            question, self.duckdb_path, session=self, summarize=summarize
+        )
+
+    async def analyze_async(self, question: str) -> dict:
+        """
+        Asyncio variant of analyze(); see analyze_question_async.
+        """
+        from runners.analyze_question import analyze_question_async
+
+        return await analyze_question_async(question, self.duckdb_path, session=self)
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
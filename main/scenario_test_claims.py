@@ -1,15 +1,24 @@
 import argparse
+import csv
 import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
-from insights.schema import build_insight_payload
-from planners.planner_validator_claims import validate_plan_claims
+from insights.schema import build_insight_payload, result_to_records
+from planners.planner_validator_claims import validate_many
 from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
-from tools.sql_builder_claims import build_claims_sql
+from schemas.compiled import compile_schema
+from tools.ingest import ingest_csv
+from tools.slow_query_log import SlowQueryLog
+from tools.sql_builder_claims import build_claims_query
+from tools.rollups import RollupManager
 from tools.sql_executor import DuckDBExecutor
+from tools.time_anchor import resolve_time_anchor
 
 
 def sample_scenarios() -> list[dict[str, Any]]:
@@ -188,16 +197,62 @@ def _to_json_str(value: Any) -> str:
     return json.dumps(value, ensure_ascii=True)
 
 
+OUTPUT_COLUMNS = [
+    "scenario_id",
+    "scenario_name",
+    "question",
+    "plan_json",
+    "validator_status",
+    "validator_errors_json",
+    "sql_layer_input_json",
+    "generated_sql",
+    "sql_params_json",
+    "sql_output_row_count",
+    "sql_output_preview_json",
+    "summarizer_input_payload_json",
+    "execution_status",
+    "execution_error",
+    "wall_time_ms",
+]
+
+
 def run_scenarios(
     claims_csv: str,
     output_csv: str,
     scenarios_csv: str | None = None,
     max_output_rows: int = 25,
+    rollup_dimensions: int | None = None,
+    workers: int = 1,
+    ingest_cache_dir: str | None = None,
+    slow_log: SlowQueryLog | None = None,
 ) -> None:
-    claims_df = pd.read_csv(claims_csv)
+    """
+    Run every scenario and write one CSV row per scenario.
+
+    Rows are written as each scenario finishes, so memory stays flat for
+    large suites. With workers > 1 scenarios run concurrently, each worker
+    thread on its own cursor of the shared database, and rows are written
+    in completion order.
+
+    The claims CSV is ingested once into a cached, column-pruned Parquet
+    copy (see tools.ingest) and queried in place. A Parquet file or a
+    hive-partitioned Parquet directory (test_data/sample_data_generator.py
+    output) may be passed as claims_csv instead and is queried as is.
+    """
+    if os.path.isdir(claims_csv) or claims_csv.endswith(".parquet"):
+        claims_parquet = claims_csv
+    else:
+        claims_parquet = ingest_csv(
+            claims_csv, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=ingest_cache_dir
+        )
 
-    executor = DuckDBExecutor(":memory:")
-    executor.register_table(HEALTHCARE_CLAIMS_SCHEMA["table"], claims_df)
+    executor = DuckDBExecutor(":memory:", slow_log=slow_log)
+    executor.register_parquet(HEALTHCARE_CLAIMS_SCHEMA["table"], claims_parquet)
+
+    rollups = None
+    if rollup_dimensions is not None:
+        rollups = RollupManager(executor, HEALTHCARE_CLAIMS_SCHEMA)
+        rollups.build(max_dimensions=rollup_dimensions)
 
     scenarios = (
         load_scenarios_from_csv(scenarios_csv)
@@ -205,68 +260,116 @@ def run_scenarios(
         else sample_scenarios()
     )
 
-    rows: list[dict[str, Any]] = []
-    for s in scenarios:
-        scenario_id = s["scenario_id"]
-        scenario_name = s["scenario_name"]
-        question = s["question"]
-        plan = s["plan"]
-
-        errors = validate_plan_claims(plan, HEALTHCARE_CLAIMS_SCHEMA)
-        is_valid = len(errors) == 0
-
-        sql_query = ""
-        sql_result_preview: list[dict[str, Any]] = []
-        sql_result_row_count = 0
-        summarizer_payload: dict[str, Any] = {}
-        execution_status = "SKIPPED"
-        execution_error = ""
-
-        if is_valid and plan.get("metric") != "UNSUPPORTED_METRIC":
-            try:
-                sql_query = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA)
-                result_df = executor.execute(sql_query)
-                sql_result_row_count = int(len(result_df))
-                sql_result_preview = result_df.head(max_output_rows).to_dict(
-                    orient="records"
-                )
-
-                diagnostics = {"descriptive_result": result_df}
-                summarizer_payload = build_insight_payload(plan, diagnostics)
-                execution_status = "OK"
-            except Exception as exc:
-                execution_status = "ERROR"
-                execution_error = str(exc)
-
-        rows.append(
-            {
-                "scenario_id": scenario_id,
-                "scenario_name": scenario_name,
-                "question": question,
-                "plan_json": _to_json_str(plan),
-                "validator_status": "PASS" if is_valid else "FAIL",
-                "validator_errors_json": _to_json_str(errors),
-                "sql_layer_input_json": _to_json_str(
-                    {
-                        "table": HEALTHCARE_CLAIMS_SCHEMA["table"],
-                        "plan": plan,
-                    }
-                ),
-                "generated_sql": sql_query,
-                "sql_output_row_count": sql_result_row_count,
-                "sql_output_preview_json": _to_json_str(sql_result_preview),
-                "summarizer_input_payload_json": _to_json_str(summarizer_payload),
-                "execution_status": execution_status,
-                "execution_error": execution_error,
-            }
+    time_anchor = resolve_time_anchor(executor, HEALTHCARE_CLAIMS_SCHEMA)
+
+    # Validate every plan up front against the compiled schema
+    schema = compile_schema(HEALTHCARE_CLAIMS_SCHEMA)
+    validation = validate_many((s["plan"] for s in scenarios), schema)
+
+    def run_one(scenario: dict[str, Any], errors: list[str]) -> dict[str, Any]:
+        return _run_scenario(
+            scenario, errors, executor, time_anchor, rollups, max_output_rows
         )
 
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+
+        if workers <= 1:
+            for s, errors in zip(scenarios, validation):
+                writer.writerow(run_one(s, errors))
+                written += 1
+        else:
+            # Bounded in-flight window keeps memory flat for long suites
+            max_in_flight = workers * 2
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pending = set()
+                for s, errors in zip(scenarios, validation):
+                    pending.add(pool.submit(run_one, s, errors))
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            writer.writerow(future.result())
+                            written += 1
+                for future in wait(pending).done:
+                    writer.writerow(future.result())
+                    written += 1
+
     executor.close()
+    print(f"Wrote {written} scenario rows to {output_csv}")
 
-    output_df = pd.DataFrame(rows)
-    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
-    output_df.to_csv(output_csv, index=False)
-    print(f"Wrote {len(output_df)} scenario rows to {output_csv}")
+
+def _run_scenario(
+    s: dict[str, Any],
+    errors: list[str],
+    executor: DuckDBExecutor,
+    time_anchor: Any,
+    rollups: RollupManager | None,
+    max_output_rows: int,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+
+    scenario_id = s["scenario_id"]
+    scenario_name = s["scenario_name"]
+    question = s["question"]
+    plan = s["plan"]
+
+    is_valid = len(errors) == 0
+
+    sql_query = ""
+    sql_params: list[Any] = []
+    sql_result_preview: list[dict[str, Any]] = []
+    sql_result_row_count = 0
+    summarizer_payload: dict[str, Any] = {}
+    execution_status = "SKIPPED"
+    execution_error = ""
+
+    if is_valid and plan.get("metric") != "UNSUPPORTED_METRIC":
+        try:
+            sql_query, sql_params = build_claims_query(
+                plan,
+                HEALTHCARE_CLAIMS_SCHEMA,
+                time_anchor=time_anchor,
+                rollups=rollups,
+            )
+            # Arrow keeps a single copy of the result; no pandas frame.
+            result_table = executor.execute_arrow(sql_query, sql_params)
+            sql_result_row_count = int(result_table.num_rows)
+            sql_result_preview = result_to_records(
+                result_table, limit=max_output_rows
+            )
+
+            diagnostics = {"descriptive_result": result_table}
+            summarizer_payload = build_insight_payload(plan, diagnostics)
+            execution_status = "OK"
+        except Exception as exc:
+            execution_status = "ERROR"
+            execution_error = str(exc)
+
+    return {
+        "scenario_id": scenario_id,
+        "scenario_name": scenario_name,
+        "question": question,
+        "plan_json": _to_json_str(plan),
+        "validator_status": "PASS" if is_valid else "FAIL",
+        "validator_errors_json": _to_json_str(errors),
+        "sql_layer_input_json": _to_json_str(
+            {
+                "table": HEALTHCARE_CLAIMS_SCHEMA["table"],
+                "plan": plan,
+            }
+        ),
+        "generated_sql": sql_query,
+        "sql_params_json": _to_json_str(sql_params),
+        "sql_output_row_count": sql_result_row_count,
+        "sql_output_preview_json": _to_json_str(sql_result_preview),
+        "summarizer_input_payload_json": _to_json_str(summarizer_payload),
+        "execution_status": execution_status,
+        "execution_error": execution_error,
+        "wall_time_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
 
 
 def main() -> int:
@@ -307,14 +410,71 @@ def main() -> int:
         default=25,
         help="Max number of SQL result rows stored in sql_output_preview_json.",
     )
+    parser.add_argument(
+        "--rollup-dimensions",
+        type=int,
+        default=None,
+        help=(
+            "Build rollups over every subset of up to N dimensions and route "
+            "eligible scenarios to them. Omit to query the raw table."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Run scenarios concurrently on N worker threads (one DuckDB "
+            "cursor each). Rows are written in completion order."
+        ),
+    )
+    parser.add_argument(
+        "--ingest-cache-dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory for cached Parquet copies of the claims CSV "
+            "(default: env ingest_cache_dir or ~/.cache/agent_sql/ingest)."
+        ),
+    )
+    parser.add_argument(
+        "--slow-query-log",
+        type=str,
+        default=None,
+        help=(
+            "Write profiled slow queries to this JSONL file and per-shape "
+            "stats to <path>.shapes.json."
+        ),
+    )
+    parser.add_argument(
+        "--slow-query-threshold-ms",
+        type=float,
+        default=500.0,
+        help="Queries at least this slow are written to --slow-query-log.",
+    )
     args = parser.parse_args()
 
+    slow_log = None
+    if args.slow_query_log:
+        slow_log = SlowQueryLog(
+            args.slow_query_log, threshold_ms=args.slow_query_threshold_ms
+        )
+
     run_scenarios(
         claims_csv=args.claims_csv,
         output_csv=args.output_csv,
         scenarios_csv=args.scenarios_csv,
         max_output_rows=args.max_output_rows,
+        rollup_dimensions=args.rollup_dimensions,
+        workers=args.workers,
+        ingest_cache_dir=args.ingest_cache_dir,
+        slow_log=slow_log,
     )
+
+    if slow_log is not None:
+        slow_log.close()
+        with open(f"{args.slow_query_log}.shapes.json", "w", encoding="utf-8") as f:
+            json.dump(slow_log.shape_stats(), f, indent=2)
     return 0
 
 
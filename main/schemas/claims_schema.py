@@ -92,6 +92,8 @@ HEALTHCARE_CLAIMS_SCHEMA = {
     },
 }
 
-print("/ Healthcare Claims Semantic Schema created")
-print(f"- {len(HEALTHCARE_CLAIMS_SCHEMA['metrics'])} metrics defined")
-print(f"- {len(HEALTHCARE_CLAIMS_SCHEMA['dimensions'])} dimensions defined")
+
+if __name__ == "__main__":
+    print("/ Healthcare Claims Semantic Schema created")
+    print(f"- {len(HEALTHCARE_CLAIMS_SCHEMA['metrics'])} metrics defined")
+    print(f"- {len(HEALTHCARE_CLAIMS_SCHEMA['dimensions'])} dimensions defined")
@@ -0,0 +1,129 @@
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+
+RELATED_METRIC_STEP_PREFIX = "check_related_metric:"
+
+# Compiled schemas are kept (with a strong reference to their source, so
+# ids are never reused while cached) up to this many distinct dicts.
+_MAX_CACHED = 64
+
+
+@dataclass(frozen=True)
+class CompiledMetric:
+    name: str
+    column: str
+    aggregation: str
+    expression: str | None
+    # Aggregate SQL without alias, e.g. "SUM(totalpaidamount)";
+    # None if the aggregation is not supported by the builders.
+    aggregate_sql: str | None
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    """
+    Immutable, precomputed view of a semantic schema dict.
+
+    Validators and builders read these frozen sets and lookups instead of
+    re-walking the nested schema dicts on every call.
+    """
+
+    table: str
+    time_column: str
+    metrics: Mapping[str, CompiledMetric]
+    dimension_columns: Mapping[str, str]
+    supported_ranges: frozenset
+    # Dimension columns, non-"*" metric columns and the time column
+    filter_columns: frozenset
+    raw_columns: frozenset
+    # "check_related_metric:<metric>" for every metric
+    related_metric_steps: frozenset
+
+    @property
+    def metric_names(self):
+        return self.metrics.keys()
+
+    @property
+    def dimension_names(self):
+        return self.dimension_columns.keys()
+
+
+_compiled: dict[int, tuple[dict, CompiledSchema]] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_schema(schema: dict | CompiledSchema) -> CompiledSchema:
+    """
+    Compile a semantic schema dict (e.g. HEALTHCARE_CLAIMS_SCHEMA).
+
+    Results are cached by the identity of the dict, so calling this on
+    every validation or build is a dictionary lookup. Schema dicts must not
+    be mutated after they are first compiled. A CompiledSchema is returned
+    unchanged.
+    """
+    if isinstance(schema, CompiledSchema):
+        return schema
+
+    entry = _compiled.get(id(schema))
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+
+    compiled = _compile(schema)
+    with _compiled_lock:
+        if len(_compiled) >= _MAX_CACHED:
+            _compiled.clear()
+        _compiled[id(schema)] = (schema, compiled)
+    return compiled
+
+
+def _compile(schema: dict) -> CompiledSchema:
+    metrics = {
+        name: CompiledMetric(
+            name=name,
+            column=metric_def["column"],
+            aggregation=metric_def["aggregations"][0],
+            expression=metric_def.get("expression"),
+            aggregate_sql=_aggregate_sql(metric_def),
+        )
+        for name, metric_def in schema["metrics"].items()
+    }
+    dimension_columns = {
+        name: dim_def["column"] for name, dim_def in schema["dimensions"].items()
+    }
+    time_column = schema["time"]["column"]
+
+    filter_columns = (
+        set(dimension_columns.values())
+        | {m.column for m in metrics.values() if m.column != "*"}
+        | {time_column}
+    )
+
+    return CompiledSchema(
+        table=schema["table"],
+        time_column=time_column,
+        metrics=MappingProxyType(metrics),
+        dimension_columns=MappingProxyType(dimension_columns),
+        supported_ranges=frozenset(schema["time"].get("supported_ranges", ())),
+        filter_columns=frozenset(filter_columns),
+        raw_columns=frozenset(schema.get("raw_columns", ())),
+        related_metric_steps=frozenset(
+            RELATED_METRIC_STEP_PREFIX + name for name in metrics
+        ),
+    )
+
+
+def _aggregate_sql(metric_def: dict) -> str | None:
+    aggregation = metric_def["aggregations"][0]
+    column = metric_def["column"]
+    if aggregation == "custom":
+        return metric_def["expression"]
+    if aggregation == "avg":
+        return f"AVG({column})"
+    if aggregation == "sum":
+        return f"SUM({column})"
+    if aggregation == "count":
+        return "COUNT(*)" if column == "*" else f"COUNT({column})"
+    return None
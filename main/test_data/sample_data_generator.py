@@ -1,10 +1,16 @@
-import csv
+import argparse
+import shutil
 from pathlib import Path
-from datetime import datetime, timedelta
-import random
 
-OUTPUT_FILE = Path("data_new.csv")
-TARGET_ROWS = 5000
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DEFAULT_ROWS = 5000
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_SEED = 42
+DEFAULT_PROVIDERS = 9000
+DEFAULT_ZIPF_A = 1.1
 
 HEADER = [
     "providertaxid",
@@ -37,123 +43,304 @@ SUBPROGRAMS = ["CVA", "DRG", "GEN"]
 DRG_CONDITION = ["MCC", "CC", "OTHER"]
 SELECTION_REASONS = ["High cost", "Readmission", "Outlier stay", "Random sample"]
 
-LOADMONTHS = ["202506", "202507"]  # as requested
+# Rows reserved per month so every category x drgconditiontype x subprogram
+# combination exists at least once
+COVERAGE_ROWS_PER_MONTH = len(CATEGORIES) * len(DRG_CONDITION) * len(SUBPROGRAMS)
 
 
-def random_date_in_month(yyyymm: str) -> datetime:
-    year = int(yyyymm[:4])
-    month = int(yyyymm[4:])
-    start = datetime(year, month, 1)
-    # pick a day between 1 and 28 to avoid month-end issues
-    day_offset = random.randint(0, 27)
-    return start + timedelta(days=day_offset)
+def month_range(start_month: str, end_month: str) -> list[str]:
+    """
+    Inclusive list of YYYYMM months, e.g. 202511..202602.
+    """
+    start = int(start_month[:4]) * 12 + int(start_month[4:]) - 1
+    end = int(end_month[:4]) * 12 + int(end_month[4:]) - 1
+    if end < start:
+        raise ValueError(f"end month {end_month} is before start month {start_month}")
+    return [f"{i // 12}{i % 12 + 1:02d}" for i in range(start, end + 1)]
+
+
+def zipf_weights(n_providers: int, a: float) -> np.ndarray:
+    """
+    Bounded Zipf probabilities: provider of rank k is drawn with weight 1/k^a.
+    """
+    weights = 1.0 / np.arange(1, n_providers + 1, dtype=np.float64) ** a
+    return weights / weights.sum()
+
+
+def generate_chunk(
+    rng: np.random.Generator,
+    start_idx: int,
+    n: int,
+    loadmonths: list[str],
+    provider_weights: np.ndarray
+) -> pa.Table:
+    """
+    Generate n claims rows (global row indices start_idx..start_idx+n-1)
+    as an Arrow table with HEADER columns.
 
+    The first COVERAGE_ROWS_PER_MONTH rows of each month in the global row
+    order are pinned to one category x drgconditiontype x subprogram
+    combination each.
+    """
+    idx = np.arange(start_idx, start_idx + n, dtype=np.int64)
 
-def make_row(idx: int, loadmonth: str) -> dict:
-    prov_id = f"PRV{random.randint(1000, 9999)}"
-    claim_no = f"CLM{loadmonth}{idx:04d}"
+    month_idx = rng.integers(0, len(loadmonths), n)
+    category = rng.integers(0, len(CATEGORIES), n)
+    drg_cond = rng.integers(0, len(DRG_CONDITION), n)
+    subprogram = rng.integers(0, len(SUBPROGRAMS), n)
 
-    start_dt = random_date_in_month(loadmonth)
-    los = random.randint(1, 10)
-    end_dt = start_dt + timedelta(days=los - 1)
+    # ----------------------------
+    # Coverage rows
+    # ----------------------------
+    coverage = idx < len(loadmonths) * COVERAGE_ROWS_PER_MONTH
+    if coverage.any():
+        combo = idx[coverage] % COVERAGE_ROWS_PER_MONTH
+        month_idx[coverage] = idx[coverage] // COVERAGE_ROWS_PER_MONTH
+        category[coverage] = combo // (len(DRG_CONDITION) * len(SUBPROGRAMS))
+        drg_cond[coverage] = (combo // len(SUBPROGRAMS)) % len(DRG_CONDITION)
+        subprogram[coverage] = combo % len(SUBPROGRAMS)
 
-    category = random.choice(CATEGORIES)
-    subprogram = random.choice(SUBPROGRAMS)
-    drg_cond = random.choice(DRG_CONDITION)
-    discharge = random.choice(DISCHARGE_STATUS)
-    sel_reason = random.choice(SELECTION_REASONS)
+    months = np.array(loadmonths)[month_idx]
+    month_starts = np.array(
+        [f"{m[:4]}-{m[4:]}-01" for m in loadmonths], dtype="datetime64[D]"
+    )[month_idx]
 
-    # diagnosis / procedure codes (fake but realistic-looking)
-    admit_dx = f"I{random.randint(10, 69)}.{random.randint(0, 9)}"
-    primary_dx = f"E{random.randint(10, 89)}.{random.randint(0, 9)}"
-    primary_proc = f"0{random.randint(0, 9)}{random.randint(0, 9)}{random.randint(0, 9)}"
+    # Zipf-skewed providers: a few providers own most claims
+    provider_rank = rng.choice(len(provider_weights), size=n, p=provider_weights)
+
+    # pick a day between 1 and 28 to avoid month-end issues
+    start_dt = month_starts + rng.integers(0, 28, n).astype("timedelta64[D]")
+    los = rng.integers(1, 11, n)
+    end_dt = start_dt + (los - 1).astype("timedelta64[D]")
 
     # findings / audits logic
-    exl_find = random.choice([0, 1])
-    exl_no_find = 0 if exl_find == 1 else 1
+    exl_find = rng.integers(0, 2, n)
+    exl_no_find = 1 - exl_find
 
     # severity counts consistent with drgconditiontype
-    if drg_cond == "MCC":
-        mcc = random.randint(1, 2)
-        cc = random.randint(0, 1)
-    elif drg_cond == "CC":
-        mcc = 0
-        cc = random.randint(1, 2)
-    else:
-        mcc = 0
-        cc = 0
-
-    # MDCN – just a small range of integers
-    mdcn = random.randint(1, 25)
+    is_mcc = drg_cond == DRG_CONDITION.index("MCC")
+    is_cc = drg_cond == DRG_CONDITION.index("CC")
+    mcc = np.where(is_mcc, rng.integers(1, 3, n), 0)
+    cc = np.where(is_mcc, rng.integers(0, 2, n), np.where(is_cc, rng.integers(1, 3, n), 0))
 
     # payment correlated with LOS and findings
-    base = random.randint(1000, 20000)
-    if exl_find:
-        base += random.randint(500, 5000)
-    total_paid = round(base * (1 + los * 0.05), 2)
-
-    return {
-        "providertaxid": prov_id,
-        "claimnumber": claim_no,
-        "firstdateofservice": start_dt.strftime("%Y-%m-%d"),
-        "lastdateofservice": end_dt.strftime("%Y-%m-%d"),
-        "dischargestatuscode": discharge,
-        "admitdiagnosiscode": admit_dx,
-        "primarydiagnosiscode": primary_dx,
-        "primaryprocedurecode": primary_proc,
-        "totalpaidamount": total_paid,
-        "lengthofstay": los,
+    base = rng.integers(1000, 20001, n) + exl_find * rng.integers(500, 5001, n)
+    total_paid = np.round(base * (1 + los * 0.05), 2)
+
+    loadmonth = pa.array(months.astype(np.int32))
+    month_str = pa.array(months)
+
+    return pa.table({
+        "providertaxid": _concat("PRV", 1000 + provider_rank),
+        "claimnumber": _concat("CLM", month_str, _zero_pad(idx + 1, 4)),
+        "firstdateofservice": pa.array(start_dt).cast(pa.string()),
+        "lastdateofservice": pa.array(end_dt).cast(pa.string()),
+        "dischargestatuscode": _pick(DISCHARGE_STATUS, rng.integers(0, 4, n)),
+        # diagnosis / procedure codes (fake but realistic-looking)
+        "admitdiagnosiscode": _concat(
+            "I", rng.integers(10, 70, n), ".", rng.integers(0, 10, n)
+        ),
+        "primarydiagnosiscode": _concat(
+            "E", rng.integers(10, 90, n), ".", rng.integers(0, 10, n)
+        ),
+        "primaryprocedurecode": _concat("0", _zero_pad(rng.integers(0, 1000, n), 3)),
+        "totalpaidamount": pa.array(total_paid),
+        "lengthofstay": pa.array(los.astype(np.int32)),
         "loadmonth": loadmonth,
-        "category": category,
-        "selectionreason": sel_reason,
-        "subprogramtype": subprogram,
-        "exl_nofinding": exl_no_find,
-        "exl_finding": exl_find,
-        "drgconditiontype": drg_cond,
-        "mdcn": mdcn,
-        "mcc_count": mcc,
-        "cc_count": cc,
+        "category": _pick(CATEGORIES, category),
+        "selectionreason": _pick(SELECTION_REASONS, rng.integers(0, 4, n)),
+        "subprogramtype": _pick(SUBPROGRAMS, subprogram),
+        "exl_nofinding": pa.array(exl_no_find.astype(np.int32)),
+        "exl_finding": pa.array(exl_find.astype(np.int32)),
+        "drgconditiontype": _pick(DRG_CONDITION, drg_cond),
+        # MDCN – just a small range of integers
+        "mdcn": pa.array(rng.integers(1, 26, n).astype(np.int32)),
+        "mcc_count": pa.array(mcc.astype(np.int32)),
+        "cc_count": pa.array(cc.astype(np.int32)),
         "selection_month": loadmonth,
-    }
+    })
+
+
+def generate(
+    output: str,
+    rows: int = DEFAULT_ROWS,
+    start_month: str = "202506",
+    end_month: str = "202507",
+    seed: int = DEFAULT_SEED,
+    n_providers: int = DEFAULT_PROVIDERS,
+    zipf_a: float = DEFAULT_ZIPF_A,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    fmt: str = "parquet",
+    overwrite: bool = False
+) -> int:
+    """
+    Generate synthetic claims in chunks and write them out.
+
+    Memory is bounded by chunk_rows, not rows. Output is deterministic for
+    a given (seed, chunk_rows): chunk i draws from its own generator seeded
+    with (seed, i).
+
+    Args:
+        output: Directory for hive-partitioned Parquet
+            (output/loadmonth=YYYYMM/part-*.parquet), or a CSV file path
+        rows: Total rows to generate
+        start_month / end_month: Inclusive YYYYMM range of loadmonths
+        seed: Random seed
+        n_providers: Number of distinct providers
+        zipf_a: Zipf exponent of the provider distribution (larger = more skew)
+        chunk_rows: Rows generated per chunk
+        fmt: "parquet" or "csv"
+        overwrite: Replace the loadmonth=* partitions of an existing,
+            non-empty Parquet output directory. Nothing else in the
+            directory is touched.
+
+    Returns:
+        Number of rows written.
+
+    Raises:
+        FileExistsError: Parquet output exists, is not empty and overwrite
+            is False, or is not a directory.
+    """
+    loadmonths = month_range(start_month, end_month)
+    if rows < len(loadmonths) * COVERAGE_ROWS_PER_MONTH:
+        raise ValueError("rows is too small for required coverage rows.")
+
+    weights = zipf_weights(n_providers, zipf_a)
+    output_path = Path(output)
+    writers = {}
+
+    if fmt == "parquet":
+        _prepare_output_dir(output_path, overwrite)
+    else:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        for chunk_index, start_idx in enumerate(range(0, rows, chunk_rows)):
+            rng = np.random.default_rng([seed, chunk_index])
+            n = min(chunk_rows, rows - start_idx)
+            table = generate_chunk(rng, start_idx, n, loadmonths, weights)
+
+            if fmt == "csv":
+                _write_csv(writers, output_path, table)
+            else:
+                _write_partitions(writers, output_path, table, loadmonths)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return rows
+
+
+def _prepare_output_dir(output_path: Path, overwrite: bool):
+    if output_path.exists() and not output_path.is_dir():
+        raise FileExistsError(f"{output_path} exists and is not a directory")
+
+    if output_path.is_dir() and any(output_path.iterdir()):
+        if not overwrite:
+            raise FileExistsError(
+                f"{output_path} is not empty; pass overwrite=True (--overwrite) "
+                "to replace its loadmonth=* partitions"
+            )
+        # Only ever delete what generate() writes
+        for part_dir in output_path.glob("loadmonth=*"):
+            if part_dir.is_dir():
+                shutil.rmtree(part_dir)
+
+    output_path.mkdir(parents=True, exist_ok=True)
+
+
+def _write_partitions(writers: dict, output_path: Path, table: pa.Table, loadmonths):
+    import pyarrow.parquet as pq
+
+    # loadmonth is encoded in the directory name (hive partitioning)
+    months = table.column("loadmonth")
+    data = table.drop_columns(["loadmonth"])
+    for month in loadmonths:
+        part = data.filter(pc.equal(months, int(month)))
+        if part.num_rows == 0:
+            continue
+        writer = writers.get(month)
+        if writer is None:
+            part_dir = output_path / f"loadmonth={month}"
+            part_dir.mkdir(exist_ok=True)
+            writer = pq.ParquetWriter(
+                part_dir / "part-00000.parquet", part.schema, compression="zstd"
+            )
+            writers[month] = writer
+        writer.write_table(part)
+
+
+def _write_csv(writers: dict, output_path: Path, table: pa.Table):
+    import pyarrow.csv as pacsv
+
+    writer = writers.get("csv")
+    if writer is None:
+        writer = pacsv.CSVWriter(output_path, table.schema)
+        writers["csv"] = writer
+    writer.write_table(table)
+
+
+def _pick(values: list[str], codes: np.ndarray) -> pa.Array:
+    return pa.DictionaryArray.from_arrays(
+        pa.array(codes.astype(np.int32)), pa.array(values)
+    ).cast(pa.string())
+
+
+def _zero_pad(values: np.ndarray, width: int) -> pa.Array:
+    return pc.utf8_lpad(pa.array(values).cast(pa.string()), width, "0")
+
+
+def _concat(*parts) -> pa.Array:
+    arrays = [
+        part if isinstance(part, (str, pa.Array)) else pa.array(part).cast(pa.string())
+        for part in parts
+    ]
+    return pc.binary_join_element_wise(*arrays, "")
 
 
 def main():
-    rows = []
-
-    coverage_rows_per_month = len(CATEGORIES) * len(DRG_CONDITION) * len(SUBPROGRAMS)
-    base_rows_total = TARGET_ROWS - (len(LOADMONTHS) * coverage_rows_per_month)
-    if base_rows_total < 0:
-        raise ValueError("TARGET_ROWS is too small for required coverage rows.")
-
-    base_rows_per_month = base_rows_total // len(LOADMONTHS)
-    extra_rows = base_rows_total % len(LOADMONTHS)
-
-    idx = 1
-    for month_index, loadmonth in enumerate(LOADMONTHS):
-        month_rows = base_rows_per_month + (1 if month_index < extra_rows else 0)
-        for _ in range(month_rows):
-            rows.append(make_row(idx, loadmonth))
-            idx += 1
-
-    # ensure all combinations of category x drgconditiontype x subprogram exist at least once
-    for loadmonth in LOADMONTHS:
-        for cat in CATEGORIES:
-            for drg in DRG_CONDITION:
-                for sub in SUBPROGRAMS:
-                    idx += 1
-                    row = make_row(idx, loadmonth)
-                    row["category"] = cat
-                    row["drgconditiontype"] = drg
-                    row["subprogramtype"] = sub
-                    rows.append(row)
-
-    # write CSV
-    with OUTPUT_FILE.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=HEADER)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"Wrote {len(rows)} rows to {OUTPUT_FILE}")
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic claims data (NumPy-vectorized, chunked)."
+    )
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS,
+                        help=f"Total rows (default: {DEFAULT_ROWS})")
+    parser.add_argument("--start-month", type=str, default="202506",
+                        help="First loadmonth, YYYYMM (default: 202506)")
+    parser.add_argument("--end-month", type=str, default="202507",
+                        help="Last loadmonth, YYYYMM, inclusive (default: 202507)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"Random seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--providers", type=int, default=DEFAULT_PROVIDERS,
+                        help=f"Distinct providers (default: {DEFAULT_PROVIDERS})")
+    parser.add_argument("--zipf-a", type=float, default=DEFAULT_ZIPF_A,
+                        help=f"Provider skew exponent (default: {DEFAULT_ZIPF_A})")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per generated chunk (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet",
+                        help="Hive-partitioned Parquet directory or a single CSV")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Output directory (parquet) or file (csv); "
+                             "default: claims_parquet / data_new.csv")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Replace the loadmonth=* partitions of a non-empty "
+                             "Parquet output directory")
+    args = parser.parse_args()
+
+    output = args.output or ("claims_parquet" if args.format == "parquet" else "data_new.csv")
+    written = generate(
+        output,
+        rows=args.rows,
+        start_month=args.start_month,
+        end_month=args.end_month,
+        seed=args.seed,
+        n_providers=args.providers,
+        zipf_a=args.zipf_a,
+        chunk_rows=args.chunk_rows,
+        fmt=args.format,
+        overwrite=args.overwrite,
+    )
+
+    print(f"Wrote {written} rows to {output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import json
+
+from runners.batch import read_questions, run_batch, to_jsonable
+from tests.sample_data import sample_taxi_df
+
+
+def test_read_questions_accepts_text_and_jsonl(tmp_path):
+    path = tmp_path / "questions.txt"
+    path.write_text(
+        "Average fare last month?\n"
+        "\n"
+        "# comment\n"
+        '{"question": "Trip count by vendor"}\n'
+    )
+
+    assert list(read_questions(str(path))) == [
+        "Average fare last month?",
+        "Trip count by vendor",
+    ]
+
+
+def test_bad_jsonl_lines_fail_only_themselves(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text(
+        '{"question": "a"}\n'
+        '{"question": \n'
+        '{"text": "no question key"}\n'
+        '{"question": "c"}\n'
+    )
+
+    records = []
+    summary = run_batch(
+        read_questions(str(path)), lambda q: {"summary": q.upper()}, records.append, workers=2
+    )
+    records.sort(key=lambda r: r["index"])
+
+    assert [r["question"] for r in records] == ["a", None, None, "c"]
+    assert [r["result"] for r in records[::3]] == [{"summary": "A"}, {"summary": "C"}]
+    assert [r["result"]["line"] for r in records[1:3]] == [2, 3]
+    assert summary["errors"] == 2
+
+
+def test_run_batch_streams_every_result_and_isolates_errors():
+    def analyze(question):
+        if question == "boom":
+            raise RuntimeError("failed")
+        return {"summary": question.upper(), "diagnostics": {"descriptive_result": sample_taxi_df()}}
+
+    records = []
+    summary = run_batch(["a", "boom", "c"], analyze, records.append, workers=2)
+
+    assert sorted(r["index"] for r in records) == [0, 1, 2]
+    assert summary["questions"] == 3
+    assert summary["errors"] == 1
+    assert "p95" in summary["latency_ms"]
+
+    # Records are JSON-serializable once converted
+    for record in records:
+        json.dumps(to_jsonable(record))
@@ -0,0 +1,110 @@
+import json
+import re
+
+import pytest
+
+from planners.batch_planner import run_planner_claims_batch
+from utils.llm_backend import LLMBackend, LLMRequestRejected, LLMResponse, set_llm_backend
+from utils.tracing import start_trace
+
+
+def _plan(metric: str) -> dict:
+    return {
+        "intent": "descriptive",
+        "metric": metric,
+        "time_range": "last_month",
+        "group_by": [],
+        "filters": [],
+        "analysis_steps": [],
+    }
+
+
+class FakePlannerBackend(LLMBackend):
+    """
+    Answers batch prompts with a JSON array and single prompts with one
+    plan. The question text picks the metric; "garbled" breaks its item,
+    "unparseable" breaks the whole batch and "forbidden" is rejected.
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    def complete(self, messages, model, temperature, max_tokens):
+        user = messages[-1]["content"]
+        if "USER QUESTIONS:" in user:
+            questions = re.findall(r"^(\d+)\. (.*)$", user.split("USER QUESTIONS:")[1], re.M)
+            self.batch_sizes.append(len(questions))
+            text = " ".join(q for _, q in questions)
+            if "forbidden" in text:
+                raise LLMRequestRejected("content filtered")
+            if "unparseable" in text:
+                return LLMResponse("Sorry, here are your plans: ...")
+            items = [
+                {"id": int(n), "plan": "???" if "garbled" in q else _plan(q.split()[0])}
+                for n, q in questions
+            ]
+            return LLMResponse(json.dumps(items), {"prompt_tokens": 10, "total_tokens": 20})
+
+        self.single_calls += 1
+        question = user.split("USER QUESTION:")[1].split("OUTPUT FORMAT")[0].strip()
+        if "forbidden" in question:
+            raise LLMRequestRejected("content filtered")
+        return LLMResponse(json.dumps(_plan(question.split()[0])))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setenv("planner_cache_path", "")
+    fake = FakePlannerBackend()
+    set_llm_backend(fake)
+    yield fake
+    set_llm_backend(None)
+
+
+def test_batches_questions_in_order(backend):
+    questions = ["hitrate q", "audits q", "selections q", "claim_count q", "hitrate again"]
+
+    plans = run_planner_claims_batch(questions, batch_size=2)
+
+    assert [p["metric"] for p in plans] == ["hitrate", "audits", "selections", "claim_count", "hitrate"]
+    assert backend.batch_sizes == [2, 2, 1]
+    assert backend.single_calls == 0
+
+
+def test_bad_item_only_fails_itself(backend):
+    plans = run_planner_claims_batch(["hitrate q", "audits garbled", "selections q"])
+
+    assert [p["metric"] for p in plans] == ["hitrate", "audits", "selections"]
+    assert backend.single_calls == 1
+
+
+def test_unusable_batch_falls_back_to_single_calls(backend):
+    plans = run_planner_claims_batch(
+        ["hitrate q", "audits unparseable", "selections q", "claim_count forbidden"],
+        batch_size=2,
+    )
+
+    assert [p.get("metric") for p in plans[:3]] == ["hitrate", "audits", "selections"]
+    assert plans[3]["error"] == "CONTENT_FILTERED"
+    assert backend.single_calls == 4
+
+
+def test_valid_plans_are_cached(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("planner_cache_path", str(tmp_path / "plans.sqlite"))
+
+    first = run_planner_claims_batch(["hitrate q", "made_up_metric q"], workers=2, batch_size=1)
+    again = run_planner_claims_batch(["hitrate q", "made_up_metric q"])
+
+    assert again == first
+    # Only the invalid plan had to be requested again
+    assert backend.batch_sizes == [1, 1, 1]
+
+
+def test_worker_threads_report_into_the_trace(backend):
+    with start_trace("batch") as trace:
+        run_planner_claims_batch(["hitrate q", "audits q", "selections q"], batch_size=1, workers=3)
+
+    batch_span = next(s for s in trace.to_dicts() if s["name"] == "planner.batch")
+    assert batch_span["attributes"]["requests"] == 3
+    assert batch_span["attributes"]["total_tokens"] == 20
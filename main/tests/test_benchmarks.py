@@ -0,0 +1,46 @@
+from benchmarks.harness import compare, measure, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7.0], 0.99) == 7.0
+
+
+def test_measure_reports_latency_and_memory():
+    calls = []
+    stats = measure(lambda: calls.append(bytearray(1024 * 1024)), iterations=5, warmup=2)
+
+    # 2 warm-up + 5 timed + 1 traced
+    assert len(calls) == 8
+    assert stats["iterations"] == 5
+    assert stats["min_ms"] <= stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+    assert stats["peak_python_mb"] >= 1.0
+    assert stats["max_rss_mb"] > 0
+
+
+def test_compare_flags_regressions_against_baseline():
+    baseline = [
+        {"case": "build_sql", "scale": None, "p50_ms": 1.0, "p95_ms": 2.0,
+         "p99_ms": 2.0, "peak_python_mb": 1.0},
+        {"case": "executor_execute", "scale": 10_000, "p50_ms": 5.0, "p95_ms": 6.0,
+         "p99_ms": 6.0, "peak_python_mb": 1.0},
+    ]
+    results = [
+        {"case": "build_sql", "scale": None, "p50_ms": 1.05, "p95_ms": 2.0,
+         "p99_ms": 2.0, "peak_python_mb": 1.0},
+        {"case": "executor_execute", "scale": 10_000, "p50_ms": 7.5, "p95_ms": 6.0,
+         "p99_ms": 6.0, "peak_python_mb": 1.0},
+        {"case": "executor_execute", "scale": 100_000, "p50_ms": 9.0, "p95_ms": 9.0,
+         "p99_ms": 9.0, "peak_python_mb": 1.0},
+    ]
+
+    comparison = compare(results, baseline, threshold=0.10)
+    assert [(c["case"], c["scale"]) for c in comparison] == [
+        ("build_sql", None), ("executor_execute", 10_000)
+    ]
+    assert comparison[0]["regressions"] == []
+    assert comparison[1]["regressions"] == ["p50_ms"]
+    assert comparison[1]["changes"]["p50_ms"] == 1.5
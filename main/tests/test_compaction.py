@@ -0,0 +1,63 @@
+import pandas as pd
+
+from insights.compaction import compact_result, estimate_tokens
+from insights.schema import build_insight_payload
+from tools.sql_executor import DuckDBExecutor
+
+
+def _comparison_df(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "provider": [f"P{i:05d}" for i in range(n)],
+        "amount_current": [float(i) for i in range(n)],
+        "amount_previous": [float(i) + (i % 7) - 3 for i in range(n)],
+        "abs_change": [3.0 - (i % 7) for i in range(n)],
+        "pct_change": [0.0] * n,
+    })
+
+
+def test_small_result_is_kept_in_full():
+    df = _comparison_df(3)
+    assert compact_result(df, token_budget=1000) == df.to_dict(orient="records")
+
+
+def test_large_result_is_compacted_within_budget():
+    df = _comparison_df(20_000)
+    summary = compact_result(df, token_budget=800, top_k=5)
+
+    assert summary["truncated"] is True
+    assert summary["total_rows"] == 20_000
+    assert summary["sort_column"] == "amount_current"
+    assert summary["top"][0]["provider"] == "P19999"
+    assert summary["bottom"][0]["provider"] == "P00000"
+    assert abs(summary["largest_movers"][0]["abs_change"]) == 3.0
+    assert summary["stats"]["amount_current"]["max"] == 19999.0
+    assert summary["stats"]["amount_current"]["sum"] == sum(range(20_000))
+    assert estimate_tokens(summary) <= 800
+
+
+def test_compacts_arrow_batches():
+    executor = DuckDBExecutor()
+    batches = executor.execute_batches(
+        "SELECT i AS id, i * 2 AS total FROM range(50000) t(i)", batch_size=4096
+    )
+    summary = compact_result(batches, token_budget=500)
+
+    assert summary["truncated"] is True
+    assert summary["total_rows"] == 50_000
+    assert summary["top"][0]["total"] == 99_998
+    assert "largest_movers" not in summary
+
+
+def test_payload_budget_applies_per_finding():
+    plan = {"intent": "diagnostic", "metric": "amount", "time_range": "last_month"}
+    diagnostics = {
+        "period_comparison": _comparison_df(10_000),
+        "top_contributors": _comparison_df(10_000),
+    }
+
+    payload = build_insight_payload(plan, diagnostics, token_budget=1000)
+    assert payload["findings"]["period_comparison"]["truncated"] is True
+    assert len(payload["findings"]["top_contributors"]) == 5
+
+    full = build_insight_payload(plan, diagnostics, token_budget=None)
+    assert len(full["findings"]["period_comparison"]) == 10_000
@@ -0,0 +1,92 @@
+import dataclasses
+
+import pytest
+
+from planners.planner_validator import validate_many as validate_many_taxi
+from planners.planner_validator_claims import validate_many, validate_plan_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.compiled import compile_schema
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from tools.sql_builder import build_sql
+from tools.sql_builder_claims import build_claims_sql
+
+
+def _claims_plan(**overrides) -> dict:
+    plan = {
+        "intent": "descriptive",
+        "metric": "hitrate",
+        "time_range": "last_3_months",
+        "group_by": ["subprogram"],
+        "filters": [{"column": "drgconditiontype", "op": "IN", "value": ["MCC"]}],
+        "analysis_steps": ["check_related_metric:claim_count"],
+    }
+    plan.update(overrides)
+    return plan
+
+
+def test_compile_is_cached_and_frozen():
+    compiled = compile_schema(HEALTHCARE_CLAIMS_SCHEMA)
+
+    assert compile_schema(HEALTHCARE_CLAIMS_SCHEMA) is compiled
+    assert compile_schema(compiled) is compiled
+    assert "loadmonth" in compiled.filter_columns
+    assert "*" not in compiled.filter_columns
+    assert compiled.metrics["claim_count"].aggregate_sql == "COUNT(*)"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        compiled.table = "other"
+    with pytest.raises(TypeError):
+        compiled.metrics["new_metric"] = None
+
+
+def test_claims_validator_messages():
+    plan = _claims_plan(
+        metric="made_up",
+        analysis_steps=["check_related_metric:nope", "explode"],
+        filters=[{"column": "secret", "op": "DROP"}, "x"],
+    )
+
+    assert validate_plan_claims(plan, HEALTHCARE_CLAIMS_SCHEMA) == [
+        "Invalid metric (hallucinated): made_up",
+        "Invalid related metric in analysis_step: check_related_metric:nope",
+        "Invalid analysis_step: explode",
+        "Filter at index 0 missing key: value",
+        "Invalid filter column at index 0: secret",
+        "Invalid filter operation at index 0: DROP",
+        "Filter at index 1 must be an object",
+    ]
+
+
+def test_validate_many_matches_single_validation():
+    plans = [_claims_plan(), _claims_plan(group_by=["nope"]), {"intent": "descriptive"}]
+
+    results = validate_many(plans, HEALTHCARE_CLAIMS_SCHEMA)
+
+    assert results == [validate_plan_claims(p, HEALTHCARE_CLAIMS_SCHEMA) for p in plans]
+    assert results[0] == []
+    assert results[1] == ["Invalid group_by dimension: nope"]
+    assert results[2][0].startswith("Missing required keys:")
+
+    taxi_plan = {
+        "intent": "diagnostic",
+        "metric": "avg_fare",
+        "time_range": "last_month",
+        "group_by": ["vendor"],
+        "filters": [],
+        "analysis_steps": ["compare_previous_period"],
+    }
+    assert validate_many_taxi([taxi_plan], TAXI_SEMANTIC_SCHEMA) == [[]]
+
+
+def test_builders_accept_compiled_schema():
+    plan = _claims_plan()
+    assert build_claims_sql(plan, compile_schema(HEALTHCARE_CLAIMS_SCHEMA)) == (
+        build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA)
+    )
+
+    taxi_plan = {"metric": "trip_count", "group_by": ["vendor"], "time_range": "last_month"}
+    sql = build_sql(taxi_plan, compile_schema(TAXI_SEMANTIC_SCHEMA))
+    assert "COUNT(*) AS trip_count" in sql
+    assert "GROUP BY VendorID" in sql
+
+    with pytest.raises(ValueError, match="Unknown dimension: nope"):
+        build_claims_sql(_claims_plan(group_by=["nope"]), HEALTHCARE_CLAIMS_SCHEMA)
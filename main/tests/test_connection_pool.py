@@ -0,0 +1,94 @@
+import threading
+
+from tools.sql_executor import ConnectionPool, DuckDBExecutor
+from tests.sample_data import sample_taxi_df
+
+
+def test_pool_gives_each_thread_its_own_cursor():
+    pool = ConnectionPool(":memory:")
+    cursors = {}
+
+    def grab(name):
+        cursors[name] = (pool.cursor(), pool.cursor())
+
+    threads = [threading.Thread(target=grab, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for first, second in cursors.values():
+        assert first is second
+    assert len({id(c[0]) for c in cursors.values()}) == 3
+
+    pool.close()
+    assert pool.closed
+
+
+def test_registered_table_visible_from_worker_threads():
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    counts = []
+
+    def count_rows():
+        df = executor.execute("SELECT COUNT(*) AS n FROM taxi_analysis_ready")
+        counts.append(int(df.iloc[0]["n"]))
+
+    threads = [threading.Thread(target=count_rows) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    executor.close()
+
+    assert counts == [3, 3, 3, 3]
+
+
+def test_cursors_of_finished_threads_are_pruned():
+    pool = ConnectionPool(":memory:")
+
+    for _ in range(5):
+        t = threading.Thread(target=pool.cursor)
+        t.start()
+        t.join()
+    pool.cursor()
+
+    # Only the calling thread's cursor is left
+    assert list(pool._cursors) == [threading.current_thread()]
+    pool.close()
+
+
+def test_shared_pool_closes_with_its_last_executor(tmp_path):
+    from benchmarks.datasets import taxi_db
+
+    db = taxi_db(100, str(tmp_path))
+    first = DuckDBExecutor(db)
+    second = DuckDBExecutor(db)
+    assert first.pool is second.pool
+
+    first.close()
+    first.close()
+    assert not second.pool.closed
+    assert len(second.execute("SELECT * FROM taxi_analysis_ready")) == 100
+
+    second.close()
+    assert second.pool.closed
+    reopened = DuckDBExecutor(db)
+    assert not reopened.pool.closed
+    reopened.close()
+
+
+def test_analyze_question_releases_its_executor(tmp_path, monkeypatch):
+    from benchmarks.datasets import taxi_db
+    from runners.analyze_question import analyze_question
+    from tools import sql_executor
+
+    monkeypatch.setenv("planner_cache_path", "")
+    db = taxi_db(100, str(tmp_path))
+
+    result = analyze_question("Average fare last month", db, summarize=False)
+
+    assert "descriptive_result" in result["diagnostics"]
+    assert db not in sql_executor._POOLS
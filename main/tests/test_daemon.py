@@ -0,0 +1,144 @@
+import json
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+from runners.daemon import ARROW_STREAM, AnalysisService, make_server, serve_in_thread
+
+
+CLAIMS_CSV = Path(__file__).resolve().parent.parent / "test_data" / "data1.csv"
+
+CLAIMS_PLAN = {
+    "intent": "descriptive",
+    "metric": "claim_count",
+    "time_range": "last_12_months",
+    "group_by": ["subprogram"],
+    "filters": [],
+    "analysis_steps": [],
+}
+
+
+@pytest.fixture(scope="module")
+def base_url(tmp_path_factory):
+    service = AnalysisService(
+        claims_csv=str(CLAIMS_CSV),
+        ingest_cache_dir=str(tmp_path_factory.mktemp("ingest")),
+    )
+    server = make_server(service, port=0)
+    serve_in_thread(server)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _post(url: str, body: dict, headers: dict | None = None):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["Content-Type"], response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.headers["Content-Type"], exc.read()
+
+
+def test_validate_single_and_many(base_url):
+    status, _, data = _post(f"{base_url}/claims/validate", {"plan": CLAIMS_PLAN})
+    assert status == 200
+    assert json.loads(data) == {"errors": []}
+
+    bad = dict(CLAIMS_PLAN, metric="made_up")
+    status, _, data = _post(f"{base_url}/claims/validate", {"plans": [CLAIMS_PLAN, bad]})
+    assert json.loads(data) == {
+        "errors": [[], ["Invalid metric (hallucinated): made_up"]]
+    }
+
+
+def test_claims_sql_uses_time_anchor(base_url):
+    status, _, data = _post(
+        f"{base_url}/claims/sql",
+        {"plan": dict(CLAIMS_PLAN, filters=[{"column": "category", "op": "=", "value": "A"}]),
+         "parameterized": True},
+    )
+    body = json.loads(data)
+    assert status == 200
+    assert "SELECT MAX" not in body["sql"]
+    assert body["params"] == ["A"]
+
+    status, _, data = _post(f"{base_url}/claims/sql", {"plan": dict(CLAIMS_PLAN, group_by=["x"])})
+    assert status == 422
+    assert json.loads(data)["error"] == "INVALID_PLAN"
+
+
+def test_execute_json_and_arrow(base_url):
+    status, content_type, data = _post(f"{base_url}/claims/execute", {"plan": CLAIMS_PLAN})
+    body = json.loads(data)
+    assert status == 200
+    assert content_type == "application/json"
+    assert body["row_count"] == len(body["rows"]) > 0
+
+    status, content_type, data = _post(
+        f"{base_url}/claims/execute", {"plan": CLAIMS_PLAN}, headers={"Accept": ARROW_STREAM}
+    )
+    table = pa.ipc.open_stream(data).read_all()
+    assert content_type == ARROW_STREAM
+    assert table.num_rows == body["row_count"]
+    assert table.column_names == list(body["rows"][0].keys())
+
+
+def test_errors(base_url):
+    status, _, data = _post(f"{base_url}/analyze", {"question": "hi"})
+    assert status == 404
+    assert "--db" in json.loads(data)["error"]
+
+    status, _, _ = _post(f"{base_url}/claims/sql", {"plan": "nope"})
+    assert status == 400
+
+    status, _, data = _post(f"{base_url}/claims/execute", {"plan": CLAIMS_PLAN, "limit": "10"})
+    assert status == 400
+    assert "limit" in json.loads(data)["error"]
+
+    with urllib.request.urlopen(f"{base_url}/health") as response:
+        assert json.loads(response.read())["claims"] is True
+
+
+def test_time_anchor_resolved_once(tmp_path, monkeypatch):
+    service = AnalysisService(
+        claims_csv=str(CLAIMS_CSV), ingest_cache_dir=str(tmp_path)
+    )
+    executor = service.claims_executor
+    anchor = service._claims_time_anchor()
+    assert anchor is not None
+
+    # Count queries from here on; they all go through executor.conn
+    queries = []
+    conn = type(executor).conn
+    monkeypatch.setattr(
+        type(executor), "conn", property(lambda self: queries.append(1) or conn.fget(self))
+    )
+    try:
+        for _ in range(3):
+            service.build_claims_sql({"plan": CLAIMS_PLAN})
+        assert queries == []
+
+        executor.mark_table_changed(service.claims_schema.table)
+        assert service._claims_time_anchor() == anchor
+        assert queries == [1]
+    finally:
+        service.close()
+
+
+def test_serve_never_unlinks_a_regular_file(tmp_path):
+    from cli.serve import _remove_socket
+
+    path = tmp_path / "not_a_socket"
+    path.write_text("data")
+    assert _remove_socket(str(path)) is False
+    assert path.exists()
+    assert _remove_socket(str(tmp_path / "missing")) is True
@@ -30,3 +30,28 @@ def test_diagnostic_execution():
 
     assert "period_comparison" in results
     assert "top_contributors" in results
+
+    comparison = results["period_comparison"]
+    assert list(comparison.columns) == [
+        "VendorID",
+        "avg_fare_current",
+        "avg_fare_previous",
+        "abs_change",
+        "pct_change",
+    ]
+
+
+def test_insight_payload_reads_arrow_batches_lazily():
+    from insights.schema import result_to_records
+
+    executor = DuckDBExecutor()
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    batches = executor.execute_batches(
+        "SELECT * FROM range(10) t(i)", batch_size=2
+    )
+    records = result_to_records(batches, limit=3)
+
+    assert [r["i"] for r in records] == [0, 1, 2]
+    # Only the first two batches were pulled
+    assert next(batches).to_pylist()[0]["i"] == 4
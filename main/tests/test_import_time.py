@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("openai", "pandas", "duckdb", "pyarrow", "numpy")
+
+# Generous wall-clock budget for our own import graph (interpreter startup
+# excluded); the real guard is that no heavy dependency is pulled in.
+IMPORT_BUDGET_MS = 250
+
+
+def _import_report(module: str) -> tuple[float, list[str]]:
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = (time.perf_counter() - t) * 1000\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    # No credentials: importing must not construct LLM clients
+    env = {k: v for k, v in os.environ.items() if k not in ("azure_api_key", "azure_endpoint")}
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=MAIN_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1].split(",") if len(out) > 1 else []
+
+
+@pytest.mark.parametrize("module", [
+    "runners.analyze_question",
+    "planners.planner_runner_claims",
+    "insights.summarizer_claims",
+    "tools.sql_builder_claims",
+    "planners.planner_validator_claims",
+    "cli.analyze",
+])
+def test_import_is_light(module):
+    elapsed_ms, heavy = _import_report(module)
+    assert heavy == []
+    assert elapsed_ms < IMPORT_BUDGET_MS
+
+
+def test_claims_schema_import_is_silent():
+    out = subprocess.run(
+        [sys.executable, "-c", "import schemas.claims_schema"],
+        cwd=MAIN_DIR, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout == ""
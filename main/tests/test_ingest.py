@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from tools.ingest import ingest_csv, schema_columns
+from tools.sql_executor import DuckDBExecutor
+
+
+CSV_TEXT = """providertaxid,claimnumber,totalpaidamount,loadmonth,category,exl_nofinding,exl_finding
+PRV1,CLM3,10.5,202503,CAT_A,0,1
+PRV2,CLM1,20.0,202501,CAT_B,1,0
+PRV1,CLM2,5.0,202502,CAT_A,1,1
+"""
+
+
+def _write_csv(tmp_path, text=CSV_TEXT):
+    path = tmp_path / "claims.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_schema_columns_include_expression_identifiers():
+    columns = schema_columns(HEALTHCARE_CLAIMS_SCHEMA)
+    assert {"loadmonth", "providertaxid", "exl_finding", "exl_nofinding"} <= columns
+    assert "claimnumber" not in columns
+
+
+def test_ingest_prunes_sorts_and_reuses_cache(tmp_path):
+    csv_path = _write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    parquet = ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=cache_dir)
+    mtime = os.stat(parquet).st_mtime_ns
+    assert ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=cache_dir) == parquet
+    assert os.stat(parquet).st_mtime_ns == mtime
+
+    executor = DuckDBExecutor()
+    executor.register_parquet("df_final", parquet)
+    df = executor.execute("SELECT * FROM df_final")
+    assert "claimnumber" not in df.columns
+    assert list(df["loadmonth"]) == [202501, 202502, 202503]
+
+    # The view is visible from worker threads' cursors too
+    seen = []
+    thread = threading.Thread(
+        target=lambda: seen.append(
+            executor.conn.execute("SELECT COUNT(*) FROM df_final").fetchone()[0]
+        )
+    )
+    thread.start()
+    thread.join()
+    assert seen == [3]
+
+
+def test_changed_csv_gets_new_parquet_and_fingerprint(tmp_path):
+    csv_path = _write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    first = ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=cache_dir)
+
+    executor = DuckDBExecutor()
+    executor.register_parquet("df_final", first)
+    before = executor.data_fingerprint()
+
+    _write_csv(tmp_path, CSV_TEXT + "PRV3,CLM4,1.0,202504,CAT_C,0,0\n")
+    second = ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=cache_dir)
+    assert second != first
+
+    executor.register_parquet("df_final", second)
+    assert executor.data_fingerprint() != before
+    assert executor.execute("SELECT COUNT(*) AS n FROM df_final")["n"][0] == 4
+
+
+def test_hash_index_drops_entries_without_outputs(tmp_path):
+    csv_path = _write_csv(tmp_path)
+    cache_dir = tmp_path / "cache"
+    first = ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=str(cache_dir))
+
+    index = json.loads((cache_dir / "hashes.json").read_text())
+    assert [entry["outputs"] for entry in index.values()] == [[os.path.basename(first)]]
+
+    # The first output is replaced by a new version of the CSV
+    os.remove(first)
+    _write_csv(tmp_path, CSV_TEXT + "PRV3,CLM4,1.0,202504,CAT_C,0,0\n")
+    second = ingest_csv(csv_path, HEALTHCARE_CLAIMS_SCHEMA, cache_dir=str(cache_dir))
+
+    index = json.loads((cache_dir / "hashes.json").read_text())
+    assert [entry["outputs"] for entry in index.values()] == [[os.path.basename(second)]]
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from benchmarks.datasets import taxi_db
+from runners.analyze_question import analyze_question, analyze_question_async
+from utils.llm_backend import (
+    LLMBackend,
+    LLMReplayMiss,
+    LLMRequestRejected,
+    LLMResponse,
+    RecordingBackend,
+    ReplayBackend,
+    get_llm_backend,
+    set_llm_backend,
+)
+
+
+PLAN = {
+    "intent": "descriptive",
+    "metric": "avg_fare",
+    "time_range": "last_month",
+    "group_by": ["vendor"],
+    "filters": [],
+    "analysis_steps": [],
+}
+
+
+class ScriptedBackend(LLMBackend):
+    """
+    Stands in for the live API: plans for the planner, a fixed summary
+    otherwise, and a rejection for prompts containing "forbidden".
+    """
+
+    def complete(self, messages, model, temperature, max_tokens):
+        text = messages[-1]["content"]
+        if "forbidden" in text:
+            raise LLMRequestRejected("content filtered")
+        content = json.dumps(PLAN) if max_tokens == 300 else "Average fare by vendor is stable."
+        return LLMResponse(content, {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15})
+
+
+def _call(backend, text, max_tokens=200):
+    return backend.complete([{"role": "user", "content": text}], "m", 0.2, max_tokens)
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = RecordingBackend(path, ScriptedBackend())
+
+    recorded = _call(recorder, "hello")
+    assert list(recorder.stream([{"role": "user", "content": "a b c"}], "m", 0.2, 200))
+    with pytest.raises(LLMRequestRejected):
+        _call(recorder, "forbidden")
+
+    replay = ReplayBackend(path, latency_ms=0)
+    assert len(replay) == 3
+    assert _call(replay, "hello") == recorded
+    with pytest.raises(LLMRequestRejected, match="content filtered"):
+        _call(replay, "forbidden")
+    with pytest.raises(LLMReplayMiss):
+        _call(replay, "never recorded")
+
+    # Same call site, different prompt
+    assert _call(ReplayBackend(path, latency_ms=0, strict=False), "other").content
+
+
+def test_replay_simulates_latency_and_streams(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    _call(RecordingBackend(path, ScriptedBackend()), "hello")
+
+    replay = ReplayBackend(path, latency_ms=50)
+    started = time.perf_counter()
+    chunks = list(replay.stream([{"role": "user", "content": "hello"}], "m", 0.2, 200))
+    assert time.perf_counter() - started >= 0.045
+    assert "".join(chunks) == "Average fare by vendor is stable."
+    assert len(chunks) > 1
+
+    response = asyncio.run(
+        replay.acomplete([{"role": "user", "content": "hello"}], "m", 0.2, 200)
+    )
+    assert response.usage["total_tokens"] == 15
+
+
+def test_analyze_question_offline(tmp_path, monkeypatch):
+    monkeypatch.setenv("planner_cache_path", "")
+    monkeypatch.setenv("rule_planner", "0")
+    db = taxi_db(2000, str(tmp_path))
+    path = str(tmp_path / "llm.jsonl")
+
+    set_llm_backend(RecordingBackend(path, ScriptedBackend()))
+    try:
+        recorded = analyze_question("Average fare by vendor last month?", db)
+    finally:
+        set_llm_backend(None)
+
+    monkeypatch.setenv("llm_backend", "replay")
+    monkeypatch.setenv("llm_record_path", path)
+    monkeypatch.setenv("llm_replay_latency_ms", "0")
+    assert isinstance(get_llm_backend(), ReplayBackend)
+
+    replayed = analyze_question("Average fare by vendor last month?", db)
+    assert replayed["plan"] == PLAN
+    assert replayed["summary"] == recorded["summary"]
+    planner_span = next(s for s in replayed["trace"] if s["name"] == "planner")
+    assert planner_span["attributes"]["total_tokens"] == 15
+
+
+def test_async_pipeline_on_replay(tmp_path, monkeypatch):
+    monkeypatch.setenv("planner_cache_path", str(tmp_path / "plans.sqlite"))
+    monkeypatch.setenv("rule_planner", "0")
+    db = taxi_db(2000, str(tmp_path))
+    path = str(tmp_path / "llm.jsonl")
+
+    set_llm_backend(RecordingBackend(path, ScriptedBackend()))
+    try:
+        recorded = asyncio.run(analyze_question_async("Average fare by vendor last month?", db))
+    finally:
+        set_llm_backend(None)
+
+    set_llm_backend(ReplayBackend(path, latency_ms=0))
+    try:
+        async def ask_twice():
+            return await asyncio.gather(*[
+                analyze_question_async("Average fare by vendor last month?", db)
+                for _ in range(2)
+            ])
+
+        replayed = asyncio.run(ask_twice())
+    finally:
+        set_llm_backend(None)
+
+    assert recorded["plan"] == PLAN
+    assert recorded["summary"] == "Average fare by vendor is stable."
+    for result in replayed:
+        assert result["plan"] == PLAN
+        assert result["summary"] == recorded["summary"]
+        names = [s["name"] for s in result["trace"]]
+        assert {"planner", "warm_up", "execute", "summarize"} <= set(names)
+        # Plan cache hit: no planner call was replayed
+        planner_span = next(s for s in result["trace"] if s["name"] == "planner")
+        assert "total_tokens" not in planner_span["attributes"]
+
+
+def test_backend_requires_complete():
+    class Incomplete(LLMBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_async_client_is_per_event_loop(monkeypatch):
+    import asyncio
+
+    from utils.llm_client import get_async_client, reset_clients
+
+    monkeypatch.setenv("azure_api_key", "test")
+    monkeypatch.setenv("azure_endpoint", "https://example.invalid")
+    reset_clients()
+
+    async def clients():
+        return get_async_client(), get_async_client()
+
+    try:
+        first, same = asyncio.run(clients())
+        second, _ = asyncio.run(clients())
+    finally:
+        reset_clients()
+
+    assert first is same
+    assert second is not first
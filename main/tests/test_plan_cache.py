@@ -0,0 +1,51 @@
+from planners.plan_cache import PlanCache, plan_cache_key
+from prompts.planner_prompt import build_planner_prompt
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+
+
+PLAN = {
+    "intent": "descriptive",
+    "metric": "avg_fare",
+    "time_range": "last_month",
+    "group_by": ["vendor"],
+    "filters": [],
+    "analysis_steps": []
+}
+
+
+def _key(question: str) -> str:
+    prompt = build_planner_prompt(schema=TAXI_SEMANTIC_SCHEMA, user_question="")
+    return plan_cache_key(question, TAXI_SEMANTIC_SCHEMA, prompt)
+
+
+def test_key_ignores_spacing_and_trailing_punctuation():
+    assert _key("Average fare by vendor last month?") == _key(
+        "  Average   fare by vendor last month "
+    )
+    assert _key("average fare by vendor") != _key("total fare by vendor")
+
+
+def test_key_keeps_case_of_filter_values():
+    assert _key("claims for category CAT_AUTO_SEL") != _key("claims for category cat_auto_sel")
+
+
+def test_plan_round_trip_and_persistence(tmp_path):
+    path = tmp_path / "plans.sqlite"
+    cache = PlanCache(path)
+    cache.put(_key("Avg fare by vendor"), PLAN)
+    cache.close()
+
+    reopened = PlanCache(path)
+    assert reopened.get(_key("Avg fare by vendor?")) == PLAN
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    expired = PlanCache(tmp_path / "ttl.sqlite", ttl_seconds=-1)
+    expired.put("k", PLAN)
+    assert expired.get("k") is None
+
+    bounded = PlanCache(tmp_path / "lru.sqlite", max_entries=2)
+    for key in ["a", "b", "c"]:
+        bounded.put(key, PLAN)
+    assert len(bounded) == 2
+    assert bounded.get("a") is None
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from prompts.planner_prompt import (
+    build_batch_planner_prompt,
+    build_planner_prompt,
+    render_schema,
+)
+from prompts.planner_prompt_claims import build_planner_prompt_claims
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from utils.tracing import annotate_usage, start_trace
+
+
+def test_static_prefix_with_question_last():
+    first = build_planner_prompt(schema=TAXI_SEMANTIC_SCHEMA, user_question="avg fare by vendor")
+    second = build_planner_prompt(schema=TAXI_SEMANTIC_SCHEMA, user_question="trip count")
+
+    # Memoized: the same string object for every question
+    assert first[0]["content"] is second[0]["content"]
+    assert first[-1]["content"].endswith("avg fare by vendor")
+    assert "avg fare by vendor" not in first[0]["content"]
+
+    batch = build_batch_planner_prompt(TAXI_SEMANTIC_SCHEMA, ["a", "b"])
+    assert batch[0]["content"] == first[0]["content"]
+    assert batch[-1]["content"].endswith("1. a\n2. b")
+
+
+def test_compact_schema_rendering():
+    text = render_schema(TAXI_SEMANTIC_SCHEMA)
+    assert "- avg_fare: avg(fare_amount)" in text
+    assert "time_range values: last_3_months, last_month" in text
+
+    claims = build_planner_prompt_claims("")[0]["content"]
+    assert "- hitrate: SUM(exl_finding) / NULLIF(SUM(exl_finding) + SUM(exl_nofinding), 0)" in claims
+    assert "- audits: SUM(exl_finding) + SUM(exl_nofinding) - Total audits" in claims
+    assert "custom(" not in claims
+    assert len(render_schema(HEALTHCARE_CLAIMS_SCHEMA)) < len(str(HEALTHCARE_CLAIMS_SCHEMA))
+
+
+def test_prefix_is_byte_stable_across_processes():
+    code = (
+        "import hashlib\n"
+        "from prompts.planner_prompt import build_planner_prompt\n"
+        "from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA\n"
+        "prefix = build_planner_prompt(TAXI_SEMANTIC_SCHEMA, '')[0]['content']\n"
+        "print(hashlib.sha256(prefix.encode()).hexdigest())\n"
+    )
+    digests = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env={**os.environ, "PYTHONHASHSEED": seed},
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(digests) == 1
+
+
+def test_usage_reports_cached_tokens():
+    usage = SimpleNamespace(
+        prompt_tokens=1200,
+        completion_tokens=40,
+        total_tokens=1240,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+    )
+    with start_trace("planner") as trace:
+        annotate_usage(usage)
+    attributes = trace.to_dicts()[0]["attributes"]
+    assert attributes["prompt_tokens"] == 1200
+    assert attributes["cached_tokens"] == 1024
@@ -0,0 +1,80 @@
+from tools.result_cache import ResultCache, normalize_sql
+from tools.sql_executor import DuckDBExecutor
+from tests.sample_data import sample_taxi_df
+
+
+SQL = "SELECT VendorID, AVG(fare_amount) AS avg_fare FROM taxi_analysis_ready GROUP BY VendorID"
+
+
+def test_normalize_sql_keeps_string_literals():
+    assert normalize_sql("SELECT  1\n  FROM t ;") == "SELECT 1 FROM t"
+    assert normalize_sql("SELECT 'a  b'") != normalize_sql("SELECT 'a b'")
+
+
+def test_repeated_query_served_from_cache():
+    cache = ResultCache()
+    executor = DuckDBExecutor(":memory:", cache=cache)
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    first = executor.execute(SQL)
+    second = executor.execute("  " + SQL.replace(" FROM", "\n    FROM"))
+
+    assert second.equals(first)
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_invalidated_when_table_changes():
+    cache = ResultCache()
+    executor = DuckDBExecutor(":memory:", cache=cache)
+    df = sample_taxi_df()
+    executor.register_table("taxi_analysis_ready", df)
+
+    before = executor.execute("SELECT COUNT(*) AS n FROM taxi_analysis_ready")
+
+    executor.register_table("taxi_analysis_ready", df.head(1))
+    after = executor.execute("SELECT COUNT(*) AS n FROM taxi_analysis_ready")
+
+    assert int(before.iloc[0]["n"]) == 3
+    assert int(after.iloc[0]["n"]) == 1
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    cache = ResultCache(max_bytes=100, disk_dir=str(tmp_path))
+
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"y" * 40)
+    cache.put("c", b"z" * 40)
+
+    assert cache.size_bytes <= 100
+    # "a" was evicted from memory but is still on disk
+    assert cache.get("a") == b"x" * 40
+
+
+def test_cached_dataframes_are_copies():
+    executor = DuckDBExecutor(":memory:", cache=ResultCache())
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    first = executor.execute(SQL)
+    first["avg_fare"] = 0
+    second = executor.execute(SQL)
+
+    assert second is not first
+    assert (second["avg_fare"] > 0).all()
+
+
+def test_process_local_fingerprints_skip_disk(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path))
+    executor = DuckDBExecutor(":memory:", cache=cache)
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    assert not executor.fingerprint_is_persistent()
+    executor.execute(SQL)
+    assert list(tmp_path.glob("*.pkl")) == []
+
+    from benchmarks.datasets import taxi_db
+
+    on_disk = DuckDBExecutor(taxi_db(100, str(tmp_path / "data")), cache=cache)
+    assert on_disk.fingerprint_is_persistent()
+    on_disk.execute(SQL)
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from tools.rollups import RollupManager
+from tools.sql_builder_claims import build_claims_sql
+from tools.sql_executor import DuckDBExecutor
+from tests.sample_data_claims import sample_claims_df
+
+
+def _plan(metric, group_by, filters=None):
+    return {
+        "intent": "descriptive",
+        "metric": metric,
+        "time_range": "last_3_months",
+        "group_by": group_by,
+        "filters": filters or [],
+        "analysis_steps": []
+    }
+
+
+def test_rollup_results_match_raw_table():
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("df_final", sample_claims_df())
+
+    rollups = RollupManager(executor, HEALTHCARE_CLAIMS_SCHEMA)
+    rollups.build(dimension_sets=[["category"], ["category", "subprogram"]])
+
+    plan = _plan(
+        "hitrate",
+        ["category"],
+        [{"column": "subprogramtype", "op": "=", "value": "CVA"}],
+    )
+
+    routed_sql = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA, rollups=rollups)
+    raw_sql = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA)
+    assert "df_final__rollup__category__subprogram" in routed_sql
+
+    routed = executor.execute(routed_sql).sort_values("category").reset_index(drop=True)
+    raw = executor.execute(raw_sql).sort_values("category").reset_index(drop=True)
+    pd.testing.assert_frame_equal(routed, raw)
+
+
+def test_unroutable_plans_use_raw_table():
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("df_final", sample_claims_df())
+
+    rollups = RollupManager(executor, HEALTHCARE_CLAIMS_SCHEMA)
+    rollups.build(max_dimensions=1)
+
+    # Row-level filter on a metric column
+    plan = _plan(
+        "claim_count",
+        ["category"],
+        [{"column": "totalpaidamount", "op": ">", "value": 1000}],
+    )
+    assert rollups.route(plan) is None
+
+    # Metric column missing from the data
+    assert rollups.route(_plan("selections", ["category"])) is None
+
+    # Rollups go stale when the data changes
+    assert rollups.route(_plan("claim_count", ["category"])) is not None
+    executor.register_table("df_final", sample_claims_df().head(10))
+    assert rollups.route(_plan("claim_count", ["category"])) is None
+
+
+def test_rollup_matches_raw_table_when_nothing_matches():
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("df_final", sample_claims_df())
+
+    rollups = RollupManager(executor, HEALTHCARE_CLAIMS_SCHEMA)
+    rollups.build(dimension_sets=[["category"]])
+
+    for metric in ["hitrate", "claim_count"]:
+        plan = _plan(metric, [], [{"column": "category", "op": "=", "value": "no such category"}])
+
+        routed_sql = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA, rollups=rollups)
+        raw_sql = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA)
+        assert "df_final__rollup__category" in routed_sql
+
+        pd.testing.assert_frame_equal(executor.execute(routed_sql), executor.execute(raw_sql))
+
+    assert executor.execute(routed_sql).iloc[0]["claim_count"] == 0
@@ -0,0 +1,77 @@
+import pytest
+
+from planners import rule_planner
+from planners.planner_validator import validate_plan
+from planners.planner_validator_claims import validate_plan_claims
+from planners.rule_planner import (
+    CLAIMS_RULE_PLANNER,
+    TAXI_RULE_PLANNER,
+    run_planner_claims_fast,
+)
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+
+
+@pytest.mark.parametrize("question, metric, time_range, group_by", [
+    ("total paid amount by category last month", "total_paid_amount", "last_month", ["category"]),
+    ("Total paid amount of claims by category last month?", "total_paid_amount", "last_month", ["category"]),
+    ("What is current month hitrate by subprogram?", "hitrate", "current_month", ["subprogram"]),
+    ("hit rate by subprogram and DRG condition, past 6 months", "hitrate", "last_6_months",
+     ["subprogram", "drg_condition"]),
+    ("How many claims last 12 months per provider", "claim_count", "last_12_months", ["provider"]),
+    ("selections this month", "selections", "current_month", []),
+])
+def test_claims_questions_are_planned_locally(question, metric, time_range, group_by):
+    plan = CLAIMS_RULE_PLANNER.plan(question)
+
+    assert plan == {
+        "intent": "descriptive",
+        "metric": metric,
+        "time_range": time_range,
+        "group_by": group_by,
+        "filters": [],
+        "analysis_steps": [],
+    }
+    assert validate_plan_claims(plan, HEALTHCARE_CLAIMS_SCHEMA) == []
+
+
+@pytest.mark.parametrize("question", [
+    "Why did hitrate drop last month?",            # diagnostic
+    "hitrate for provider 123 last month",         # filter
+    "total paid amount by category",               # no time range
+    "audits and selections last month",            # two metrics
+    "What is the average tip amount last month?",  # unknown metric
+    "hitrate category last month",                 # dimension without "by"
+    "claims and total paid amount last month",     # weak term as a second metric
+    "claims by provider mom",                      # comparison range
+])
+def test_uncertain_claims_questions_fall_back(question):
+    assert CLAIMS_RULE_PLANNER.plan(question) is None
+
+
+def test_taxi_rules_respect_supported_ranges():
+    plan = TAXI_RULE_PLANNER.plan("Show trip count by pickup location over the last 3 months")
+    assert plan["metric"] == "trip_count"
+    assert plan["group_by"] == ["pickup_location"]
+    assert validate_plan(plan, TAXI_SEMANTIC_SCHEMA) == []
+
+    assert TAXI_RULE_PLANNER.plan("total fare of trips last month")["metric"] == "total_fare"
+    assert TAXI_RULE_PLANNER.plan("trips and total fare last month") is None
+
+    # last_6_months is not a taxi range
+    assert TAXI_RULE_PLANNER.plan("average fare last 6 months") is None
+
+
+def test_fast_path_falls_back_to_llm_planner(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        rule_planner, "run_planner_claims",
+        lambda question, use_cache=True: calls.append(question) or {"metric": "llm"},
+    )
+
+    assert run_planner_claims_fast("hitrate by category last month")["metric"] == "hitrate"
+    assert run_planner_claims_fast("Why did hitrate drop?") == {"metric": "llm"}
+
+    monkeypatch.setenv("rule_planner", "0")
+    assert run_planner_claims_fast("hitrate by category last month") == {"metric": "llm"}
+    assert calls == ["Why did hitrate drop?", "hitrate by category last month"]
@@ -0,0 +1,71 @@
+import duckdb
+import pytest
+
+from test_data.sample_data_generator import (
+    COVERAGE_ROWS_PER_MONTH,
+    HEADER,
+    generate,
+    month_range,
+)
+
+
+def _scan(path) -> str:
+    return f"read_parquet('{path}/*/*.parquet', hive_partitioning = true)"
+
+
+def test_month_range_crosses_year():
+    assert month_range("202411", "202502") == ["202411", "202412", "202501", "202502"]
+
+
+def test_generate_partitioned_parquet(tmp_path):
+    out = tmp_path / "claims"
+    generate(str(out), rows=5000, start_month="202412", end_month="202502",
+             chunk_rows=1200, n_providers=500, zipf_a=1.5)
+
+    assert sorted(p.name for p in out.iterdir()) == [
+        "loadmonth=202412", "loadmonth=202501", "loadmonth=202502"
+    ]
+
+    conn = duckdb.connect()
+    df = conn.execute(f"SELECT * FROM {_scan(out)}").df()
+    assert len(df) == 5000
+    assert set(df.columns) == set(HEADER)
+    assert df["claimnumber"].is_unique
+    assert (df["loadmonth"] == df["selection_month"]).all()
+
+    combos = df.groupby("loadmonth")[
+        ["category", "drgconditiontype", "subprogramtype"]
+    ].apply(lambda g: len(g.drop_duplicates()))
+    assert (combos == COVERAGE_ROWS_PER_MONTH).all()
+
+    # Zipf skew: the top provider has far more claims than the median one
+    counts = df["providertaxid"].value_counts()
+    assert counts.iloc[0] > 20 * counts.median()
+
+
+def test_generate_is_deterministic(tmp_path):
+    generate(str(tmp_path / "a"), rows=1000, chunk_rows=300, seed=7)
+    generate(str(tmp_path / "b"), rows=1000, chunk_rows=300, seed=7)
+
+    conn = duckdb.connect()
+    a = conn.execute(f"SELECT * FROM {_scan(tmp_path / 'a')} ORDER BY claimnumber").df()
+    b = conn.execute(f"SELECT * FROM {_scan(tmp_path / 'b')} ORDER BY claimnumber").df()
+    assert a.equals(b)
+
+
+def test_generate_refuses_non_empty_output(tmp_path):
+    keep = tmp_path / "notes.txt"
+    keep.write_text("keep me")
+    with pytest.raises(FileExistsError):
+        generate(str(tmp_path), rows=1000, chunk_rows=500)
+    assert keep.exists()
+
+    stale = tmp_path / "loadmonth=202001"
+    stale.mkdir()
+    generate(str(tmp_path), rows=1000, chunk_rows=500, overwrite=True)
+
+    assert keep.read_text() == "keep me"
+    assert not stale.exists()
+    assert sorted(p.name for p in tmp_path.glob("loadmonth=*")) == [
+        "loadmonth=202506", "loadmonth=202507"
+    ]
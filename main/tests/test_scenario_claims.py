@@ -0,0 +1,59 @@
+import csv
+from pathlib import Path
+
+from scenario_test_claims import OUTPUT_COLUMNS, run_scenarios
+
+
+CLAIMS_CSV = Path(__file__).resolve().parent.parent / "test_data" / "data1.csv"
+
+
+def _read_report(path) -> tuple[list[str], dict[str, dict]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = {r["scenario_id"]: r for r in reader}
+    return reader.fieldnames, rows
+
+
+def test_parallel_scenarios_match_sequential(tmp_path):
+    cache_dir = str(tmp_path / "ingest")
+    run_scenarios(
+        str(CLAIMS_CSV), str(tmp_path / "seq.csv"),
+        workers=1, ingest_cache_dir=cache_dir,
+    )
+    run_scenarios(
+        str(CLAIMS_CSV), str(tmp_path / "par.csv"),
+        workers=3, ingest_cache_dir=cache_dir,
+    )
+
+    fields, sequential = _read_report(tmp_path / "seq.csv")
+    _, parallel = _read_report(tmp_path / "par.csv")
+
+    assert fields == OUTPUT_COLUMNS
+    assert sequential.keys() == parallel.keys()
+    for scenario_id, row in sequential.items():
+        other = parallel[scenario_id]
+        assert float(other["wall_time_ms"]) >= 0
+        for column in ("generated_sql", "sql_output_row_count", "execution_status"):
+            assert row[column] == other[column]
+
+
+def test_partitioned_parquet_matches_csv(tmp_path):
+    from test_data.sample_data_generator import generate
+
+    kwargs = dict(rows=3000, start_month="202410", end_month="202503", chunk_rows=1000)
+    generate(str(tmp_path / "claims.csv"), fmt="csv", **kwargs)
+    generate(str(tmp_path / "claims_parquet"), **kwargs)
+
+    run_scenarios(
+        str(tmp_path / "claims.csv"), str(tmp_path / "csv.csv"),
+        ingest_cache_dir=str(tmp_path / "ingest"),
+    )
+    run_scenarios(str(tmp_path / "claims_parquet"), str(tmp_path / "parquet.csv"))
+
+    _, from_csv = _read_report(tmp_path / "csv.csv")
+    _, from_parquet = _read_report(tmp_path / "parquet.csv")
+    assert from_csv.keys() == from_parquet.keys()
+    for scenario_id, row in from_csv.items():
+        other = from_parquet[scenario_id]
+        for column in ("sql_output_row_count", "execution_status"):
+            assert row[column] == other[column], (scenario_id, column)
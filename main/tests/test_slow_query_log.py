@@ -0,0 +1,79 @@
+import json
+
+from tools.slow_query_log import SlowQueryLog, get_slow_query_log, query_shape
+from tools.sql_executor import DuckDBExecutor
+
+
+def test_query_shape_ignores_literals():
+    a = query_shape("SELECT x FROM t WHERE m >= 202501 AND c IN ('A', 'B')")
+    b = query_shape("SELECT  x FROM t WHERE m >= 202410 AND c IN ('C')")
+    assert a == b == "SELECT x FROM t WHERE m >= ? AND c IN (?)"
+    assert query_shape("SELECT t1.x FROM t1") == "SELECT t1.x FROM t1"
+
+
+def test_slow_queries_are_logged_with_profile(tmp_path):
+    log_path = tmp_path / "slow.jsonl"
+    slow_log = SlowQueryLog(str(log_path), threshold_ms=0.0)
+    executor = DuckDBExecutor(slow_log=slow_log)
+    executor.conn.execute(
+        "CREATE TABLE t AS SELECT i, i % 10 AS g FROM range(10000) r(i)"
+    )
+
+    executor.execute("SELECT g, SUM(i) AS s FROM t WHERE i > 5 GROUP BY g")
+    executor.execute("SELECT g, SUM(i) AS s FROM t WHERE i > 7 GROUP BY g")
+    slow_log.close()
+
+    entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(entries) == 2
+    entry = entries[0]
+    assert entry["sql"].startswith("SELECT g, SUM(i)")
+    assert entry["rows_returned"] == 10
+    assert entry["rows_scanned"] == 10_000
+    assert entry["plan"]
+    assert "operator" in entry["plan"][0]
+
+    stats = slow_log.shape_stats()
+    assert list(stats) == ["SELECT g, SUM(i) AS s FROM t WHERE i > ? GROUP BY g"]
+    shape_stats = next(iter(stats.values()))
+    assert shape_stats["count"] == 2
+    assert shape_stats["slow_count"] == 2
+    assert shape_stats["max_rows_scanned"] == 10_000
+
+
+def test_fast_queries_only_update_stats(tmp_path):
+    log_path = tmp_path / "slow.jsonl"
+    slow_log = SlowQueryLog(str(log_path), threshold_ms=60_000, max_bytes=1024)
+    executor = DuckDBExecutor(slow_log=slow_log)
+
+    executor.execute_arrow("SELECT 1 AS x")
+    slow_log.close()
+
+    assert log_path.read_text() == ""
+    stats = slow_log.shape_stats()["SELECT ? AS x"]
+    assert stats["count"] == 1
+    assert stats["slow_count"] == 0
+
+
+def test_profiling_is_off_between_queries(tmp_path):
+    slow_log = SlowQueryLog(str(tmp_path / "slow.jsonl"), threshold_ms=0.0)
+    executor = DuckDBExecutor(slow_log=slow_log)
+
+    executor.execute("SELECT 1 AS x")
+    setting = executor.conn.execute(
+        "SELECT current_setting('enable_profiling')"
+    ).fetchone()[0]
+    slow_log.close()
+
+    assert setting is None
+
+
+def test_default_log_closes_replaced_handler(tmp_path, monkeypatch):
+    monkeypatch.setenv("slow_query_log_path", str(tmp_path / "a.jsonl"))
+    first = get_slow_query_log()
+
+    monkeypatch.setenv("slow_query_log_path", str(tmp_path / "b.jsonl"))
+    second = get_slow_query_log()
+    second.close()
+
+    assert second is not first
+    assert first._handler.stream is None
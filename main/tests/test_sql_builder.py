@@ -18,3 +18,24 @@ def test_avg_fare_last_month_by_vendor():
     assert "AVG(fare_amount)" in sql
     assert "FROM taxi_analysis_ready" in sql
     assert "GROUP BY VendorID" in sql
+
+
+def test_period_comparison_is_single_scan():
+    from tools.sql_builder import build_period_comparison_sql
+
+    plan = {
+        "intent": "diagnostic",
+        "metric": "total_fare",
+        "time_range": "last_month",
+        "group_by": ["vendor"],
+        "filters": [],
+        "analysis_steps": ["compare_previous_period"]
+    }
+
+    sql = build_period_comparison_sql(plan, TAXI_SEMANTIC_SCHEMA)
+    print(sql)
+
+    assert sql.count("FROM taxi_analysis_ready\n") == 1
+    assert "SUM(fare_amount) FILTER (WHERE" in sql
+    assert "AS total_fare_current" in sql
+    assert "AS pct_change" in sql
@@ -16,3 +16,62 @@ def test_duckdb_execution():
     print(df)
 
     assert not df.empty
+
+
+def test_duckdb_execution_arrow_and_batches():
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+
+    sql = "SELECT VendorID, fare_amount FROM taxi_analysis_ready"
+
+    table = executor.execute_arrow(sql)
+    assert table.num_rows == 3
+    assert table.column_names == ["VendorID", "fare_amount"]
+
+    batches = list(executor.execute_batches(sql, batch_size=2))
+    assert sum(b.num_rows for b in batches) == 3
+    assert all(b.num_rows <= 2 for b in batches)
+
+
+def test_parameterized_claims_query_shares_template():
+    from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+    from tools.sql_builder_claims import build_claims_query
+    from tests.sample_data_claims import sample_claims_df
+
+    executor = DuckDBExecutor(":memory:")
+    executor.register_table("df_final", sample_claims_df())
+
+    templates = set()
+    counts = []
+    for category in ["CAT_AUTO_SEL", "CAT_CVA_SEL"]:
+        plan = {
+            "intent": "descriptive",
+            "metric": "claim_count",
+            "time_range": "last_12_months",
+            "group_by": [],
+            "filters": [{"column": "category", "op": "=", "value": category}],
+            "analysis_steps": []
+        }
+        sql, params = build_claims_query(plan, HEALTHCARE_CLAIMS_SCHEMA)
+        assert "category = ?" in sql
+        assert params == [category]
+
+        templates.add(sql)
+        counts.append(int(executor.execute(sql, params).iloc[0]["claim_count"]))
+
+    assert len(templates) == 1
+    assert all(c > 0 for c in counts)
+
+
+def test_params_are_bound_not_interpolated():
+    import datetime
+
+    executor = DuckDBExecutor(":memory:")
+    row = executor.execute(
+        "SELECT ? + INTERVAL 1 DAY AS d, ? AS l, ? AS s",
+        [datetime.date(2024, 12, 31), [1, 2], "it's"]
+    ).iloc[0]
+
+    assert row["d"].date() == datetime.date(2025, 1, 1)
+    assert list(row["l"]) == [1, 2]
+    assert row["s"] == "it's"
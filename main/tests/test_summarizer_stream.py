@@ -0,0 +1,75 @@
+import asyncio
+import sys
+
+import pytest
+
+from cli import analyze as analyze_cli
+from insights.summarizer import astream_summarize_insights, stream_summarize_insights
+from insights.summarizer_claims import stream_summarize_insights_claims
+from utils.llm_backend import LLMBackend, LLMResponse, set_llm_backend
+
+
+SUMMARY = "Average fare rose 4% month over month."
+
+
+class ChunkingBackend(LLMBackend):
+    """
+    Streams SUMMARY word by word and records the requests it saw.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def complete(self, messages, model, temperature, max_tokens):
+        self.requests.append(messages)
+        return LLMResponse(SUMMARY)
+
+    def stream(self, messages, model, temperature, max_tokens):
+        self.requests.append(messages)
+        for word in SUMMARY.split(" "):
+            yield word + " "
+
+    async def astream(self, messages, model, temperature, max_tokens):
+        for chunk in self.stream(messages, model, temperature, max_tokens):
+            await asyncio.sleep(0)
+            yield chunk
+
+
+@pytest.fixture
+def backend():
+    fake = ChunkingBackend()
+    set_llm_backend(fake)
+    yield fake
+    set_llm_backend(None)
+
+
+def test_stream_summary_yields_chunks_in_order(backend):
+    payload = {"metric": "avg_fare", "findings": [{"value": 12.5}]}
+
+    chunks = list(stream_summarize_insights(payload))
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == SUMMARY
+    assert "avg_fare" in backend.requests[-1][-1]["content"]
+
+    claims_chunks = list(stream_summarize_insights_claims(payload))
+    assert "".join(claims_chunks).strip() == SUMMARY
+
+
+def test_async_stream_summary(backend):
+    async def collect():
+        return [chunk async for chunk in astream_summarize_insights({"metric": "avg_fare"})]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == SUMMARY
+
+
+def test_cli_rejects_stream_in_batch_mode(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", [
+        "analyze", "--questions-file", "questions.txt", "--db", "taxi.duckdb", "--stream"
+    ])
+    with pytest.raises(SystemExit) as exc:
+        analyze_cli.main()
+
+    assert exc.value.code == 2
+    assert "--stream cannot be used with --questions-file" in capsys.readouterr().err
@@ -0,0 +1,109 @@
+from schemas.claims_schema import HEALTHCARE_CLAIMS_SCHEMA
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from tools.sql_builder import build_sql
+from tools.sql_builder_claims import build_claims_sql
+from tools.sql_executor import DuckDBExecutor
+from tools.time_anchor import TimeAnchorResolver, shift_month
+from tests.sample_data import sample_taxi_df
+
+
+def test_shift_month_crosses_year_boundary():
+    assert shift_month(202501, -1) == 202412
+    assert shift_month(202506, -11) == 202407
+    assert shift_month("202503", -2) == "202501"
+
+
+def test_resolver_caches_per_data_version():
+    resolver = TimeAnchorResolver()
+    executor = DuckDBExecutor(":memory:")
+    df = sample_taxi_df()
+    executor.register_table("taxi_analysis_ready", df)
+
+    assert resolver.resolve(executor, TAXI_SEMANTIC_SCHEMA) == "2025-01"
+
+    # Same data version: served from cache even though the table is gone
+    executor.pool.cursor().unregister("taxi_analysis_ready")
+    assert resolver.resolve(executor, TAXI_SEMANTIC_SCHEMA) == "2025-01"
+
+    executor.register_table("taxi_analysis_ready", df[df["year_month"] == "2024-12"])
+    assert resolver.resolve(executor, TAXI_SEMANTIC_SCHEMA) == "2024-12"
+
+
+def test_builders_emit_literal_bounds_with_anchor():
+    plan = {
+        "intent": "descriptive",
+        "metric": "claim_count",
+        "time_range": "last_3_months",
+        "group_by": ["category"],
+        "filters": [],
+        "analysis_steps": []
+    }
+
+    claims_sql = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA, time_anchor=202502)
+    assert "loadmonth >= 202412" in claims_sql
+    assert "SELECT MAX" not in claims_sql
+
+    taxi_plan = dict(plan, metric="avg_fare", time_range="last_month", group_by=[])
+    taxi_sql = build_sql(taxi_plan, TAXI_SEMANTIC_SCHEMA, time_anchor="2025-01")
+    assert "year_month = '2025-01'" in taxi_sql
+
+
+def test_claims_fallback_matches_literal_bounds_across_years():
+    import pandas as pd
+
+    executor = DuckDBExecutor(":memory:")
+    months = [202411, 202412, 202501, 202502]
+    executor.register_table("df_final", pd.DataFrame({
+        "loadmonth": months,
+        "category": ["A"] * len(months),
+    }))
+
+    for time_range in ["last_month", "last_3_months", "last_12_months"]:
+        plan = {
+            "intent": "descriptive",
+            "metric": "claim_count",
+            "time_range": time_range,
+            "group_by": [],
+            "filters": [],
+            "analysis_steps": []
+        }
+        fallback = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA)
+        literal = build_claims_sql(plan, HEALTHCARE_CLAIMS_SCHEMA, time_anchor=202502)
+        assert "SELECT MAX" in fallback
+        assert executor.execute(fallback).equals(executor.execute(literal))
+
+    last_month = build_claims_sql(dict(plan, time_range="last_month"), HEALTHCARE_CLAIMS_SCHEMA)
+    assert int(executor.execute(last_month).iloc[0]["claim_count"]) == 1
+
+
+def test_temporal_anchors_render_as_typed_literals():
+    import pandas as pd
+
+    executor = DuckDBExecutor(":memory:")
+    months = pd.to_datetime(["2024-11-01", "2024-12-01", "2025-01-01", "2025-01-01"])
+    plan = {
+        "intent": "descriptive",
+        "metric": "avg_fare",
+        "time_range": "last_month",
+        "group_by": [],
+        "filters": [],
+        "analysis_steps": []
+    }
+
+    for year_month in [months, months.date]:
+        executor.register_table("taxi_analysis_ready", pd.DataFrame({
+            "year_month": year_month,
+            "fare_amount": [1.0, 2.0, 3.0, 5.0],
+        }))
+        anchor = TimeAnchorResolver().resolve(executor, TAXI_SEMANTIC_SCHEMA)
+
+        for time_range in ["last_month", "last_3_months"]:
+            literal = build_sql(
+                dict(plan, time_range=time_range), TAXI_SEMANTIC_SCHEMA, time_anchor=anchor
+            )
+            fallback = build_sql(dict(plan, time_range=time_range), TAXI_SEMANTIC_SCHEMA)
+            assert "SELECT MAX" not in literal
+            assert executor.execute(literal).equals(executor.execute(fallback))
+
+        last_month = build_sql(plan, TAXI_SEMANTIC_SCHEMA, time_anchor=anchor)
+        assert executor.execute(last_month).iloc[0]["avg_fare"] == 4.0
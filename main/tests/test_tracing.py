@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from diagnostics.executor import DiagnosticExecutor
+from schemas.taxi_semantic_schema import TAXI_SEMANTIC_SCHEMA
+from tests.sample_data import sample_taxi_df
+from tools.sql_executor import DuckDBExecutor
+from utils.tracing import annotate, export_trace, span, start_trace
+
+
+def test_spans_nest_and_record_errors():
+    with pytest.raises(ValueError):
+        with start_trace("root", question="q") as trace:
+            with span("child") as child:
+                child.set(rows=3)
+                annotate(sql="SELECT 1")
+            with span("failing"):
+                raise ValueError("boom")
+
+    spans = {s["name"]: s for s in trace.to_dicts()}
+    assert spans["root"]["parent_id"] is None
+    assert spans["root"]["attributes"] == {"question": "q"}
+    assert spans["child"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["child"]["attributes"] == {"rows": 3, "sql": "SELECT 1"}
+    assert spans["failing"]["status"] == "error"
+    assert spans["failing"]["error"] == "ValueError: boom"
+    assert spans["root"]["status"] == "error"
+    assert all(s["duration_ms"] >= 0 for s in spans.values())
+
+
+def test_span_outside_trace_is_noop():
+    with span("orphan") as s:
+        s.set(rows=1)
+        annotate(ignored=True)
+
+
+def test_diagnostic_steps_and_queries_are_traced(tmp_path):
+    executor = DuckDBExecutor()
+    executor.register_table("taxi_analysis_ready", sample_taxi_df())
+    plan = {
+        "intent": "diagnostic",
+        "metric": "avg_fare",
+        "time_range": "last_month",
+        "group_by": ["vendor"],
+        "filters": [],
+        "analysis_steps": ["compare_previous_period", "rank_top_contributors"],
+    }
+
+    with start_trace("diagnostics") as trace:
+        results = DiagnosticExecutor(TAXI_SEMANTIC_SCHEMA, executor).run(plan)
+
+    spans = trace.to_dicts()
+    names = [s["name"] for s in spans]
+    assert "diagnostics.compare_previous_period" in names
+    assert "diagnostics.rank_top_contributors" in names
+
+    by_id = {s["span_id"]: s for s in spans}
+    queries = [s for s in spans if s["name"] == "sql.execute"]
+    assert queries
+    for query in queries:
+        assert query["attributes"]["sql"]
+        assert query["attributes"]["cache_hit"] is False
+    comparison = next(
+        q for q in queries
+        if by_id[q["parent_id"]]["name"] == "diagnostics.compare_previous_period"
+    )
+    assert comparison["attributes"]["rows"] == len(results["period_comparison"])
+
+    jsonl_path = tmp_path / "trace.jsonl"
+    otlp_path = tmp_path / "trace.otlp.jsonl"
+    export_trace(trace, jsonl_path=str(jsonl_path), otlp_path=str(otlp_path))
+
+    lines = jsonl_path.read_text().splitlines()
+    assert len(lines) == len(spans)
+    assert json.loads(lines[0])["name"] == "diagnostics"
+
+    otlp = json.loads(otlp_path.read_text())
+    otlp_spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp_spans) == len(spans)
+    assert len(otlp_spans[0]["traceId"]) == 32
+    assert len(otlp_spans[0]["spanId"]) == 16
+    assert otlp_spans[0]["status"] == {"code": 1}
+
+
+def test_failed_analysis_is_exported(tmp_path, monkeypatch):
+    from runners import analyze_question as runner
+
+    def fail(question):
+        raise RuntimeError("planner down")
+
+    monkeypatch.setattr(runner, "run_planner_fast", fail)
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setenv("trace_jsonl_path", str(path))
+
+    with pytest.raises(RuntimeError):
+        runner.analyze_question("Average fare last month?", ":memory:")
+
+    spans = {s["name"]: s for s in map(json.loads, path.read_text().splitlines())}
+    assert spans["planner"]["error"] == "RuntimeError: planner down"
+    assert spans["analyze_question"]["status"] == "error"
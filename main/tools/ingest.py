@@ -0,0 +1,198 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import duckdb
+
+from tools.time_anchor import sql_literal
+from utils.logger import get_logger
+
+
+logger = get_logger("ingest")
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "agent_sql", "ingest")
+
+# Bump when the cached file layout changes, to invalidate old copies
+INGEST_FORMAT_VERSION = 1
+
+_HASH_CHUNK_BYTES = 8 * 1024 * 1024
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_hash_lock = threading.Lock()
+
+
+def schema_columns(schema: dict) -> set[str]:
+    """
+    Every identifier a semantic schema can make a query read: time column,
+    dimension columns, metric columns and names used in metric expressions.
+    """
+    texts = [schema["time"]["column"]]
+    for dim in schema["dimensions"].values():
+        texts.append(dim["column"])
+    for metric in schema["metrics"].values():
+        texts.append(metric.get("column", ""))
+        texts.append(metric.get("expression", ""))
+
+    names = set()
+    for text in texts:
+        names.update(_IDENTIFIER.findall(text))
+    return names
+
+
+def file_content_hash(path: str, cache_dir: str | None = None) -> str:
+    """
+    SHA-256 of a file's contents.
+
+    Hashes are remembered in cache_dir keyed by (path, mtime, size), so an
+    unchanged file is only read once. ingest_csv records the Parquet files
+    built from each entry; entries whose outputs are all gone are pruned
+    whenever the index is rewritten.
+    """
+    stamp = _file_stamp(path)
+
+    index_path = None
+    if cache_dir:
+        index_path = Path(cache_dir) / "hashes.json"
+        entry = _read_json(index_path).get(stamp)
+        if isinstance(entry, dict):
+            return entry["hash"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    if index_path is not None:
+        with _hash_lock:
+            index = _read_json(index_path)
+            index[stamp] = {"hash": content_hash, "outputs": []}
+            _write_index(index_path, index, keep=stamp)
+    return content_hash
+
+
+def ingest_csv(
+    csv_path: str,
+    schema: dict,
+    cache_dir: str | None = None
+) -> str:
+    """
+    Convert a CSV extract to a typed Parquet copy, reusing earlier copies.
+
+    The CSV is parsed with DuckDB's parallel reader, pruned to the columns
+    the schema references, sorted by the schema's time column (so month
+    filters skip row groups) and written as Parquet. The copy is keyed by
+    the CSV's content hash and the selected columns; later calls with the
+    same data return the cached file without parsing anything.
+
+    Args:
+        csv_path: CSV file with a header row
+        schema: Semantic schema (e.g. HEALTHCARE_CLAIMS_SCHEMA)
+        cache_dir: Cache directory; defaults to env "ingest_cache_dir" or
+            ~/.cache/agent_sql/ingest
+
+    Returns:
+        Path to the Parquet file.
+    """
+    cache_dir = os.path.expanduser(
+        cache_dir or os.environ.get("ingest_cache_dir") or DEFAULT_CACHE_DIR
+    )
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    wanted = schema_columns(schema)
+    columns = [name for name in header if name in wanted]
+    time_column = schema["time"]["column"]
+
+    key_source = json.dumps(
+        [INGEST_FORMAT_VERSION, file_content_hash(csv_path, cache_dir), columns]
+    )
+    key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:24]
+    parquet_path = Path(cache_dir) / f"{Path(csv_path).stem}-{key}.parquet"
+
+    if parquet_path.exists():
+        logger.info(f"Ingest cache hit: {parquet_path}")
+        _record_output(csv_path, cache_dir, parquet_path.name)
+        return str(parquet_path)
+
+    logger.info(f"Ingesting {csv_path} ({len(columns)}/{len(header)} columns)")
+
+    select = ", ".join(_quote(name) for name in columns)
+    order_by = f" ORDER BY {_quote(time_column)}" if time_column in columns else ""
+    tmp_path = parquet_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+    conn = duckdb.connect()
+    try:
+        conn.execute(
+            f"COPY (SELECT {select} "
+            f"FROM read_csv({sql_literal(os.path.abspath(csv_path))}, header = true)"
+            f"{order_by}) "
+            f"TO {sql_literal(str(tmp_path))} (FORMAT parquet, COMPRESSION zstd)"
+        )
+    finally:
+        conn.close()
+    os.replace(tmp_path, parquet_path)
+    _record_output(csv_path, cache_dir, parquet_path.name)
+
+    return str(parquet_path)
+
+
+def _file_stamp(path: str) -> str:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return f"{path}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _record_output(csv_path: str, cache_dir: str, output_name: str):
+    """
+    Note in the hash index that output_name (in cache_dir) was built from
+    the current contents of csv_path.
+    """
+    stamp = _file_stamp(csv_path)
+    index_path = Path(cache_dir) / "hashes.json"
+    with _hash_lock:
+        index = _read_json(index_path)
+        entry = index.get(stamp)
+        if not isinstance(entry, dict) or output_name in entry["outputs"]:
+            return
+        entry["outputs"].append(output_name)
+        _write_index(index_path, index, keep=stamp)
+
+
+def _write_index(index_path: Path, index: dict, keep: str):
+    """
+    Write the hash index, dropping entries (other than keep) none of whose
+    outputs still exist in the cache directory.
+    """
+    cache_dir = index_path.parent
+    index = {
+        stamp: entry for stamp, entry in index.items()
+        if stamp == keep or (
+            isinstance(entry, dict)
+            and any((cache_dir / name).exists() for name in entry["outputs"])
+        )
+    }
+    _write_atomic(index_path, json.dumps(index).encode("utf-8"))
+
+
+def _quote(name: str) -> str:
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        with path.open(encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
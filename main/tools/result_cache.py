@@ -0,0 +1,204 @@
+import hashlib
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Single-quoted SQL string literal ('' is an escaped quote)
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a SQL statement for cache keys.
+
+    Collapses whitespace and drops trailing semicolons, leaving string
+    literals untouched so 'a  b' and 'a b' stay distinct.
+    """
+    parts = _STRING_LITERAL.split(sql.strip().rstrip(";"))
+    for i in range(0, len(parts), 2):
+        parts[i] = " ".join(parts[i].split())
+    return "".join(parts).strip()
+
+
+def estimate_nbytes(value) -> int:
+    """
+    Approximate in-memory size of a cached result.
+    """
+    if hasattr(value, "nbytes") and not callable(value.nbytes):
+        # pyarrow.Table
+        return int(value.nbytes)
+    if hasattr(value, "memory_usage"):
+        # pandas.DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ResultCache:
+    """
+    LRU cache of query results bounded by a byte budget, with an optional
+    on-disk tier.
+
+    Keys combine normalized SQL with a data fingerprint supplied by the
+    executor, so results are never served after the underlying data
+    changes. Fingerprints that are only meaningful inside one process
+    (in-memory databases, registered DataFrames) must be stored with
+    persist=False, so they never reach the shared disk tier.
+
+    get() returns the cached object itself; DuckDBExecutor hands callers
+    copies of cached DataFrames (Arrow tables are immutable).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk_dir: str | None = None,
+        max_disk_bytes: int | None = None,
+    ):
+        """
+        Args:
+            max_bytes: In-memory budget. Results larger than this are only
+                kept on disk (if enabled).
+            disk_dir: Directory for the on-disk tier; None disables it.
+            max_disk_bytes: Optional budget for the on-disk tier; oldest
+                files are evicted first.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: OrderedDict[str, tuple[object, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        sql: str, fingerprint: str, kind: str = "df", params: list | None = None
+    ) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            sql: SQL text or template (normalized here)
+            fingerprint: Data version of the tables the query reads
+            kind: Result format ("df" or "arrow")
+            params: Bound parameter values for a SQL template
+        """
+        bound = repr(list(params)) if params else ""
+        raw = "\x1f".join([kind, fingerprint, normalize_sql(sql), bound])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def get(self, key: str, persist: bool = True):
+        """
+        Return the cached result for key, or None on a miss.
+
+        Args:
+            key: Cache key from make_key
+            persist: Also look in the disk tier
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._read_disk(key) if persist else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._put_memory(key, value, estimate_nbytes(value))
+        return value
+
+    def put(self, key: str, value, persist: bool = True):
+        """
+        Store a result in memory (evicting least recently used entries to
+        stay within budget) and, if enabled and persist is True, on disk.
+        """
+        nbytes = estimate_nbytes(value)
+        self._put_memory(key, value, nbytes)
+        if persist:
+            self._write_disk(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.disk_dir:
+            for path in self.disk_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+    # ---------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------
+    def _put_memory(self, key: str, value, nbytes: int):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._size += nbytes
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.pkl"
+
+    def _read_disk(self, key: str):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with path.open("rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # Touch so disk eviction is least-recently-used as well
+        os.utime(path)
+        return value
+
+    def _write_disk(self, key: str, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+        if self.max_disk_bytes is not None:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for path in self.disk_dir.glob("*.pkl"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
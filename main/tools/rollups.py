@@ -0,0 +1,250 @@
+import itertools
+import re
+import threading
+
+from utils.logger import get_logger
+
+
+logger = get_logger("rollups")
+
+# Rollups live in an attached in-memory catalog so they can be built even
+# when the main database file is opened read-only, and are visible from
+# every cursor of the pool.
+ROLLUP_CATALOG = "rollup_store"
+
+ROW_COUNT = "n_rows"
+
+_AGGREGATE_CALL = re.compile(
+    r"\b(SUM|COUNT|AVG|MIN|MAX)\s*\(\s*(\*|[A-Za-z_][A-Za-z0-9_]*)\s*\)",
+    re.IGNORECASE,
+)
+
+
+class RollupManager:
+    """
+    Builds and routes to pre-aggregated rollups of a semantic schema's table.
+
+    Each rollup stores additive components (row count, SUM / COUNT of metric
+    columns) per time column x dimension subset. Metrics, including ratios
+    such as hitrate, are re-derived from those components at query time, so
+    a plan grouped and filtered on rollup dimensions can be answered from a
+    table that is orders of magnitude smaller than the raw data.
+    """
+
+    def __init__(self, executor, schema: dict):
+        """
+        Args:
+            executor: DuckDBExecutor the rollups are built in and queried by
+            schema: Semantic schema (e.g. HEALTHCARE_CLAIMS_SCHEMA)
+        """
+        self.executor = executor
+        self.schema = schema
+        self.rollups = []
+        self.metric_exprs = {}
+        self.fingerprint = None
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    # Build
+    # ---------------------------------------------------------
+    def build(self, dimension_sets: list[list[str]] | None = None, max_dimensions: int = 1):
+        """
+        (Re)build rollups.
+
+        Args:
+            dimension_sets: Dimension-key subsets to materialize. Defaults to
+                every subset of up to max_dimensions dimensions (including the
+                empty subset, i.e. per-month totals).
+            max_dimensions: Subset size used when dimension_sets is omitted.
+        """
+        table = self.schema["table"]
+        time_column = self.schema["time"]["column"]
+        dimensions = self.schema["dimensions"]
+
+        if dimension_sets is None:
+            dimension_sets = [
+                list(combo)
+                for size in range(max_dimensions + 1)
+                for combo in itertools.combinations(dimensions, size)
+            ]
+        for dims in dimension_sets:
+            for dim in dims:
+                if dim not in dimensions:
+                    raise ValueError(f"Unknown dimension: {dim}")
+
+        table_columns = self._table_columns(table)
+        components, metric_exprs = self._plan_components(table_columns)
+
+        conn = self.executor.conn
+        conn.execute(
+            f"ATTACH IF NOT EXISTS ':memory:' AS {ROLLUP_CATALOG} (READ_ONLY false)"
+        )
+
+        # Build the widest rollups first so narrower ones can be derived
+        # from an already-built superset instead of the raw table.
+        built = []
+        ordered = sorted({tuple(sorted(d)) for d in dimension_sets}, key=len, reverse=True)
+        for dims in ordered:
+            name = f"{ROLLUP_CATALOG}.{table}__rollup__{'__'.join(dims) or 'total'}"
+            source = _smallest_superset(built, set(dims))
+
+            key_columns = [time_column] + [dimensions[d]["column"] for d in dims]
+            if source is None:
+                source_table = table
+                select_components = [f"{expr} AS {alias}" for alias, expr in components]
+            else:
+                source_table = source["table"]
+                select_components = [
+                    _reaggregate(alias) for alias, _ in components
+                ]
+
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {name} AS\n"
+                f"SELECT {', '.join(key_columns + select_components)}\n"
+                f"FROM {source_table}\n"
+                f"GROUP BY {', '.join(key_columns)}\n"
+                f"ORDER BY {time_column}"
+            )
+            row_count = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+            built.append({
+                "table": name,
+                "dimensions": frozenset(dims),
+                "row_count": row_count,
+            })
+            logger.info(f"Built rollup {name} ({row_count} rows)")
+
+        with self._lock:
+            self.rollups = built
+            self.metric_exprs = metric_exprs
+            self.fingerprint = self.executor.data_fingerprint()
+
+        return built
+
+    # ---------------------------------------------------------
+    # Routing
+    # ---------------------------------------------------------
+    def route(self, plan: dict) -> dict | None:
+        """
+        Find the smallest rollup that can answer plan.
+
+        Returns:
+            {"table": ..., "metric_expr": ...} or None if the plan must run
+            against the raw table (unsupported metric, non-dimension filter,
+            missing dimensions, or rollups built on an older data version).
+        """
+        with self._lock:
+            rollups = self.rollups
+            metric_exprs = self.metric_exprs
+            fingerprint = self.fingerprint
+
+        if not rollups:
+            return None
+
+        metric_expr = metric_exprs.get(plan.get("metric"))
+        if metric_expr is None:
+            return None
+
+        required = set(plan.get("group_by", []))
+        column_to_dim = {v["column"]: k for k, v in self.schema["dimensions"].items()}
+        time_column = self.schema["time"]["column"]
+        for f in plan.get("filters", []):
+            column = f.get("column")
+            if column == time_column:
+                continue
+            if column not in column_to_dim:
+                return None
+            required.add(column_to_dim[column])
+
+        rollup = _smallest_superset(rollups, required)
+        if rollup is None:
+            return None
+
+        if fingerprint != self.executor.data_fingerprint():
+            logger.warning("Rollups are stale for the current data version; skipping")
+            return None
+
+        return {"table": rollup["table"], "metric_expr": metric_expr}
+
+    # ---------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------
+    def _table_columns(self, table: str) -> set[str]:
+        description = self.executor.conn.execute(
+            f"SELECT * FROM {table} LIMIT 0"
+        ).description
+        return {col[0] for col in description}
+
+    def _plan_components(self, table_columns: set[str]):
+        """
+        Decide which additive components to store, and how each metric is
+        re-derived from them. Metrics that cannot be expressed additively or
+        that reference missing columns are left out (and never routed).
+        """
+        components = {ROW_COUNT: "COUNT(*)"}
+        metric_exprs = {}
+
+        for metric_key, metric_def in self.schema["metrics"].items():
+            aggregation = metric_def["aggregations"][0]
+            column = metric_def["column"]
+
+            if aggregation == "custom":
+                expression = metric_def["expression"]
+            elif aggregation == "count":
+                expression = "COUNT(*)" if column == "*" else f"COUNT({column})"
+            elif aggregation in {"sum", "avg"}:
+                expression = f"{aggregation.upper()}({column})"
+            else:
+                continue
+
+            needed = {}
+            routable = True
+            for func, arg in _AGGREGATE_CALL.findall(expression):
+                func = func.upper()
+                if arg != "*" and arg not in table_columns:
+                    routable = False
+                elif func == "SUM":
+                    needed[f"sum_{arg}"] = f"SUM({arg})"
+                elif func == "COUNT" and arg == "*":
+                    pass
+                elif func == "COUNT":
+                    needed[f"cnt_{arg}"] = f"COUNT({arg})"
+                elif func == "AVG":
+                    needed[f"sum_{arg}"] = f"SUM({arg})"
+                    needed[f"cnt_{arg}"] = f"COUNT({arg})"
+                else:
+                    routable = False
+            if not routable:
+                continue
+
+            components.update(needed)
+            metric_exprs[metric_key] = _AGGREGATE_CALL.sub(_rewrite_call, expression)
+
+        return list(components.items()), metric_exprs
+
+
+def _rewrite_call(match: re.Match) -> str:
+    func, arg = match.group(1).upper(), match.group(2)
+    # COUNT over no rows is 0, but SUM of the stored counts is NULL
+    if func == "COUNT" and arg == "*":
+        return f"COALESCE(CAST(SUM({ROW_COUNT}) AS BIGINT), 0)"
+    if func == "COUNT":
+        return f"COALESCE(CAST(SUM(cnt_{arg}) AS BIGINT), 0)"
+    if func == "SUM":
+        return f"SUM(sum_{arg})"
+    # AVG
+    return f"(SUM(sum_{arg}) / NULLIF(SUM(cnt_{arg}), 0))"
+
+
+def _reaggregate(alias: str) -> str:
+    # Counts are summed back to BIGINT; sums keep DuckDB's SUM result type.
+    if alias == ROW_COUNT or alias.startswith("cnt_"):
+        return f"CAST(SUM({alias}) AS BIGINT) AS {alias}"
+    return f"SUM({alias}) AS {alias}"
+
+
+def _smallest_superset(rollups: list[dict], dims: set) -> dict | None:
+    candidates = [r for r in rollups if dims <= r["dimensions"]]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: r["row_count"])
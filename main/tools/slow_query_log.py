@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from tools.result_cache import normalize_sql
+
+
+DEFAULT_THRESHOLD_MS = 500.0
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def query_shape(sql: str) -> str:
+    """
+    SQL with literals replaced by "?" and IN lists collapsed, so queries
+    that differ only in filter values or time bounds share a shape.
+    """
+    shape = _STRING_LITERAL.sub("?", normalize_sql(sql))
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _IN_LIST.sub("(?)", shape)
+
+
+class SlowQueryLog:
+    """
+    Per-shape query statistics plus a rotating JSONL log of slow queries.
+
+    Every executed query updates the stats of its shape (see query_shape).
+    Queries at or above threshold_ms are also written to path with their
+    SQL, parameters and, when DuckDB profiling is enabled, the operator
+    tree with timings, cardinalities, rows scanned and peak buffer memory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold_ms: float = DEFAULT_THRESHOLD_MS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        profile: bool = True
+    ):
+        """
+        Args:
+            path: JSONL log file; rotated to path.1 ... path.N
+            threshold_ms: Queries at least this slow are logged
+            max_bytes: Rotate once the log reaches this size
+            backup_count: Rotated files kept
+            profile: Profile each logged query with DuckDB (profiling is
+                on only while the query runs) so slow entries include the
+                operator tree
+        """
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.profile = profile
+
+        self._handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        sql: str,
+        elapsed_ms: float,
+        params: list | None = None,
+        profile: dict | None = None,
+        rows: int | None = None
+    ):
+        """
+        Account one executed query.
+
+        Args:
+            sql: SQL text or template
+            elapsed_ms: Wall time of the execution
+            params: Bound parameter values, if any
+            profile: DuckDB JSON profiling output for the query
+            rows: Result row count, if known
+        """
+        shape = query_shape(sql)
+        slow = elapsed_ms >= self.threshold_ms
+        rows_scanned = profile.get("cumulative_rows_scanned") if profile else None
+
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = {
+                    "count": 0,
+                    "slow_count": 0,
+                    "total_ms": 0.0,
+                    "min_ms": elapsed_ms,
+                    "max_ms": elapsed_ms,
+                    "max_rows_scanned": None,
+                    "example_sql": sql,
+                }
+                self._stats[shape] = stats
+            stats["count"] += 1
+            stats["slow_count"] += int(slow)
+            stats["total_ms"] += elapsed_ms
+            stats["min_ms"] = min(stats["min_ms"], elapsed_ms)
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if rows_scanned is not None:
+                stats["max_rows_scanned"] = max(stats["max_rows_scanned"] or 0, rows_scanned)
+
+        if not slow:
+            return
+
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "shape": shape,
+            "sql": sql,
+            "params": list(params) if params else None,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows_returned": rows,
+        }
+        if profile:
+            entry.update({
+                "rows_scanned": rows_scanned,
+                "peak_buffer_memory": profile.get("system_peak_buffer_memory"),
+                "cpu_time_ms": _ms(profile.get("cpu_time")),
+                "plan": [_operator(child) for child in profile.get("children", [])],
+            })
+
+        record = logging.LogRecord(
+            "slow_query", logging.INFO, __file__, 0,
+            json.dumps(entry, default=str), None, None,
+        )
+        self._handler.handle(record)
+
+    def shape_stats(self) -> dict[str, dict]:
+        """
+        Stats per query shape, slowest total time first.
+        """
+        with self._lock:
+            items = [(shape, dict(stats)) for shape, stats in self._stats.items()]
+
+        out = {}
+        for shape, stats in sorted(items, key=lambda kv: -kv[1]["total_ms"]):
+            stats["mean_ms"] = round(stats["total_ms"] / stats["count"], 3)
+            for key in ("total_ms", "min_ms", "max_ms"):
+                stats[key] = round(stats[key], 3)
+            out[shape] = stats
+        return out
+
+    def close(self):
+        self._handler.close()
+
+
+def _operator(node: dict) -> dict:
+    return {
+        "operator": node.get("operator_name") or node.get("operator_type"),
+        "timing_ms": _ms(node.get("operator_timing")),
+        "cardinality": node.get("operator_cardinality"),
+        "rows_scanned": node.get("operator_rows_scanned"),
+        "extra_info": node.get("extra_info") or None,
+        "children": [_operator(child) for child in node.get("children", [])],
+    }
+
+
+def _ms(seconds) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+_default_log = None
+_default_log_lock = threading.Lock()
+
+
+def get_slow_query_log() -> SlowQueryLog | None:
+    """
+    Process-wide slow-query log, or None if disabled.
+
+    Enabled by the slow_query_log_path environment variable; the threshold
+    comes from slow_query_threshold_ms (default 500).
+    """
+    global _default_log
+
+    path = os.environ.get("slow_query_log_path")
+    if not path:
+        return None
+
+    threshold_ms = float(
+        os.environ.get("slow_query_threshold_ms", DEFAULT_THRESHOLD_MS)
+    )
+    with _default_log_lock:
+        if (
+            _default_log is None
+            or _default_log.path != path
+            or _default_log.threshold_ms != threshold_ms
+        ):
+            if _default_log is not None:
+                _default_log.close()
+            _default_log = SlowQueryLog(path, threshold_ms=threshold_ms)
+        return _default_log
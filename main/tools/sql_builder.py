@@ -1,10 +1,20 @@
+from schemas.compiled import CompiledMetric, compile_schema
+from tools.time_anchor import sql_literal
+
+
 ALLOWED_FILTER_OPS = {"=", "!=", ">", ">=", "<", "<="}
 
-def build_sql(plan: dict, schema: dict) -> str:
+def build_sql(plan: dict, schema: dict, time_anchor=None) -> str:
     """
     Convert a validated planner JSON into SQL.
+
+    If time_anchor (the latest time value, see tools.time_anchor) is given,
+    it is inlined as a literal instead of a SELECT MAX subquery.
+
+    schema may be the semantic schema dict or its compiled form.
     """
-    table = schema["table"]
+    compiled = compile_schema(schema)
+    table = compiled.table
     metric = plan["metric"]
     group_by = plan.get("group_by", [])
     time_range = plan.get("time_range")
@@ -12,28 +22,17 @@ def build_sql(plan: dict, schema: dict) -> str:
     # ----------------------------
     # Metric mapping
     # ----------------------------
-    metric_def = schema["metrics"].get(metric)
+    metric_def = compiled.metrics.get(metric)
     if not metric_def:
         raise ValueError(f"Unsupported metric in SQL builder: {metric}")
 
-    column = metric_def["column"]
-    aggregation = metric_def["aggregations"][0]
-
-    if aggregation == "avg":
-        metric_expr = f"AVG({column}) AS {metric}"
-    elif aggregation == "sum":
-        metric_expr = f"SUM({column}) AS {metric}"
-    elif aggregation == "count":
-        metric_expr = "COUNT(*) AS trip_count"
-    else:
-        raise ValueError(f"Unsupported aggregation: {aggregation}")
+    metric_expr = _aggregate_expr(metric_def)
+    metric_expr += f" AS {_metric_alias(metric, metric_def)}"
 
     # ----------------------------
     # Group-by handling
     # ----------------------------
-    group_columns = []
-    for dim in group_by:
-        group_columns.append(schema["dimensions"][dim]["column"])
+    group_columns = [compiled.dimension_columns[dim] for dim in group_by]
 
     if group_columns:
         select_clause = ", ".join(group_columns + [metric_expr])
@@ -43,23 +42,8 @@ def build_sql(plan: dict, schema: dict) -> str:
     # ----------------------------
     # Time filtering
     # ----------------------------
-    time_column = schema["time"]["column"]
-    where_clause = ""
-
-    if time_range == "last_month":
-        where_clause = f"""
-        {time_column} = (
-            SELECT MAX({time_column}) FROM {table}
-        )
-        """
-    elif time_range == "last_3_months":
-        where_clause = f"""
-        {time_column} >= (
-            SELECT MAX({time_column}) FROM {table}
-        )
-        """
-    elif time_range:
-        raise ValueError(f"Unsupported time_range: {time_range}")
+    time_column = compiled.time_column
+    where_clause = _time_condition(table, time_column, time_range, time_anchor)
 
     # ----------------------------
     # Final SQL assembly
@@ -76,3 +60,97 @@ def build_sql(plan: dict, schema: dict) -> str:
         sql += f"\nGROUP BY {', '.join(group_columns)}"
 
     return sql.strip()
+
+
+def build_period_comparison_sql(
+    plan: dict,
+    schema: dict,
+    current_range: str = "last_month",
+    baseline_range: str = "last_3_months",
+    time_anchor=None
+) -> str:
+    """
+    Build a single-scan query comparing a metric between two periods.
+
+    Both periods are aggregated side by side per group with
+    FILTER (WHERE ...), and the absolute and percent change are computed
+    in-engine. Output columns: group columns, <metric>_current,
+    <metric>_previous, abs_change, pct_change.
+    """
+    compiled = compile_schema(schema)
+    table = compiled.table
+    metric = plan["metric"]
+    group_by = plan.get("group_by", [])
+
+    metric_def = compiled.metrics.get(metric)
+    if not metric_def:
+        raise ValueError(f"Unsupported metric in SQL builder: {metric}")
+
+    aggregate = _aggregate_expr(metric_def)
+    alias = _metric_alias(metric, metric_def)
+    current_col = f"{alias}_current"
+    previous_col = f"{alias}_previous"
+
+    time_column = compiled.time_column
+    current_cond = _time_condition(table, time_column, current_range, time_anchor)
+    baseline_cond = _time_condition(table, time_column, baseline_range, time_anchor)
+
+    group_columns = [compiled.dimension_columns[dim] for dim in group_by]
+
+    select_parts = group_columns + [
+        f"{aggregate} FILTER (WHERE {current_cond}) AS {current_col}",
+        f"{aggregate} FILTER (WHERE {baseline_cond}) AS {previous_col}",
+    ]
+
+    sql = (
+        "WITH periods AS (\n"
+        f"    SELECT {', '.join(select_parts)}\n"
+        f"    FROM {table}\n"
+        f"    WHERE ({current_cond}) OR ({baseline_cond})"
+    )
+    if group_columns:
+        sql += f"\n    GROUP BY {', '.join(group_columns)}"
+    sql += (
+        "\n)\n"
+        "SELECT *,\n"
+        f"    {current_col} - {previous_col} AS abs_change,\n"
+        f"    100.0 * ({current_col} - {previous_col}) / NULLIF({previous_col}, 0)"
+        " AS pct_change\n"
+        "FROM periods"
+    )
+    if group_columns:
+        sql += f"\nORDER BY {', '.join(group_columns)}"
+
+    return sql
+
+
+def _aggregate_expr(metric_def: CompiledMetric) -> str:
+    if metric_def.aggregation == "count":
+        return "COUNT(*)"
+    if metric_def.aggregation in ("avg", "sum"):
+        return metric_def.aggregate_sql
+    raise ValueError(f"Unsupported aggregation: {metric_def.aggregation}")
+
+
+def _metric_alias(metric: str, metric_def: CompiledMetric) -> str:
+    # COUNT(*) has always been exposed as trip_count
+    if metric_def.aggregation == "count":
+        return "trip_count"
+    return metric
+
+
+def _time_condition(
+    table: str, time_column: str, time_range: str | None, time_anchor=None
+) -> str:
+    if time_anchor is not None:
+        latest = sql_literal(time_anchor)
+    else:
+        latest = f"(SELECT MAX({time_column}) FROM {table})"
+
+    if time_range == "last_month":
+        return f"{time_column} = {latest}"
+    if time_range == "last_3_months":
+        return f"{time_column} >= {latest}"
+    if time_range:
+        raise ValueError(f"Unsupported time_range: {time_range}")
+    return ""
@@ -1,13 +1,63 @@
+from schemas.compiled import CompiledMetric, compile_schema
+from tools.time_anchor import shift_month, sql_literal
+
+
 ALLOWED_FILTER_OPS = {"=", "!=", ">", ">=", "<", "<=", "LIKE", "IN"}
 
+# Months back from the anchor (latest loadmonth) to the start of each range,
+# and whether the range is only that single month.
+_RANGE_MONTHS = {
+    "current_month": (0, True),
+    "last_month": (1, True),
+    "last_3_months": (2, False),
+    "last_6_months": (5, False),
+    "last_12_months": (11, False),
+}
+
 
-def build_claims_sql(plan: dict, schema: dict) -> str:
+def build_claims_sql(
+    plan: dict, schema: dict, time_anchor=None, rollups=None
+) -> str:
     """
     Build a claims SQL query from a semantic plan.
+
+    If time_anchor (the latest loadmonth, see tools.time_anchor) is given,
+    time ranges are emitted as literal month bounds; otherwise they are
+    computed in-query from SELECT MAX(loadmonth).
+
+    If rollups (a tools.rollups.RollupManager) is given and one of its
+    rollups can answer the plan, the query reads the smallest such rollup
+    and re-derives the metric from its stored components.
+
+    Filter values are inlined; see build_claims_query for the
+    parameterized form.
     """
-    table = schema["table"]
+    sql, _ = _assemble(plan, schema, time_anchor, rollups, params=None)
+    return sql
+
+
+def build_claims_query(
+    plan: dict, schema: dict, time_anchor=None, rollups=None
+) -> tuple[str, list]:
+    """
+    Build a parameterized claims query from a semantic plan.
+
+    Same as build_claims_sql, but filter values are bound as "?"
+    parameters. Plans that differ only in filter values (provider IDs,
+    categories, ...) share one SQL template, and values never need quoting
+    or escaping.
+
+    Returns:
+        (sql_template, params)
+    """
+    return _assemble(plan, schema, time_anchor, rollups, params=[])
+
+
+def _assemble(plan: dict, schema: dict, time_anchor, rollups, params: list | None):
+    compiled = compile_schema(schema)
+    table = compiled.table
     metric_key = plan["metric"]
-    metric_def = schema["metrics"].get(metric_key)
+    metric_def = compiled.metrics.get(metric_key)
     if not metric_def:
         raise ValueError(f"Unsupported metric: {metric_key}")
 
@@ -15,12 +65,17 @@ def build_claims_sql(plan: dict, schema: dict) -> str:
     time_range = plan.get("time_range", "current_month")
     filters = plan.get("filters", [])
 
-    metric_expr = _build_metric_expr(metric_key, metric_def)
-    group_columns = _build_group_columns(group_by_dims, schema)
-    where_conditions = _build_filter_conditions(filters)
-
-    time_column = schema["time"]["column"]
-    time_filter = _get_time_filter(table, time_column, time_range)
+    route = rollups.route(plan) if rollups is not None else None
+    if route:
+        table = route["table"]
+        metric_expr = f"{route['metric_expr']} AS {metric_key}"
+    else:
+        metric_expr = _build_metric_expr(metric_key, metric_def)
+    group_columns = _build_group_columns(group_by_dims, compiled.dimension_columns)
+    where_conditions = _build_filter_conditions(filters, params)
+
+    time_column = compiled.time_column
+    time_filter = _get_time_filter(table, time_column, time_range, time_anchor)
     if time_filter:
         where_conditions.append(time_filter)
 
@@ -30,36 +85,32 @@ def build_claims_sql(plan: dict, schema: dict) -> str:
         sql += "\nWHERE " + " AND ".join(where_conditions)
     if group_columns:
         sql += "\nGROUP BY " + ", ".join(group_columns)
-    return sql
+    return sql, params
 
 
-def _build_metric_expr(metric_key: str, metric_def: dict) -> str:
-    aggregation = metric_def["aggregations"][0]
-    column = metric_def["column"]
-    if aggregation == "custom":
-        return f"{metric_def['expression']} AS {metric_key}"
-    if aggregation == "avg":
-        return f"AVG({column}) AS {metric_key}"
-    if aggregation == "sum":
-        return f"SUM({column}) AS {metric_key}"
-    if aggregation == "count":
-        if column == "*":
-            return f"COUNT(*) AS {metric_key}"
-        return f"COUNT({column}) AS {metric_key}"
-    raise ValueError(f"Unsupported aggregation: {aggregation}")
+def _build_metric_expr(metric_key: str, metric_def: CompiledMetric) -> str:
+    if metric_def.aggregate_sql is None:
+        raise ValueError(f"Unsupported aggregation: {metric_def.aggregation}")
+    return f"{metric_def.aggregate_sql} AS {metric_key}"
 
 
-def _build_group_columns(group_by_dims: list[str], schema: dict) -> list[str]:
+def _build_group_columns(group_by_dims: list[str], dimension_columns) -> list[str]:
     columns = []
     for dim in group_by_dims:
-        dim_def = schema["dimensions"].get(dim)
-        if not dim_def:
+        column = dimension_columns.get(dim)
+        if not column:
             raise ValueError(f"Unknown dimension: {dim}")
-        columns.append(dim_def["column"])
+        columns.append(column)
     return columns
 
 
-def _build_filter_conditions(filters: list[dict]) -> list[str]:
+def _build_filter_conditions(filters: list[dict], params: list | None = None) -> list[str]:
+    """
+    Build WHERE conditions for plan filters.
+
+    If params is a list, values are emitted as "?" placeholders and appended
+    to it in order; otherwise they are inlined as literals.
+    """
     conditions = []
     for f in filters:
         column = f["column"]
@@ -72,27 +123,51 @@ def _build_filter_conditions(filters: list[dict]) -> list[str]:
         if op == "IN":
             if not isinstance(value, (list, tuple)) or not value:
                 raise ValueError("IN filter value must be a non-empty list or tuple")
-            values = [f"'{v}'" if isinstance(v, str) else str(v) for v in value]
+            if params is not None:
+                params.extend(value)
+                values = ["?"] * len(value)
+            else:
+                values = [f"'{v}'" if isinstance(v, str) else str(v) for v in value]
             conditions.append(f"{column} IN ({', '.join(values)})")
             continue
 
-        if isinstance(value, str):
+        if params is not None:
+            params.append(value)
+            conditions.append(f"{column} {op} ?")
+        elif isinstance(value, str):
             conditions.append(f"{column} {op} '{value}'")
         else:
             conditions.append(f"{column} {op} {value}")
     return conditions
 
 
-def _get_time_filter(table: str, time_column: str, time_range: str) -> str:
+def _get_time_filter(
+    table: str, time_column: str, time_range: str, time_anchor=None
+) -> str:
+    if time_anchor is not None:
+        return _literal_time_filter(time_column, time_range, time_anchor)
+
+    # Calendar-aware like the literal path: step back whole months from
+    # MAX(time_column) as a date, then back to a numeric YYYYMM
+    if time_range not in _RANGE_MONTHS:
+        return ""
+    months_back, single_month = _RANGE_MONTHS[time_range]
     max_month = f"(SELECT MAX({time_column}) FROM {table})"
-    if time_range == "current_month":
-        return f"{time_column} = {max_month}"
-    if time_range == "last_month":
-        return f"{time_column} = ({max_month} - 1)"
-    if time_range == "last_3_months":
-        return f"{time_column} >= ({max_month} - 2)"
-    if time_range == "last_6_months":
-        return f"{time_column} >= ({max_month} - 5)"
-    if time_range == "last_12_months":
-        return f"{time_column} >= ({max_month} - 11)"
-    return ""
+    start = (
+        f"CAST(strftime(strptime(CAST({max_month} AS VARCHAR), '%Y%m')"
+        f" - INTERVAL {months_back} MONTH, '%Y%m') AS INTEGER)"
+    )
+    if single_month:
+        return f"{time_column} = {start}"
+    return f"{time_column} >= {start}"
+
+
+def _literal_time_filter(time_column: str, time_range: str, time_anchor) -> str:
+    # Calendar-aware: last_month of 202501 is 202412, not 202500.
+    if time_range not in _RANGE_MONTHS:
+        return ""
+    months_back, single_month = _RANGE_MONTHS[time_range]
+    start = sql_literal(shift_month(time_anchor, -months_back))
+    if single_month:
+        return f"{time_column} = {start}"
+    return f"{time_column} >= {start}"
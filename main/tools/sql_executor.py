@@ -1,53 +1,493 @@
+import itertools
+import json
+import os
+import threading
+import time
+
 import duckdb
 
+from tools.time_anchor import sql_literal
+from utils.tracing import span
+
+
+DEFAULT_BATCH_SIZE = 100_000
+
+# Monotonic version stamped on every table registration, so a DataFrame
+# registered under a reused id() still yields a new data fingerprint.
+_TABLE_VERSIONS = itertools.count(1)
+_POOL_IDS = itertools.count(1)
+
+
+class ParquetView:
+    """
+    A Parquet file, or a hive-partitioned directory of Parquet files
+    (e.g. loadmonth=YYYYMM/part-*.parquet), exposed to queries as a view
+    (see register_parquet).
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    def scan_sql(self) -> str:
+        """
+        read_parquet(...) call scanning this source.
+        """
+        if os.path.isdir(self.path):
+            pattern = sql_literal(os.path.join(self.path, "**", "*.parquet"))
+            return f"read_parquet({pattern}, hive_partitioning = true)"
+        return f"read_parquet({sql_literal(self.path)})"
+
+    def fingerprint(self) -> str:
+        if not os.path.isdir(self.path):
+            st = os.stat(self.path)
+            return f"{self.path}:{st.st_mtime_ns}:{st.st_size}"
+
+        parts = [self.path]
+        for root, _, files in sorted(os.walk(self.path)):
+            for name in sorted(files):
+                if name.endswith(".parquet"):
+                    file_path = os.path.join(root, name)
+                    st = os.stat(file_path)
+                    relative = os.path.relpath(file_path, self.path)
+                    parts.append(f"{relative}:{st.st_mtime_ns}:{st.st_size}")
+        return "|".join(parts)
+
+
+class ConnectionPool:
+    """
+    Shared DuckDB database handle that hands out one cursor per thread.
+
+    DuckDB connections are not safe to use from several threads at once,
+    but cursors created from the same connection share the underlying
+    database. The pool opens the database once and lazily creates a cursor
+    for each worker thread that asks for one.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Open the DuckDB database backing this pool.
+
+        Args:
+            db_path (str): Path to DuckDB file, or ":memory:"
+        """
+        self.db_path = db_path
+        self.pool_id = next(_POOL_IDS)
+        # DuckDB does not support read-only mode for in-memory databases.
+        read_only = db_path != ":memory:"
+        self._root = duckdb.connect(database=db_path, read_only=read_only)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Owning thread -> cursor; entries of finished threads are pruned
+        self._cursors: dict[threading.Thread, object] = {}
+        # Executors holding this pool via get_pool()
+        self._users = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._root is None
+
+    def cursor(self):
+        """
+        Return the cursor owned by the calling thread, creating it if needed.
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is not None:
+            return cursor
+
+        with self._lock:
+            if self._root is None:
+                raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+            self._prune()
+            cursor = self._root.cursor()
+            self._cursors[threading.current_thread()] = cursor
+
+        self._local.cursor = cursor
+        return cursor
+
+    def close(self):
+        """
+        Close every cursor handed out by the pool and the database itself.
+        """
+        with self._lock:
+            for cursor in self._cursors.values():
+                cursor.close()
+            self._cursors = {}
+            if self._root is not None:
+                self._root.close()
+                self._root = None
+        self._local = threading.local()
+
+    def _prune(self):
+        # Called with self._lock held. Batch and daemon worker threads come
+        # and go; their cursors are closed once the thread has finished.
+        for thread in [t for t in self._cursors if not t.is_alive()]:
+            self._cursors.pop(thread).close()
+
+
+_POOLS: dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """
+    Return the shared pool for a database file, opening it on first use.
+
+    In-memory databases are private to whoever opens them, so ":memory:"
+    always gets a fresh, unshared pool.
+
+    Every call counts as one user of the pool; pair it with release_pool()
+    to close the pool once its last user is done.
+    """
+    if db_path == ":memory:":
+        return ConnectionPool(db_path)
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(db_path)
+        if pool is None or pool.closed:
+            pool = ConnectionPool(db_path)
+            _POOLS[db_path] = pool
+        pool._users += 1
+        return pool
+
+
+def release_pool(pool: ConnectionPool):
+    """
+    Drop one user of a shared pool from get_pool(), closing the pool when
+    it was the last one.
+    """
+    with _POOLS_LOCK:
+        pool._users -= 1
+        if pool._users > 0:
+            return
+        if _POOLS.get(pool.db_path) is pool:
+            del _POOLS[pool.db_path]
+    pool.close()
+
+
+def close_pools():
+    """
+    Close all shared database pools.
+    """
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.close()
+        _POOLS.clear()
+
 
 class DuckDBExecutor:
     """
     Thin wrapper around DuckDB for executing read-only analytical queries
     against an existing DuckDB database file.
+
+    Queries run on a per-thread cursor from a ConnectionPool, so a single
+    executor can be shared by worker threads.
     """
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        pool: ConnectionPool | None = None,
+        cache=None,
+        slow_log=None
+    ):
         """
         Initialize a connection to an existing DuckDB database.
 
         Args:
             db_path (str): Path to DuckDB file (e.g. data/taxi.duckdb)
+            pool (ConnectionPool, optional): Pool to draw cursors from.
+                Defaults to the shared pool for db_path.
+            cache (ResultCache, optional): Result cache consulted by
+                execute() and execute_arrow().
+            slow_log (SlowQueryLog, optional): Receives the timing (and,
+                if it asks for profiling, DuckDB's JSON profile) of every
+                query run by execute() and execute_arrow().
         """
         self.db_path = db_path
-        # DuckDB does not support read-only mode for in-memory databases.
-        read_only = db_path != ":memory:"
-        self.conn = duckdb.connect(
-            database=db_path,
-            read_only=read_only
-        )
+        self.pool = pool or get_pool(db_path)
+        self.cache = cache
+        self.slow_log = slow_log
+        # In-memory pools are private to this executor; file pools from
+        # get_pool are shared and reference-counted.
+        self._owns_pool = pool is None and db_path == ":memory:"
+        self._shares_pool = pool is None and db_path != ":memory:"
+        self._tables = {}
+        self._table_versions = {}
+        self._tables_lock = threading.Lock()
+        self._local = threading.local()
 
-    def execute(self, sql: str):
+    @property
+    def conn(self):
+        """
+        DuckDB cursor for the calling thread.
+
+        Registered DataFrames (and Parquet views, created as TEMP views)
+        are connection-local in DuckDB, so they are (re)registered on each
+        new thread cursor before first use.
+        """
+        cursor = self.pool.cursor()
+        registered = getattr(self._local, "registered", None)
+        if registered is None or self._local.cursor is not cursor:
+            registered = {}
+            self._local.cursor = cursor
+            self._local.registered = registered
+
+        with self._tables_lock:
+            pending = [
+                (name, df) for name, df in self._tables.items()
+                if registered.get(name) is not df
+            ]
+        for name, df in pending:
+            if isinstance(df, ParquetView):
+                cursor.unregister(name)
+                cursor.execute(
+                    f"CREATE OR REPLACE TEMP VIEW {name} AS "
+                    f"SELECT * FROM {df.scan_sql()}"
+                )
+            else:
+                cursor.execute(f"DROP VIEW IF EXISTS temp.main.{name}")
+                cursor.register(name, df)
+            registered[name] = df
+
+        return cursor
+
+    def data_fingerprint(self) -> str:
+        """
+        Identify the current version of the data this executor reads.
+
+        Combines the database file's mtime and size with the identity and
+        registration version of every registered DataFrame, and the path,
+        mtime and size of every registered Parquet file. Any change to
+        these yields a different fingerprint.
+        """
+        parts = []
+        if self.db_path != ":memory:":
+            st = os.stat(self.db_path)
+            parts.append(f"{os.path.abspath(self.db_path)}:{st.st_mtime_ns}:{st.st_size}")
+        else:
+            parts.append(f"memory:{self.pool.pool_id}")
+
+        with self._tables_lock:
+            for name in sorted(self._tables):
+                source = self._tables[name]
+                if isinstance(source, ParquetView):
+                    identity = source.fingerprint()
+                else:
+                    identity = id(source)
+                parts.append(f"{name}:{identity}:{self._table_versions[name]}")
+        return "|".join(parts)
+
+    def fingerprint_is_persistent(self) -> bool:
+        """
+        Whether data_fingerprint() means the same data in every process.
+
+        Only file databases and Parquet views qualify. In-memory pool ids
+        and DataFrame ids and versions restart in each process, so results
+        keyed by them must stay out of a shared on-disk cache.
+        """
+        if self.db_path == ":memory:":
+            return False
+        with self._tables_lock:
+            return all(isinstance(t, ParquetView) for t in self._tables.values())
+
+    def execute(self, sql: str, params: list | None = None):
         """
         Execute a SQL query and return results as a pandas DataFrame.
 
         Args:
-            sql (str): SQL query to execute
+            sql (str): SQL query to execute, or a template with "?"
+                placeholders when params is given
+            params (list, optional): Values bound to the placeholders
 
         Returns:
             pandas.DataFrame
         """
-        return self.conn.execute(sql).df()
+        return self._cached(
+            sql, "df", lambda: self._run(sql, params).df(), params
+        )
+
+    def execute_arrow(self, sql: str, params: list | None = None):
+        """
+        Execute a SQL query and return results as a pyarrow Table.
+
+        DuckDB hands Arrow buffers over without a pandas conversion, so this
+        is the cheapest way to materialize a full result.
+
+        Args:
+            sql (str): SQL query to execute, or a template with "?"
+                placeholders when params is given
+            params (list, optional): Values bound to the placeholders
+
+        Returns:
+            pyarrow.Table
+        """
+        def run():
+            result = self._run(sql, params)
+            to_table = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+            return to_table()
+
+        return self._cached(sql, "arrow", run, params)
+
+    def execute_batches(
+        self,
+        sql: str,
+        params: list | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        Execute a SQL query and yield results as pyarrow RecordBatches.
+
+        Rows are fetched lazily, so callers that stop early (e.g. after a
+        preview) never pull the rest of the result out of DuckDB. The
+        calling thread's cursor is busy until the generator is exhausted
+        or closed.
+
+        Args:
+            sql (str): SQL query to execute
+            params (list, optional): Values bound to "?" placeholders
+            batch_size (int): Maximum rows per batch
+
+        Yields:
+            pyarrow.RecordBatch
+        """
+        with span("sql.execute", sql=sql, kind="batches"):
+            result = self._run(sql, params)
+        to_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+        yield from to_reader(batch_size)
 
     def register_table(self, name: str, df):
         """
         Register a pandas DataFrame as a DuckDB table/view.
 
+        The registration applies to every thread that uses this executor.
+
         Args:
             name (str): Table name to register.
             df (pandas.DataFrame): DataFrame to register.
         """
-        self.conn.register(name, df)
+        with self._tables_lock:
+            self._tables[name] = df
+            self._table_versions[name] = next(_TABLE_VERSIONS)
+
+    def register_parquet(self, name: str, path: str):
+        """
+        Expose a Parquet file as a view named name.
+
+        DuckDB scans the file directly (with projection and row-group
+        pruning), so nothing is loaded into Python. Like register_table,
+        the view applies to every thread that uses this executor.
+
+        Args:
+            name (str): View name to register.
+            path (str): Parquet file path, or a hive-partitioned directory
+                (partition keys become columns, e.g. loadmonth).
+        """
+        with self._tables_lock:
+            self._tables[name] = ParquetView(path)
+            self._table_versions[name] = next(_TABLE_VERSIONS)
+
+    def mark_table_changed(self, name: str):
+        """
+        Signal that a registered DataFrame was modified in place, so cached
+        results that read it are no longer served.
+        """
+        with self._tables_lock:
+            self._table_versions[name] = next(_TABLE_VERSIONS)
+
+    def _run(self, sql: str, params: list | None):
+        """
+        Run sql on the calling thread's cursor.
+
+        params are bound by DuckDB to the "?" placeholders, never rendered
+        into the SQL text, so any value DuckDB can bind (dates, lists,
+        strings with quotes, ...) is passed through unchanged.
+        """
+        cursor = self.conn
+        if not params:
+            return cursor.execute(sql)
+        return cursor.execute(sql, list(params))
+
+    def _cached(self, sql: str, kind: str, run, params: list | None = None):
+        with span("sql.execute", sql=sql, kind=kind) as current:
+            if params:
+                current.set(params=repr(list(params)))
+
+            if self.slow_log is not None:
+                run = self._logged(sql, params, run)
+
+            if self.cache is None:
+                result = run()
+                cache_hit = False
+            else:
+                persist = self.fingerprint_is_persistent()
+                key = self.cache.make_key(sql, self.data_fingerprint(), kind, params)
+                result = self.cache.get(key, persist=persist)
+                cache_hit = result is not None
+                if result is None:
+                    result = run()
+                    self.cache.put(key, result, persist=persist)
+                if kind == "df":
+                    # Callers may modify their DataFrame; never the cached one
+                    result = result.copy()
+
+            current.set(cache_hit=cache_hit, rows=_row_count(result))
+            return result
+
+    def _logged(self, sql: str, params: list | None, run):
+        """
+        Wrap run so its wall time (and profile) reach the slow-query log.
+        """
+        def logged_run():
+            # Pooled cursors are shared with other executors, so profiling
+            # is switched on only for the duration of this query
+            profiling = self.slow_log.profile
+            if profiling:
+                cursor = self.conn
+                cursor.execute("PRAGMA enable_profiling = 'no_output'")
+                cursor.execute("SET profiling_mode = 'standard'")
+            try:
+                t0 = time.perf_counter()
+                result = run()
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+
+                profile = None
+                if profiling and elapsed_ms >= self.slow_log.threshold_ms:
+                    try:
+                        profile = json.loads(
+                            cursor.get_profiling_information(format="json")
+                        )
+                    except (duckdb.Error, ValueError):
+                        profile = None
+            finally:
+                if profiling:
+                    cursor.execute("PRAGMA disable_profiling")
+
+            self.slow_log.record(
+                sql, elapsed_ms, params=params, profile=profile,
+                rows=_row_count(result)
+            )
+            return result
+
+        return logged_run
 
     def close(self):
         """
-        Close the DuckDB connection.
+        Release the DuckDB connection.
+
+        A private pool (":memory:") is closed. A shared file pool is closed
+        once every executor using it has been closed; a pool passed in by
+        the caller is left to the caller.
         """
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        if self._owns_pool:
+            self.pool.close()
+        elif self._shares_pool:
+            self._shares_pool = False
+            release_pool(self.pool)
+
+
+def _row_count(result) -> int | None:
+    # pyarrow.Table or pandas.DataFrame
+    num_rows = getattr(result, "num_rows", None)
+    if num_rows is not None:
+        return int(num_rows)
+    return len(result) if hasattr(result, "__len__") else None
@@ -0,0 +1,107 @@
+import datetime
+import sys
+import threading
+
+
+class TimeAnchorResolver:
+    """
+    Resolves and caches the latest value of a schema's time column.
+
+    The anchor is computed once per (table, time column, data version), so
+    builders can emit literal month bounds instead of re-scanning the time
+    column with a SELECT MAX subquery in every query. Literal bounds also
+    let DuckDB prune row groups using min/max zone maps.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._anchors = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, executor, schema: dict):
+        """
+        Return the latest time value for schema's table, or None if the
+        table is empty.
+
+        Args:
+            executor: DuckDBExecutor (or compatible, with data_fingerprint())
+            schema: Semantic schema with "table" and "time" sections
+        """
+        table = schema["table"]
+        time_column = schema["time"]["column"]
+        key = (table, time_column, executor.data_fingerprint())
+
+        with self._lock:
+            if key in self._anchors:
+                return self._anchors[key]
+
+        anchor = executor.conn.execute(
+            f"SELECT MAX({time_column}) FROM {table}"
+        ).fetchone()[0]
+
+        with self._lock:
+            if len(self._anchors) >= self.max_entries:
+                self._anchors.clear()
+            self._anchors[key] = anchor
+        return anchor
+
+    def clear(self):
+        with self._lock:
+            self._anchors.clear()
+
+
+_default_resolver = TimeAnchorResolver()
+
+
+def resolve_time_anchor(executor, schema: dict):
+    """
+    Latest time value for schema's table via the process-wide resolver.
+    """
+    return _default_resolver.resolve(executor, schema)
+
+
+def shift_month(yyyymm, months: int):
+    """
+    Shift a YYYYMM month (int or str) by a number of calendar months,
+    keeping the input type. 202501 shifted by -1 is 202412.
+    """
+    value = int(yyyymm)
+    year, month = divmod(value, 100)
+    index = year * 12 + (month - 1) + months
+    shifted = (index // 12) * 100 + (index % 12) + 1
+    return str(shifted) if isinstance(yyyymm, str) else shifted
+
+
+def sql_literal(value) -> str:
+    """
+    Render a Python value as a SQL literal.
+
+    Dates and timestamps (datetime, pandas.Timestamp, numpy.datetime64)
+    become typed DATE / TIMESTAMP literals so they compare correctly
+    against temporal columns.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, str):
+        escaped = value.replace("'", "''")
+        return f"'{escaped}'"
+
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.datetime64):
+        if np.isnat(value):
+            return "NULL"
+        unit = np.datetime_data(value.dtype)[0]
+        day_or_coarser = unit in ("Y", "M", "W", "D")
+        value = value.astype("datetime64[D]" if day_or_coarser else "datetime64[us]").item()
+
+    # datetime first: it subclasses date (and pandas.Timestamp subclasses it)
+    if isinstance(value, datetime.datetime):
+        text = value.strftime("%Y-%m-%d %H:%M:%S.%f")
+        if value.tzinfo is not None:
+            return f"TIMESTAMPTZ '{text}{value.strftime('%z')}'"
+        return f"TIMESTAMP '{text}'"
+    if isinstance(value, datetime.date):
+        return f"DATE '{value.isoformat()}'"
+    return str(value)
@@ -0,0 +1,461 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from utils.llm_client import get_async_client, get_client
+
+
+@dataclass(frozen=True)
+class LLMResponse:
+    content: str | None
+    # {"prompt_tokens", "cached_tokens", "completion_tokens", "total_tokens"},
+    # if reported; cached_tokens is the prompt prefix served from the
+    # provider's prompt cache
+    usage: dict | None = None
+
+
+class LLMRequestRejected(Exception):
+    """
+    The provider refused the request (e.g. the Azure content filter).
+
+    str(exc) is the provider's error message.
+    """
+
+
+class LLMReplayMiss(KeyError):
+    """
+    A replay backend has no recording for the request.
+    """
+
+
+def request_key(messages: list, model: str, temperature: float, max_tokens: int) -> str:
+    """
+    Stable hash of everything that determines a chat completion.
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class LLMBackend(ABC):
+    """
+    Chat-completion interface used by the planners and summarizers.
+
+    complete() / acomplete() return an LLMResponse; stream() / astream()
+    yield text chunks. Provider refusals raise LLMRequestRejected.
+    Subclasses implement complete(); the other methods default to it.
+    """
+
+    @abstractmethod
+    def complete(self, messages: list, model: str, temperature: float, max_tokens: int) -> LLMResponse:
+        """
+        Run one chat completion.
+        """
+
+    async def acomplete(
+        self, messages: list, model: str, temperature: float, max_tokens: int
+    ) -> LLMResponse:
+        import asyncio
+
+        return await asyncio.to_thread(
+            self.complete, messages, model, temperature, max_tokens
+        )
+
+    def stream(self, messages: list, model: str, temperature: float, max_tokens: int):
+        content = self.complete(messages, model, temperature, max_tokens).content
+        if content:
+            yield content
+
+    async def astream(self, messages: list, model: str, temperature: float, max_tokens: int):
+        response = await self.acomplete(messages, model, temperature, max_tokens)
+        if response.content:
+            yield response.content
+
+
+class LiveBackend(LLMBackend):
+    """
+    Azure OpenAI via the shared clients in utils.llm_client.
+    """
+
+    def complete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        with _rejections():
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        return _to_response(response)
+
+    async def acomplete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        with _rejections():
+            response = await get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        return _to_response(response)
+
+    def stream(self, messages, model, temperature, max_tokens):
+        with _rejections():
+            stream = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            for chunk in stream:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+
+    async def astream(self, messages, model, temperature, max_tokens):
+        with _rejections():
+            stream = await get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            async for chunk in stream:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+
+
+class RecordingBackend(LLMBackend):
+    """
+    Forwards to another backend (live by default) and appends every
+    request/response pair to a JSONL file for ReplayBackend.
+
+    Each line holds the request key, the request, the response content and
+    usage (or the rejection message) and the observed latency.
+    """
+
+    def __init__(self, path: str, backend: LLMBackend | None = None):
+        self.path = path
+        self.backend = backend if backend is not None else LiveBackend()
+        self._lock = threading.Lock()
+
+    def complete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        started = time.perf_counter()
+        try:
+            response = self.backend.complete(messages, model, temperature, max_tokens)
+        except LLMRequestRejected as exc:
+            self._record(messages, model, temperature, max_tokens, started, rejected=str(exc))
+            raise
+        self._record(messages, model, temperature, max_tokens, started, response=response)
+        return response
+
+    async def acomplete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        started = time.perf_counter()
+        try:
+            response = await self.backend.acomplete(messages, model, temperature, max_tokens)
+        except LLMRequestRejected as exc:
+            self._record(messages, model, temperature, max_tokens, started, rejected=str(exc))
+            raise
+        self._record(messages, model, temperature, max_tokens, started, response=response)
+        return response
+
+    def stream(self, messages, model, temperature, max_tokens):
+        started = time.perf_counter()
+        chunks = []
+        try:
+            for text in self.backend.stream(messages, model, temperature, max_tokens):
+                chunks.append(text)
+                yield text
+        except LLMRequestRejected as exc:
+            self._record(messages, model, temperature, max_tokens, started, rejected=str(exc))
+            raise
+        self._record(
+            messages, model, temperature, max_tokens, started,
+            response=LLMResponse("".join(chunks)), chunks=len(chunks),
+        )
+
+    async def astream(self, messages, model, temperature, max_tokens):
+        started = time.perf_counter()
+        chunks = []
+        try:
+            async for text in self.backend.astream(messages, model, temperature, max_tokens):
+                chunks.append(text)
+                yield text
+        except LLMRequestRejected as exc:
+            self._record(messages, model, temperature, max_tokens, started, rejected=str(exc))
+            raise
+        self._record(
+            messages, model, temperature, max_tokens, started,
+            response=LLMResponse("".join(chunks)), chunks=len(chunks),
+        )
+
+    def _record(
+        self,
+        messages,
+        model,
+        temperature,
+        max_tokens,
+        started: float,
+        response: LLMResponse | None = None,
+        rejected: str | None = None,
+        chunks: int | None = None
+    ):
+        entry = {
+            "key": request_key(messages, model, temperature, max_tokens),
+            "request": {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        if rejected is not None:
+            entry["rejected"] = rejected
+        else:
+            entry["content"] = response.content
+            entry["usage"] = response.usage
+        if chunks is not None:
+            entry["chunks"] = chunks
+
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Serves recorded responses (see RecordingBackend) without network access.
+
+    Responses are matched by request key. With strict=False a request with
+    no exact recording gets the latest successful recording made with the
+    same model, temperature and max_tokens (i.e. from the same call site), so load
+    tests can run questions or data that differ from the recording.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency_ms: float | None = None,
+        latency_scale: float = 1.0,
+        strict: bool = True
+    ):
+        """
+        Args:
+            path: JSONL file written by RecordingBackend
+            latency_ms: Fixed simulated latency per call; None replays each
+                recording's observed latency
+            latency_scale: Multiplier applied to the simulated latency
+            strict: Raise LLMReplayMiss for unrecorded requests
+        """
+        self.path = path
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._entries = {}
+        self._by_call_site = {}
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                request = entry["request"]
+                self._entries[entry["key"]] = entry
+                if "rejected" in entry:
+                    continue
+                self._by_call_site[_call_site(
+                    request["model"], request["temperature"], request["max_tokens"]
+                )] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def complete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        entry = self._lookup(messages, model, temperature, max_tokens)
+        time.sleep(self._delay_s(entry))
+        return _replayed(entry)
+
+    async def acomplete(self, messages, model, temperature, max_tokens) -> LLMResponse:
+        import asyncio
+
+        entry = self._lookup(messages, model, temperature, max_tokens)
+        await asyncio.sleep(self._delay_s(entry))
+        return _replayed(entry)
+
+    def stream(self, messages, model, temperature, max_tokens):
+        entry = self._lookup(messages, model, temperature, max_tokens)
+        chunks = _split_chunks(_replayed(entry).content, entry.get("chunks"))
+        delay = self._delay_s(entry) / max(len(chunks), 1)
+        for text in chunks:
+            time.sleep(delay)
+            yield text
+
+    async def astream(self, messages, model, temperature, max_tokens):
+        import asyncio
+
+        entry = self._lookup(messages, model, temperature, max_tokens)
+        chunks = _split_chunks(_replayed(entry).content, entry.get("chunks"))
+        delay = self._delay_s(entry) / max(len(chunks), 1)
+        for text in chunks:
+            await asyncio.sleep(delay)
+            yield text
+
+    def _lookup(self, messages, model, temperature, max_tokens) -> dict:
+        entry = self._entries.get(request_key(messages, model, temperature, max_tokens))
+        if entry is None and not self.strict:
+            entry = self._by_call_site.get(_call_site(model, temperature, max_tokens))
+        if entry is None:
+            raise LLMReplayMiss(
+                f"No recorded response for {model} request in {self.path}"
+            )
+        return entry
+
+    def _delay_s(self, entry: dict) -> float:
+        latency_ms = self.latency_ms if self.latency_ms is not None else entry.get("latency_ms", 0)
+        return max(latency_ms * self.latency_scale, 0) / 1000
+
+
+def _call_site(model: str, temperature: float, max_tokens: int) -> tuple:
+    return model, float(temperature), int(max_tokens)
+
+
+def _replayed(entry: dict) -> LLMResponse:
+    if "rejected" in entry:
+        raise LLMRequestRejected(entry["rejected"])
+    return LLMResponse(entry.get("content"), entry.get("usage"))
+
+
+def _split_chunks(content: str | None, n: int | None) -> list[str]:
+    # Word-sized chunks, merged down to the recorded chunk count if known
+    if not content:
+        return []
+    words = re.findall(r"\S+\s*|\s+", content)
+    if not n or n >= len(words):
+        return words
+    size = -(-len(words) // n)
+    return ["".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+
+class _rejections:
+    """
+    Translate openai.BadRequestError into LLMRequestRejected.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            return False
+        from openai import BadRequestError
+
+        if issubclass(exc_type, BadRequestError):
+            raise LLMRequestRejected(str(exc)) from exc
+        return False
+
+
+def _to_response(response) -> LLMResponse:
+    usage = response.usage
+    return LLMResponse(
+        content=response.choices[0].message.content,
+        usage=None if usage is None else {
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": _cached_tokens(usage),
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        },
+    )
+
+
+def _cached_tokens(usage) -> int | None:
+    # Only reported by models / API versions with prompt caching
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None)
+
+
+def _chunk_text(chunk) -> str | None:
+    # Azure may send chunks without choices (e.g. content filter results)
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+
+_default_backend = None
+_default_backend_config = None
+_override_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def set_llm_backend(backend: LLMBackend | None):
+    """
+    Use backend for every LLM call in this process, overriding the
+    environment; None restores environment-based selection.
+    """
+    global _override_backend
+    _override_backend = backend
+
+
+def get_llm_backend() -> LLMBackend:
+    """
+    Process-wide LLM backend selected by environment variables:
+
+        llm_backend             "live" (default), "record" or "replay"
+        llm_record_path         JSONL recording written / read by
+                                record / replay
+        llm_replay_latency_ms   Fixed replay latency; unset replays the
+                                recorded latencies
+        llm_replay_latency_scale  Multiplier for the replay latency
+        llm_replay_strict       "0" to fall back to same-call-site
+                                recordings on a miss
+
+    set_llm_backend() overrides the environment.
+    """
+    global _default_backend, _default_backend_config
+
+    if _override_backend is not None:
+        return _override_backend
+
+    config = tuple(os.environ.get(name) for name in (
+        "llm_backend",
+        "llm_record_path",
+        "llm_replay_latency_ms",
+        "llm_replay_latency_scale",
+        "llm_replay_strict",
+    ))
+    with _default_backend_lock:
+        if _default_backend is None or _default_backend_config != config:
+            _default_backend = _make_backend(*config)
+            _default_backend_config = config
+        return _default_backend
+
+
+def _make_backend(kind, path, latency_ms, latency_scale, strict) -> LLMBackend:
+    kind = (kind or "live").lower()
+    if kind == "live":
+        return LiveBackend()
+    if not path:
+        raise ValueError(f"llm_backend={kind} requires llm_record_path")
+    if kind == "record":
+        return RecordingBackend(path)
+    if kind == "replay":
+        return ReplayBackend(
+            path,
+            latency_ms=float(latency_ms) if latency_ms else None,
+            latency_scale=float(latency_scale) if latency_scale else 1.0,
+            strict=strict not in ("0", "false", "False"),
+        )
+    raise ValueError(f"Unknown llm_backend: {kind}")
@@ -0,0 +1,75 @@
+import os
+import threading
+import weakref
+
+
+API_VERSION = "2024-12-01-preview"
+
+_clients = {}
+# Async clients by event loop: their connection pool is bound to the loop
+# that first used it, so each asyncio.run() needs its own client.
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Shared AzureOpenAI client, created on first use.
+
+    openai is imported here rather than at module import, so code paths
+    that never call the LLM (cached plans, builders, --help) skip it.
+    """
+    client = _clients.get("sync")
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get("sync")
+        if client is None:
+            from openai import AzureOpenAI
+
+            client = _new_client(AzureOpenAI)
+            _clients["sync"] = client
+        return client
+
+
+def get_async_client():
+    """
+    AsyncAzureOpenAI client for the asyncio pipeline, shared by everything
+    running on the current event loop and created on first use there.
+
+    Must be called from a coroutine.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncAzureOpenAI
+
+            client = _new_client(AsyncAzureOpenAI)
+            _async_clients[loop] = client
+        return client
+
+
+def reset_clients():
+    """
+    Drop the shared clients, e.g. after changing azure_api_key /
+    azure_endpoint in the environment.
+    """
+    with _clients_lock:
+        _clients.clear()
+        _async_clients.clear()
+
+
+def _new_client(client_cls):
+    return client_cls(
+        api_key = os.environ.get("azure_api_key"),
+        api_version = API_VERSION,
+        azure_endpoint = os.environ.get("azure_endpoint")
+    )
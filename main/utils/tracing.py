@@ -0,0 +1,266 @@
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+SERVICE_NAME = "agent_sql"
+
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed unit of work (a pipeline stage, a diagnostic step, a query).
+    """
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+        "_t0", "duration_ms", "attributes", "status", "error",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._t0 = time.perf_counter_ns()
+        self.duration_ms = None
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        elapsed = time.perf_counter_ns() - self._t0
+        self.end_ns = self.start_ns + elapsed
+        self.duration_ms = round(elapsed / 1e6, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Returned by span() outside a trace so callers never need to check.
+    """
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    The spans recorded for one request (e.g. one analyze_question call).
+    """
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Finished spans in start order.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        return [s.to_dict() for s in spans]
+
+    def to_otlp(self) -> dict:
+        """
+        The trace as an OTLP/JSON ExportTraceServiceRequest.
+        """
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [_otlp_attribute("service.name", SERVICE_NAME)]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [_otlp_span(s) for s in self.to_dicts()],
+                }],
+            }]
+        }
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Start a new trace with a root span named name.
+
+    Yields:
+        Trace: collects every span opened (in this context) until exit.
+    """
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a child of the current span.
+
+    Outside a trace this is a no-op. Exceptions mark the span as an error
+    and propagate.
+
+    Yields:
+        Span: call .set(key=value) to attach attributes.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name, trace.trace_id, parent.span_id if parent else None, attributes
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        trace.add(current)
+
+
+def annotate(**attributes):
+    """
+    Attach attributes to the current span, if any.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def annotate_usage(usage):
+    """
+    Attach LLM token counts (a usage dict, or an OpenAI-style usage object)
+    to the current span.
+
+    cached_tokens is the part of prompt_tokens served from the provider's
+    prompt cache (None if not reported).
+    """
+    if usage is None:
+        return
+    if not isinstance(usage, dict):
+        details = getattr(usage, "prompt_tokens_details", None)
+        usage = {
+            key: getattr(usage, key, None)
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+        }
+        usage["cached_tokens"] = getattr(details, "cached_tokens", None)
+    annotate(
+        prompt_tokens=usage.get("prompt_tokens"),
+        cached_tokens=usage.get("cached_tokens"),
+        completion_tokens=usage.get("completion_tokens"),
+        total_tokens=usage.get("total_tokens"),
+    )
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def export_trace(trace: Trace, jsonl_path: str | None = None, otlp_path: str | None = None):
+    """
+    Append a trace to exporter files.
+
+    Args:
+        trace: Finished trace
+        jsonl_path: One JSON span per line. Defaults to env "trace_jsonl_path".
+        otlp_path: One OTLP/JSON ExportTraceServiceRequest per line (the
+            OpenTelemetry file exporter format). Defaults to env
+            "trace_otlp_path".
+    """
+    jsonl_path = jsonl_path or os.environ.get("trace_jsonl_path")
+    otlp_path = otlp_path or os.environ.get("trace_otlp_path")
+
+    if jsonl_path:
+        lines = "".join(
+            json.dumps(s, default=str) + "\n" for s in trace.to_dicts()
+        )
+        _append(jsonl_path, lines)
+    if otlp_path:
+        _append(otlp_path, json.dumps(trace.to_otlp(), default=str) + "\n")
+
+
+_export_lock = threading.Lock()
+
+
+def _append(path: str, text: str):
+    with _export_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _otlp_span(span: dict) -> dict:
+    out = {
+        "traceId": span["trace_id"],
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span["start_ns"]),
+        "endTimeUnixNano": str(span["end_ns"]),
+        "attributes": [
+            _otlp_attribute(k, v) for k, v in span["attributes"].items()
+            if v is not None
+        ],
+        "status": (
+            {"code": 2, "message": span["error"]}
+            if span["status"] == "error" else {"code": 1}
+        ),
+    }
+    if span["parent_id"]:
+        out["parentSpanId"] = span["parent_id"]
+    return out
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}